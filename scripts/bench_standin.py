@@ -0,0 +1,71 @@
+"""
+Socket-level latency of set_labels_atomic and the bus handshake against the
+local OpenRGB SDK stand-in server (no hardware, plain Linux is fine).
+
+Run:
+  python scripts/bench_standin.py [iterations] [latency_ms] [jitter_ms] [drop] [quantize]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import rgb_controller as rc
+from openrgb.utils import RGBColor
+from backends import OpenRGBBackend, SDKStandInServer
+from utils.bus import BusInterface
+
+
+def _pct(samples, q):
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(q * len(s)))] if s else 0.0
+
+
+def _report(name, samples):
+    total = sum(samples)
+    print(f"{name:>18}: n={len(samples)} mean={total / max(1, len(samples)):.2f}ms "
+          f"p50={_pct(samples, 0.5):.2f} p99={_pct(samples, 0.99):.2f} max={max(samples or [0]):.2f} "
+          f"({len(samples) / (total / 1000.0) if total else 0:.0f}/s)")
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    n = int(argv[0]) if len(argv) > 0 else 200
+    latency = float(argv[1]) if len(argv) > 1 else 0.5
+    jitter = float(argv[2]) if len(argv) > 2 else 0.5
+    drop = float(argv[3]) if len(argv) > 3 else 0.0
+    quant = int(argv[4]) if len(argv) > 4 else 8
+
+    with SDKStandInServer(port=0, latency_ms=latency, jitter_ms=jitter, drop=drop,
+                          quantize=quant, seed=1) as srv:
+        rc.connect(backend=OpenRGBBackend(port=srv.port, transport=os.environ.get("RGB_TRANSPORT", "sync")),
+                   calibrate=False)
+        try:
+            labels = ["esc", "f1", "f2", "f3"]
+            atomic = []
+            for i in range(n):
+                on = (i % 2) * 255
+                t0 = time.perf_counter()
+                rc.set_labels_atomic({lab: RGBColor(on, 0, 255 - on) for lab in labels})
+                atomic.append((time.perf_counter() - t0) * 1000.0)
+            _report("set_labels_atomic", atomic)
+
+            bus = BusInterface(ack_mode="internal", ack_pulse_ms=1)
+            cycles = []
+            ok = 0
+            for _ in range(max(1, n // 4)):
+                t0 = time.perf_counter()
+                bus.begin_read()
+                ok += 1 if bus.handshake() else 0
+                bus.end_cycle()
+                cycles.append((time.perf_counter() - t0) * 1000.0)
+            _report("bus cycle", cycles)
+            print(f"handshake ok={ok}/{len(cycles)} server={srv.stats()}")
+        finally:
+            rc.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+"""키보드 LED 백엔드 (OpenRGB SDK 서버 / 프로세스 내 시뮬레이션 / 별도 I/O 프로세스)."""
+
+import importlib
+import os
+from typing import Any, Optional, Union
+
+from backends.base import KeyboardBackend, KeyboardDevice
+from backends.openrgb_backend import OpenRGBBackend
+from backends.sim_keyboard import SimKeyboard, SimKeyboardBackend
+
+# Loaded on first use, so `python -m backends.recording` (etc.) does not find
+# its own module already imported by this package
+_LAZY = {
+    "ProcessBackend": "backends.io_server",
+    "RecordingBackend": "backends.recording",
+    "ReplayBackend": "backends.recording",
+    "read_recording": "backends.recording",
+    "SDKStandInServer": "backends.sdk_standin",
+}
+
+__all__ = [
+    "KeyboardBackend",
+    "KeyboardDevice",
+    "OpenRGBBackend",
+    "ProcessBackend",
+    "RecordingBackend",
+    "ReplayBackend",
+    "SDKStandInServer",
+    "SimKeyboard",
+    "SimKeyboardBackend",
+    "make_backend",
+    "read_recording",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def make_backend(spec: Union[str, KeyboardBackend, None] = None,
+                 transport: Optional[str] = None) -> KeyboardBackend:
+    """Resolve a backend from an instance or a name.
+
+    Names: "openrgb" (default), "openrgb-async", "sim", "replay:<file>"
+    (RGB_REPLAY_SPEED: 0 = full speed, 1 = recorded I/O timing),
+    "proc" / "proc:<name>" (that backend, default RGB_PROC_BACKEND or
+    "openrgb", run in a separate LED I/O process).
+    When `spec` is None the RGB_BACKEND environment variable is used;
+    `transport` (or RGB_TRANSPORT) picks sync/async for "openrgb";
+    RGB_SDK_HOST / RGB_SDK_PORT point it at another server (e.g. the stand-in).
+    """
+    if isinstance(spec, KeyboardBackend):
+        return spec
+    name = str(spec or os.environ.get("RGB_BACKEND", "") or "openrgb").strip().lower()
+    if name == "proc" or name.startswith("proc:"):
+        inner = name[len("proc:"):] or os.environ.get("RGB_PROC_BACKEND", "") or "openrgb"
+        if inner == "proc" or inner.startswith("proc:"):
+            raise ValueError("proc backend cannot wrap itself")
+        from backends.io_server import ProcessBackend
+        return ProcessBackend(inner, transport)
+    if name.startswith("replay:"):
+        try:
+            speed = float(os.environ.get("RGB_REPLAY_SPEED", "0") or 0)
+        except Exception:
+            speed = 0.0
+        from backends.recording import ReplayBackend
+        return ReplayBackend(str(spec or os.environ.get("RGB_BACKEND", "")).strip()[len("replay:"):], speed=speed)
+    if name == "sim":
+        return SimKeyboardBackend.from_env()
+    if name in ("openrgb", "openrgb-async"):
+        mode = "async" if name == "openrgb-async" else (transport or os.environ.get("RGB_TRANSPORT", "") or "sync")
+        host = os.environ.get("RGB_SDK_HOST", "") or "127.0.0.1"
+        port = int(os.environ.get("RGB_SDK_PORT", "") or 6742)
+        return OpenRGBBackend(address=host, port=port, transport=mode)
+    raise ValueError(f"unknown backend: {spec!r} (openrgb | openrgb-async | sim | replay:<file> | proc[:<name>])")
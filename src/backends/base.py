@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+"""
+키보드 LED 백엔드 인터페이스
+
+rgb_controller는 백엔드가 돌려주는 "클라이언트"와 "장치" 객체만 사용한다.
+openrgb-python의 OpenRGBClient/Device가 이 계약을 그대로 만족하므로,
+다른 백엔드(시뮬레이션/리플레이 등)는 같은 모양의 객체를 제공하면 된다.
+
+클라이언트:
+- devices / get_devices()  : 장치 목록
+- disconnect()
+
+장치 (KeyboardDevice):
+- leds      : LED 목록 (각 LED: name, id, colors, set_color(color, fast=False))
+- colors    : 마지막 refresh 시점의 색 목록 (RGBColor)
+- update()  : refresh (서버/장치에서 현재 상태 다시 읽기)
+- set_colors(colors, fast=False) : 전체 LED 한 번에 쓰기
+- set_mode(mode), modes, active_mode, zones, type, id, name
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, List
+
+
+class KeyboardDevice(ABC):
+    """Device contract used by rgb_controller (openrgb Device conforms as-is)."""
+
+    id: int = 0
+    name: str = ""
+    leds: List[Any]
+    colors: List[Any]
+    zones: List[Any]
+    modes: List[Any]
+    active_mode: int = 0
+
+    @abstractmethod
+    def update(self) -> None:
+        """Refresh `colors`/LED state from the device."""
+
+    @abstractmethod
+    def set_colors(self, colors: List[Any], fast: bool = False) -> None:
+        """Write one color per LED."""
+
+    @abstractmethod
+    def set_mode(self, mode: Any) -> None:
+        """Switch mode by name, index or mode object."""
+
+
+class KeyboardBackend(ABC):
+    """Opens clients that expose keyboard devices to rgb_controller."""
+
+    name: str = "abstract"
+    # Extra wait after the readiness probes pass (0 = none needed)
+    startup_grace_s: float = 0.0
+
+    @abstractmethod
+    def connect(self) -> Any:
+        """Return a new client (devices / get_devices() / disconnect())."""
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+"""
+프로세스 분리 LED I/O 서버 백엔드
+
+별도 프로세스가 실제 백엔드(OpenRGB SDK 소켓, sim 등)를 소유하고,
+메인 프로세스(CPU._step_isa 인터프리터, 색 디코딩)는 프록시 장치만 쥔다.
+→ 디코딩이 GIL을 잡고 있어도 장치 I/O는 서버 프로세스에서 계속 진행되고, 그 반대도 같다.
+
+전송: multiprocessing.connection (Unix 소켓 / Windows named pipe, authkey 인증)
+- connect() 한 번 = 서버 쪽 세션 하나 = 내부 백엔드 클라이언트 하나 (읽기 채널/샤드도 각자 세션)
+- 쓰기(fast=True)는 프록시에 쌓였다가 send_batch()(rgb_controller가 푸시마다 호출)나
+  다음 읽기 때 한 메시지로 나간다. 쓰기는 응답을 기다리지 않는다.
+- update()(읽기)는 쌓인 쓰기 + 읽기를 한 번의 왕복으로 보내고 색을 bytes(3n)로 받는다.
+- 서버 쪽 쓰기 오류는 다음 읽기 응답으로 돌아와 ConnectionError 로 올라온다
+  (rgb_controller 의 링크 실패 카운트 → reconnect 경로를 그대로 탄다).
+
+사용: backend="proc" (내부 백엔드는 RGB_PROC_BACKEND, 기본 openrgb) 또는 "proc:sim"
+"""
+
+import os
+import threading
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Tuple
+
+from openrgb.utils import DeviceType, RGBColor
+
+from backends.base import KeyboardBackend, KeyboardDevice
+from backends.sim_keyboard import _SimMode
+
+# Batched operations (tuples, so pickling stays cheap)
+OP_LED, OP_FRAME, OP_ZONE, OP_MODE = 1, 2, 3, 4
+
+
+def _rgb(c: Any) -> Tuple[int, int, int]:
+    return (int(c.red), int(c.green), int(c.blue))
+
+
+def _colors_bytes(colors) -> bytes:
+    return bytes(v for c in colors for v in _rgb(c))
+
+
+# --- server process -------------------------------------------------------------
+
+def _describe(devices: List[Any]) -> List[Dict[str, Any]]:
+    out = []
+    for d in devices:
+        try:
+            zones = []
+            start = 0
+            for z in getattr(d, "zones", []) or []:
+                n = len(getattr(z, "leds", []) or [])
+                zones.append((str(z.name), start, n))
+                start += n
+            out.append({
+                "id": int(getattr(d, "id", 0)),
+                "name": str(getattr(d, "name", "")),
+                "type": int(getattr(d, "type", DeviceType.KEYBOARD)),
+                "leds": [str(led.name) for led in d.leds],
+                "zones": zones,
+                "modes": [(int(m.id), str(m.name)) for m in getattr(d, "modes", []) or []],
+                "active_mode": int(getattr(d, "active_mode", 0) or 0),
+                "colors": _colors_bytes(getattr(d, "colors", []) or []),
+            })
+        except Exception:
+            pass
+    return out
+
+
+def _run_ops(devices: List[Any], ops: List[tuple]) -> None:
+    for op in ops:
+        kind, dev = op[0], devices[op[1]]
+        if kind == OP_LED:
+            for idx, rgb in op[2]:
+                dev.leds[idx].set_color(RGBColor(*rgb), fast=True)
+        elif kind == OP_FRAME:
+            dev.set_colors([RGBColor(*rgb) for rgb in op[2]], fast=True)
+        elif kind == OP_ZONE:
+            dev.zones[op[2]].set_colors([RGBColor(*rgb) for rgb in op[3]], fast=True)
+        elif kind == OP_MODE:
+            dev.set_mode(op[2])
+
+
+def _serve_session(backend: KeyboardBackend, conn: Any) -> None:
+    client = None
+    devices: List[Any] = []
+    error: Optional[str] = None
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            cmd = msg[0]
+            if cmd == "hello":
+                # Enumerate (the caller polls until a keyboard shows up)
+                try:
+                    if client is None:
+                        client = backend.connect()
+                    devices = list(getattr(client, "devices", None) or client.get_devices() or [])
+                    conn.send(("ok", _describe(devices)))
+                except Exception as ex:
+                    conn.send(("err", f"{type(ex).__name__}: {ex}"))
+            elif cmd == "batch":
+                # ("batch", ops, read_dev or None)
+                try:
+                    _run_ops(devices, msg[1])
+                except Exception as ex:
+                    error = error or f"{type(ex).__name__}: {ex}"
+                if msg[2] is None:
+                    continue
+                try:
+                    if error is not None:
+                        raise ConnectionError(error)
+                    dev = devices[msg[2]]
+                    dev.update()
+                    conn.send(("ok", _colors_bytes(dev.colors), int(getattr(dev, "active_mode", 0) or 0)))
+                except Exception as ex:
+                    conn.send(("err", error or f"{type(ex).__name__}: {ex}"))
+                error = None
+            elif cmd == "close":
+                break
+    finally:
+        try:
+            if client is not None:
+                client.disconnect()
+        except Exception:
+            pass
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _server_main(spec: str, transport: Optional[str], authkey: bytes, ready: Any) -> None:
+    """Entry point of the I/O process: owns the backend, one thread per session."""
+    from backends import make_backend
+
+    listener = Listener(authkey=authkey)
+    backend = make_backend(spec, transport)
+    ready.send(listener.address)
+    ready.close()
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception:
+            continue
+        threading.Thread(target=_serve_session, args=(backend, conn), name="led-io-session", daemon=True).start()
+
+
+# --- client side (main process) -------------------------------------------------
+
+class _ProcLED:
+    def __init__(self, dev: "ProcKeyboard", idx: int, name: str) -> None:
+        self._dev = dev
+        self.id = idx
+        self.name = name
+
+    @property
+    def colors(self) -> List[RGBColor]:
+        return [self._dev.colors[self.id]]
+
+    def set_color(self, color: RGBColor, fast: bool = False) -> None:
+        self._dev._queue_led(self.id, _rgb(color))
+        if not fast:
+            self._dev.update()
+
+
+class _ProcZone:
+    def __init__(self, dev: "ProcKeyboard", zone_id: int, name: str, start: int, count: int) -> None:
+        self._dev = dev
+        self.id = zone_id
+        self.name = name
+        self.leds = dev.leds[start:start + count]
+
+    def set_colors(self, colors: List[RGBColor], fast: bool = False) -> None:
+        if len(colors) != len(self.leds):
+            raise IndexError("Number of colors doesn't match number of LEDs in the zone")
+        self._dev._queue((OP_ZONE, self._dev._pos, self.id, [_rgb(c) for c in colors]))
+        if not fast:
+            self._dev.update()
+
+
+class ProcKeyboard(KeyboardDevice):
+    """Proxy for a device owned by the I/O process; writes are batched per push."""
+
+    def __init__(self, session: "_Session", pos: int, desc: Dict[str, Any]) -> None:
+        self._session = session
+        self._pos = pos
+        self._ops: List[tuple] = []
+        self._single: List[Tuple[int, Tuple[int, int, int]]] = []
+        self.id = int(desc["id"])
+        self.name = str(desc["name"])
+        self.type = DeviceType(desc["type"])
+        self.leds = [_ProcLED(self, i, nm) for i, nm in enumerate(desc["leds"])]
+        self.zones = [_ProcZone(self, z, nm, start, n) for z, (nm, start, n) in enumerate(desc["zones"])]
+        self.modes = [_SimMode(mid, nm) for mid, nm in desc["modes"]]
+        self.active_mode = int(desc["active_mode"])
+        self.colors: List[RGBColor] = []
+        # Packed readback; rgb_controller reads it as an array without RGBColor objects
+        self.raw_colors = b""
+        self._set_colors_bytes(desc["colors"])
+
+    def _set_colors_bytes(self, raw: bytes) -> None:
+        cols = [RGBColor(raw[i], raw[i + 1], raw[i + 2]) for i in range(0, len(raw) - 2, 3)]
+        if len(cols) == len(self.leds):
+            self.colors = cols
+            self.raw_colors = bytes(raw)
+        elif not self.colors:
+            self.colors = [RGBColor(0, 0, 0) for _ in self.leds]
+            self.raw_colors = bytes(3 * len(self.leds))
+
+    def _queue_led(self, idx: int, rgb: Tuple[int, int, int]) -> None:
+        if not (0 <= idx < len(self.leds)):
+            raise IndexError(idx)
+        with self._session.lock:
+            self._single.append((idx, rgb))
+
+    def _queue(self, op: tuple) -> None:
+        with self._session.lock:
+            self._take_single()
+            self._ops.append(op)
+
+    def _take_single(self) -> None:
+        # Runs of single-LED writes travel as one op (keeps ordering with other ops)
+        if self._single:
+            self._ops.append((OP_LED, self._pos, self._single))
+            self._single = []
+
+    def _take_ops(self) -> List[tuple]:
+        self._take_single()
+        ops, self._ops = self._ops, []
+        return ops
+
+    def send_batch(self) -> None:
+        """Ship queued writes in one message without waiting for the server."""
+        with self._session.lock:
+            ops = self._take_ops()
+            if ops:
+                self._session.send(("batch", ops, None))
+
+    # --- KeyboardDevice -------------------------------------------------------
+    def update(self) -> None:
+        # Queued writes and the read share one round trip
+        with self._session.lock:
+            reply = self._session.call(("batch", self._take_ops(), self._pos))
+        self._set_colors_bytes(reply[1])
+        self.active_mode = int(reply[2])
+
+    def set_colors(self, colors: List[RGBColor], fast: bool = False) -> None:
+        if len(colors) != len(self.leds):
+            raise IndexError("Number of colors doesn't match number of LEDs")
+        self._queue((OP_FRAME, self._pos, [_rgb(c) for c in colors]))
+        if not fast:
+            self.update()
+
+    def set_mode(self, mode: Any) -> None:
+        if not isinstance(mode, (str, int)):
+            mode = int(getattr(mode, "id"))
+        self._queue((OP_MODE, self._pos, mode))
+        self.update()
+
+
+class _Link:
+    """Stands in for the client's `comms` so rgb_controller's readiness probe works."""
+
+    def __init__(self, session: "_Session") -> None:
+        self._session = session
+
+    @property
+    def connected(self) -> bool:
+        return not self._session.closed
+
+
+class _Session:
+    def __init__(self, address: Any, authkey: bytes) -> None:
+        self.conn = Client(address, authkey=authkey)
+        self.lock = threading.RLock()
+        self.closed = False
+
+    def send(self, msg: tuple) -> None:
+        try:
+            self.conn.send(msg)
+        except (OSError, EOFError) as ex:
+            self.closed = True
+            raise ConnectionError(f"LED I/O process unreachable: {ex}")
+
+    def call(self, msg: tuple) -> tuple:
+        with self.lock:
+            self.send(msg)
+            try:
+                reply = self.conn.recv()
+            except (OSError, EOFError) as ex:
+                self.closed = True
+                raise ConnectionError(f"LED I/O process unreachable: {ex}")
+        if reply[0] != "ok":
+            raise ConnectionError(reply[1])
+        return reply
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.conn.send(("close",))
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ProcClient:
+    """Client facade for one session in the I/O process."""
+
+    def __init__(self, session: _Session) -> None:
+        self._session = session
+        self.comms = _Link(session)
+        self._devices: List[ProcKeyboard] = []
+
+    @property
+    def devices(self) -> List[ProcKeyboard]:
+        # Re-enumerate until the server side reports devices
+        if not self._devices:
+            descs = self._session.call(("hello",))[1]
+            self._devices = [ProcKeyboard(self._session, i, d) for i, d in enumerate(descs)]
+        return self._devices
+
+    def get_devices(self) -> List[ProcKeyboard]:
+        return self.devices
+
+    def disconnect(self) -> None:
+        self._session.close()
+
+
+class ProcessBackend(KeyboardBackend):
+    """Runs another backend in a separate process and talks to it over a local pipe/socket."""
+
+    name = "proc"
+    startup_grace_s = 0.0
+
+    def __init__(self, inner: str = "openrgb", transport: Optional[str] = None,
+                 start_timeout_s: float = 10.0) -> None:
+        self.inner = str(inner or "openrgb")
+        self.transport = transport
+        self.start_timeout_s = float(start_timeout_s)
+        self._proc = None
+        self._address: Any = None
+        self._authkey = os.urandom(16)
+        self._lock = threading.Lock()
+
+    def _ensure_server(self) -> None:
+        with self._lock:
+            if self._proc is not None and self._proc.is_alive():
+                return
+            # spawn: no inherited threads/sockets from this process (and the same on Windows)
+            ctx = get_context("spawn")
+            parent, child = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_server_main, args=(self.inner, self.transport, self._authkey, child),
+                               name="led-io-server", daemon=True)
+            proc.start()
+            child.close()
+            if not parent.poll(self.start_timeout_s):
+                proc.terminate()
+                raise RuntimeError("LED I/O process did not start")
+            self._address = parent.recv()
+            parent.close()
+            self._proc = proc
+
+    def connect(self) -> ProcClient:
+        self._ensure_server()
+        return ProcClient(_Session(self._address, self._authkey))
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None:
+            try:
+                proc.terminate()
+                proc.join(timeout=2.0)
+            except Exception:
+                pass
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+"""OpenRGB SDK 서버 백엔드 (blocking openrgb-python 또는 asyncio 파이프라인 전송)."""
+
+import os
+from typing import Any, Optional
+
+from backends.base import KeyboardBackend
+
+
+class OpenRGBBackend(KeyboardBackend):
+    """Real keyboards through an OpenRGB SDK server."""
+
+    name = "openrgb"
+    # Readiness is probed (handshake, enumeration, direct-mode readback)
+    startup_grace_s = 0.0
+
+    def __init__(self, address: str = "127.0.0.1", port: int = 6742, client_name: str = "K70Demo",
+                 transport: str = "sync", io_timeout_s: Optional[float] = None) -> None:
+        self.address = address
+        self.port = int(port)
+        self.client_name = client_name
+        self.transport = str(transport or "sync").strip().lower()
+        if io_timeout_s is None:
+            try:
+                io_timeout_s = float(os.environ.get("RGB_IO_TIMEOUT_MS", "2000") or 2000) / 1000.0
+            except Exception:
+                io_timeout_s = 2.0
+        # Per-request socket deadline (openrgb-python's own default is 10 s)
+        self.io_timeout_s = float(io_timeout_s)
+
+    def connect(self) -> Any:
+        if self.transport == "async":
+            from utils.openrgb_async import AsyncOpenRGBClient
+            client = AsyncOpenRGBClient(address=self.address, port=self.port, name=self.client_name)
+            client.comms.timeout = self.io_timeout_s
+            return client
+        from openrgb import OpenRGBClient
+        client = OpenRGBClient(address=self.address, port=self.port, name=self.client_name)
+        try:
+            # A stalled server now fails the call (-> retry budget / breaker) instead of hanging
+            client.comms.sock.settimeout(self.io_timeout_s)
+        except Exception:
+            pass
+        return client
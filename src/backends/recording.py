@@ -0,0 +1,520 @@
+from __future__ import annotations
+
+"""
+LED I/O 녹화/재생 백엔드
+
+RecordingBackend: 다른 백엔드를 감싸 모든 refresh(update)와 쓰기를 바이너리 파일에 남긴다.
+ReplayBackend:    녹화 파일의 리드백을 같은 순서로 되돌려 주는 장치를 제공한다.
+                  → DataMemoryRGBVisual / read_ir / control_plane.poll 이 녹화 당시와 같은 값을 본다.
+                  speed=0 이면 최대 속도, 1.0 이면 녹화된 I/O 소요 시간만큼 지연(느린 실행 재현).
+
+파일 형식 (리틀 엔디언):
+  b"RGBREC1\\0" + u32 헤더 길이 + 헤더 JSON(장치 이름, LED 이름, 모드, 존)
+  레코드: u8 종류, f64 t(녹화 시작 기준 초), f32 소요 ms, 이어서 종류별 본문
+    LED(1)     u16 idx, 3B rgb
+    FRAME(2)   u16 n, 3n B rgb
+    ZONE(3)    u16 start, u16 n, 3n B rgb
+    REFRESH(4) u16 n, 3n B rgb   (update 직후 읽힌 색)
+    MODE(5)    i16 mode id
+    LABEL(6)   u16 idx, u8 len, utf-8 라벨   (라벨→인덱스 표, 연결 직후 한 번)
+    CLOCK(7)   본문 없음, t = 폴링 루프가 읽은 시각 (utils.poll_clock.now)
+
+읽기 전용 채널(read pool)도 같은 파일에 기록되며, 재생은 전역 순서 하나를 따른다.
+녹화 중에는 클라이언트의 comms를 숨겨 비동기 리드백 경로가 녹화를 우회하지 않게 한다.
+
+settle/ACK/리드백 재시도 루프는 데드라인까지 다시 읽으므로, 녹화 중 그 루프들이 본 시각(CLOCK)도
+남기고 재생 때 같은 순서로 돌려준다 → 잡음 때문에 데드라인까지 간 루프도 같은 횟수만큼 돈다.
+CLOCK이 없는(옛) 녹화나 다 쓴 뒤에는 루프의 sleep만큼만 흐르는 가상 시계로 바뀐다.
+"""
+
+import json
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from openrgb.utils import DeviceType, RGBColor
+
+from backends.base import KeyboardBackend, KeyboardDevice
+from backends.sim_keyboard import SimLED, SimZone, _SimMode
+from utils import poll_clock
+
+MAGIC = b"RGBREC1\0"
+REC_LED, REC_FRAME, REC_ZONE, REC_REFRESH, REC_MODE, REC_LABEL, REC_CLOCK = 1, 2, 3, 4, 5, 6, 7
+_PREFIX = struct.Struct("<Bdf")
+
+
+def _rgb_bytes(colors) -> bytes:
+    out = bytearray()
+    for c in colors:
+        out += bytes((int(c.red) & 0xFF, int(c.green) & 0xFF, int(c.blue) & 0xFF))
+    return bytes(out)
+
+
+def _rgb_list(raw: bytes) -> List[Tuple[int, int, int]]:
+    return [(raw[i], raw[i + 1], raw[i + 2]) for i in range(0, len(raw), 3)]
+
+
+class Recorder:
+    """Thread-safe append-only writer of the binary LED I/O log."""
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        self._f = None
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self.records = 0
+
+    def open(self, device: Any) -> None:
+        with self._lock:
+            if self._f is not None:
+                return
+            header = {
+                "name": str(getattr(device, "name", "")),
+                "leds": [str(getattr(led, "name", "")) for led in device.leds],
+                "modes": [str(getattr(m, "name", "")) for m in getattr(device, "modes", []) or []],
+                "active_mode": int(getattr(device, "active_mode", 0) or 0),
+                "zones": [],
+            }
+            start = 0
+            for z in getattr(device, "zones", []) or []:
+                n = len(getattr(z, "leds", []) or [])
+                header["zones"].append([str(getattr(z, "name", "")), start, n])
+                start += n
+            blob = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            self._f = open(self.path, "wb")
+            self._f.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+            self._t0 = time.perf_counter()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                try:
+                    self._f.close()
+                finally:
+                    self._f = None
+
+    def _emit(self, kind: int, t_start: float, dur_s: float, body: bytes) -> None:
+        with self._lock:
+            if self._f is None:
+                return
+            self._f.write(_PREFIX.pack(kind, t_start - self._t0, dur_s * 1000.0) + body)
+            self.records += 1
+
+    def led(self, t: float, dur: float, idx: int, color: Any) -> None:
+        self._emit(REC_LED, t, dur, struct.pack("<H", idx) + _rgb_bytes([color]))
+
+    def frame(self, t: float, dur: float, colors: List[Any]) -> None:
+        self._emit(REC_FRAME, t, dur, struct.pack("<H", len(colors)) + _rgb_bytes(colors))
+
+    def zone(self, t: float, dur: float, start: int, colors: List[Any]) -> None:
+        self._emit(REC_ZONE, t, dur, struct.pack("<HH", start, len(colors)) + _rgb_bytes(colors))
+
+    def refresh(self, t: float, dur: float, colors: List[Any]) -> None:
+        self._emit(REC_REFRESH, t, dur, struct.pack("<H", len(colors)) + _rgb_bytes(colors))
+
+    def mode(self, t: float, dur: float, mode_id: int) -> None:
+        self._emit(REC_MODE, t, dur, struct.pack("<h", int(mode_id)))
+
+    def clock(self, t: float) -> None:
+        self._emit(REC_CLOCK, t, 0.0, b"")
+
+    def labels(self, label_to_index: Dict[str, int]) -> None:
+        now = time.perf_counter()
+        for lab, idx in sorted(label_to_index.items(), key=lambda kv: kv[1]):
+            raw = str(lab).encode("utf-8")[:255]
+            self._emit(REC_LABEL, now, 0.0, struct.pack("<HB", int(idx), len(raw)) + raw)
+
+
+def read_recording(path: str) -> Tuple[Dict[str, Any], Iterator[Tuple[int, float, float, Any]]]:
+    """Parse a recording: (header, iterator of (kind, t_s, dur_ms, payload))."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"not an LED recording: {path}")
+    hlen = struct.unpack_from("<I", data, len(MAGIC))[0]
+    pos = len(MAGIC) + 4
+    header = json.loads(data[pos:pos + hlen].decode("utf-8"))
+    pos += hlen
+
+    def _iter(pos: int = pos) -> Iterator[Tuple[int, float, float, Any]]:
+        end = len(data)
+        while pos + _PREFIX.size <= end:
+            kind, t, dur = _PREFIX.unpack_from(data, pos)
+            pos += _PREFIX.size
+            if kind == REC_LED:
+                idx = struct.unpack_from("<H", data, pos)[0]
+                payload: Any = (idx, tuple(data[pos + 2:pos + 5]))
+                pos += 5
+            elif kind in (REC_FRAME, REC_REFRESH):
+                n = struct.unpack_from("<H", data, pos)[0]
+                payload = _rgb_list(data[pos + 2:pos + 2 + 3 * n])
+                pos += 2 + 3 * n
+            elif kind == REC_ZONE:
+                start, n = struct.unpack_from("<HH", data, pos)
+                payload = (start, _rgb_list(data[pos + 4:pos + 4 + 3 * n]))
+                pos += 4 + 3 * n
+            elif kind == REC_MODE:
+                payload = struct.unpack_from("<h", data, pos)[0]
+                pos += 2
+            elif kind == REC_LABEL:
+                idx, ln = struct.unpack_from("<HB", data, pos)
+                payload = (idx, data[pos + 3:pos + 3 + ln].decode("utf-8", "replace"))
+                pos += 3 + ln
+            elif kind == REC_CLOCK:
+                payload = None
+            else:
+                raise ValueError(f"corrupt recording: unknown record kind {kind} at byte {pos}")
+            yield kind, t, dur, payload
+
+    return header, _iter()
+
+
+# --- recording ------------------------------------------------------------------
+
+class _RecordingLED:
+    def __init__(self, inner: Any, rec: Recorder, dev: "_RecordingDevice") -> None:
+        self._inner = inner
+        self._rec = rec
+        self._dev = dev
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def set_color(self, color: Any, fast: bool = False) -> None:
+        t = time.perf_counter()
+        self._inner.set_color(color, fast=True)
+        self._rec.led(t, time.perf_counter() - t, int(self._inner.id), color)
+        if not fast:
+            self._dev.update()
+
+
+class _RecordingZone:
+    def __init__(self, inner: Any, rec: Recorder, dev: "_RecordingDevice", start: int) -> None:
+        self._inner = inner
+        self._rec = rec
+        self._dev = dev
+        self._start = start
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def set_colors(self, colors: List[Any], fast: bool = False) -> None:
+        t = time.perf_counter()
+        self._inner.set_colors(colors, fast=True)
+        self._rec.zone(t, time.perf_counter() - t, self._start, colors)
+        if not fast:
+            self._dev.update()
+
+
+class _RecordingDevice:
+    """Proxy that logs every refresh and write of the wrapped device."""
+
+    def __init__(self, inner: Any, rec: Recorder) -> None:
+        self._inner = inner
+        self._rec = rec
+        rec.open(inner)
+        self._wrap_children()
+
+    def _wrap_children(self) -> None:
+        self.leds = [_RecordingLED(led, self._rec, self) for led in self._inner.leds]
+        zones = []
+        start = 0
+        for z in getattr(self._inner, "zones", []) or []:
+            zones.append(_RecordingZone(z, self._rec, self, start))
+            start += len(getattr(z, "leds", []) or [])
+        self.zones = zones
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def update(self) -> None:
+        t = time.perf_counter()
+        self._inner.update()
+        self._rec.refresh(t, time.perf_counter() - t, self._inner.colors)
+        # openrgb-python rebuilds LED/zone objects on update
+        if len(self.leds) != len(self._inner.leds) or any(
+                a._inner is not b for a, b in zip(self.leds, self._inner.leds)):
+            self._wrap_children()
+
+    def set_colors(self, colors: List[Any], fast: bool = False) -> None:
+        t = time.perf_counter()
+        self._inner.set_colors(colors, fast=True)
+        self._rec.frame(t, time.perf_counter() - t, colors)
+        if not fast:
+            self.update()
+
+    def set_mode(self, mode: Any) -> None:
+        t = time.perf_counter()
+        self._inner.set_mode(mode)
+        self._rec.mode(t, time.perf_counter() - t, int(getattr(self._inner, "active_mode", 0) or 0))
+        # set_mode re-reads the device; log that readback too so replay stays in step
+        self._rec.refresh(time.perf_counter(), 0.0, self._inner.colors)
+
+
+class _RecordingClient:
+    def __init__(self, inner: Any, rec: Recorder) -> None:
+        self._inner = inner
+        self._rec = rec
+        self._wrapped: Dict[int, _RecordingDevice] = {}
+        # Hide the raw transport: reads must go through the recorded devices
+        self.comms = None
+
+    def _wrap(self, devices: List[Any]) -> List[Any]:
+        out = []
+        for d in devices or []:
+            if d is not None and str(getattr(d.type, "name", str(d.type))).lower() == "keyboard":
+                w = self._wrapped.get(id(d))
+                if w is None:
+                    w = self._wrapped[id(d)] = _RecordingDevice(d, self._rec)
+                out.append(w)
+            else:
+                out.append(d)
+        return out
+
+    @property
+    def devices(self) -> List[Any]:
+        return self._wrap(getattr(self._inner, "devices", None) or [])
+
+    def get_devices(self) -> List[Any]:
+        return self._wrap(self._inner.get_devices())
+
+    def disconnect(self) -> None:
+        self._inner.disconnect()
+
+
+class _RecordingClock:
+    """Poll-loop clock whose reads are also logged (CLOCK records).
+
+    Reads the clock that was installed before it (e.g. a replay being
+    re-recorded), else the wall clock.
+    """
+
+    def __init__(self, rec: Recorder) -> None:
+        self._rec = rec
+        self.inner: Optional[Any] = None
+
+    def now(self) -> float:
+        t = self.inner.now() if self.inner is not None else time.perf_counter()
+        self._rec.clock(t)
+        return t
+
+    def sleep(self, seconds: float) -> None:
+        if self.inner is not None:
+            self.inner.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+
+class RecordingBackend(KeyboardBackend):
+    """Wraps another backend and logs all LED I/O to `path`."""
+
+    name = "record"
+
+    def __init__(self, inner: KeyboardBackend, path: str) -> None:
+        self.inner = inner
+        self.recorder = Recorder(path)
+        self.clock = _RecordingClock(self.recorder)
+        self.startup_grace_s = inner.startup_grace_s
+
+    def connect(self) -> Any:
+        client = self.inner.connect()
+        prev = poll_clock.source()
+        if prev is not self.clock:
+            self.clock.inner = prev
+        poll_clock.install(self.clock)
+        return _RecordingClient(client, self.recorder)
+
+    def note_labels(self, label_to_index: Dict[str, int]) -> None:
+        self.recorder.labels(label_to_index)
+
+    def close(self) -> None:
+        poll_clock.uninstall(self.clock)
+        self.recorder.close()
+        close = getattr(self.inner, "close", None)
+        if close is not None:
+            close()
+
+
+# --- replay ---------------------------------------------------------------------
+
+class ReplayKeyboard(KeyboardDevice):
+    """Keyboard whose readbacks come from a recording, in recorded order."""
+
+    type = DeviceType.KEYBOARD
+
+    def __init__(self, path: str, speed: float = 0.0) -> None:
+        header, records = read_recording(path)
+        self.id = 0
+        self.name = str(header.get("name", "Replay Keyboard"))
+        self.speed = max(0.0, float(speed))
+        self._lock = threading.Lock()
+        self.leds = [SimLED(self, i, nm) for i, nm in enumerate(header.get("leds", []))]
+        self.modes = [_SimMode(i, nm) for i, nm in enumerate(header.get("modes", []) or ["Direct"])]
+        self.active_mode = int(header.get("active_mode", 0))
+        self.zones = [SimZone(self, k, zn, st, cnt) for k, (zn, st, cnt) in enumerate(header.get("zones", []))]
+        self.colors: List[RGBColor] = [RGBColor(0, 0, 0) for _ in self.leds]
+
+        self.labels: Dict[int, str] = {}
+        self._reads: List[Tuple[float, List[Tuple[int, int, int]]]] = []
+        self._write_ms: List[float] = []
+        self.clock_times: List[float] = []
+        for kind, t, dur, payload in records:
+            if kind == REC_REFRESH:
+                self._reads.append((dur, payload))
+            elif kind == REC_LABEL:
+                self.labels[payload[0]] = payload[1]
+            elif kind in (REC_LED, REC_FRAME, REC_ZONE, REC_MODE):
+                self._write_ms.append(dur)
+            elif kind == REC_CLOCK:
+                self.clock_times.append(t)
+        self._ri = 0
+        self._wi = 0
+        self.exhausted = 0
+
+    @property
+    def reads_left(self) -> int:
+        return len(self._reads) - self._ri
+
+    def _pace(self, ms: float) -> None:
+        if self.speed > 0 and ms > 0:
+            time.sleep(ms * self.speed / 1000.0)
+
+    def _write(self, idx_to_color) -> None:
+        # Writes do not change what is read back; only their recorded cost is replayed
+        with self._lock:
+            ms = self._write_ms[self._wi] if self._wi < len(self._write_ms) else 0.0
+            self._wi += 1
+        self._pace(ms)
+
+    def update(self) -> None:
+        with self._lock:
+            if self._ri < len(self._reads):
+                ms, cols = self._reads[self._ri]
+                self._ri += 1
+            else:
+                # Past the end: hold the last readback
+                ms, cols = 0.0, [(int(c.red), int(c.green), int(c.blue)) for c in self.colors]
+                self.exhausted += 1
+        self._pace(ms)
+        self.colors = [RGBColor(r, g, b) for (r, g, b) in cols]
+
+    def set_colors(self, colors: List[RGBColor], fast: bool = False) -> None:
+        self._write({i: c for i, c in enumerate(colors)})
+        if not fast:
+            self.update()
+
+    def set_mode(self, mode: Any) -> None:
+        if isinstance(mode, str):
+            ids = [m.id for m in self.modes if m.name.lower() == mode.lower()]
+            target = ids[0] if ids else self.active_mode
+        elif isinstance(mode, int):
+            target = mode
+        else:
+            target = int(getattr(mode, "id", self.active_mode))
+        self._write({})
+        self.active_mode = target
+        self.update()
+
+
+class _ReplayClock:
+    """Hands the recorded poll-loop clock reads back in order.
+
+    Past the last CLOCK record time only moves by what the loops sleep,
+    so every deadline loop still ends after a fixed number of reads.
+    """
+
+    def __init__(self, times: List[float], speed: float = 0.0) -> None:
+        self._times = times
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._i = 0
+        self._last = times[0] if times else 0.0
+        self._extra = 0.0
+        self.exhausted = 0
+
+    @property
+    def left(self) -> int:
+        return len(self._times) - self._i
+
+    def now(self) -> float:
+        with self._lock:
+            if self._i < len(self._times):
+                self._last = self._times[self._i]
+                self._i += 1
+                self._extra = 0.0
+                return self._last
+            self.exhausted += 1
+            return self._last + self._extra
+
+    def sleep(self, seconds: float) -> None:
+        if self.speed > 0 and seconds > 0:
+            time.sleep(seconds * self.speed)
+        with self._lock:
+            self._extra += max(0.0, float(seconds))
+
+
+class _ReplayClient:
+    def __init__(self, keyboard: ReplayKeyboard) -> None:
+        self.devices = [keyboard]
+
+    def get_devices(self) -> List[ReplayKeyboard]:
+        return self.devices
+
+    def disconnect(self) -> None:
+        pass
+
+
+class ReplayBackend(KeyboardBackend):
+    """Serves a recording back; every client shares one read cursor."""
+
+    name = "replay"
+    startup_grace_s = 0.0
+
+    def __init__(self, path: str, speed: float = 0.0) -> None:
+        self.keyboard = ReplayKeyboard(path, speed=speed)
+        self.clock = _ReplayClock(self.keyboard.clock_times, speed=self.keyboard.speed)
+
+    def connect(self) -> Any:
+        poll_clock.install(self.clock)
+        return _ReplayClient(self.keyboard)
+
+    def close(self) -> None:
+        poll_clock.uninstall(self.clock)
+
+
+def main() -> None:
+    import sys
+
+    if len(sys.argv) < 2:
+        print("usage: python -m backends.recording <file.rgbrec> [limit]")
+        return
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    header, records = read_recording(sys.argv[1])
+    names = header.get("leds", [])
+    labels: Dict[int, str] = {}
+    kinds = {REC_LED: "LED", REC_FRAME: "FRAME", REC_ZONE: "ZONE", REC_REFRESH: "REFRESH",
+             REC_MODE: "MODE", REC_LABEL: "LABEL", REC_CLOCK: "CLOCK"}
+    print(f"[REC] {header.get('name')} leds={len(names)} modes={header.get('modes')}")
+    for i, (kind, t, dur, payload) in enumerate(records):
+        if limit and i >= limit:
+            break
+        if kind == REC_LABEL:
+            labels[payload[0]] = payload[1]
+            continue
+        if kind == REC_LED:
+            idx, rgb = payload
+            what = f"{labels.get(idx, names[idx] if idx < len(names) else idx)}[{idx}]={rgb}"
+        elif kind == REC_ZONE:
+            what = f"start={payload[0]} n={len(payload[1])}"
+        elif kind == REC_MODE:
+            what = f"mode={payload}"
+        elif kind == REC_CLOCK:
+            what = ""
+        else:
+            what = f"n={len(payload)}"
+        print(f"{t * 1000.0:10.3f}ms {dur:8.3f}ms {kinds.get(kind, kind):>7} {what}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+"""
+OpenRGB SDK 프로토콜 대역(stand-in) TCP 서버
+
+하드웨어 없이 openrgb-python의 실제 소켓 경로를 그대로 돌려 보기 위한 로컬 서버.
+rgb_controller가 쓰는 부분만 구현한다:
+- 프로토콜 버전/클라이언트 이름, 장치 개수/컨트롤러 데이터(리프레시), 프로필 목록(빈 목록)
+- UpdateMode(direct 전환), SetCustomMode, ResizeZone(무시)
+- UpdateLEDs / UpdateZoneLEDs / UpdateSingleLED
+
+조절 값(부하/꼬리 지연 측정용):
+- latency_ms : 패킷 하나 처리 전 고정 지연
+- jitter_ms  : 0..jitter_ms 균등분포 추가 지연
+- drop       : LED 업데이트 패킷을 조용히 버릴 확률 (0..1)
+- quantize   : 채널당 유효 비트 수 (8 = 그대로, 5 = 하위 3비트 버림)
+
+실행:
+  python -m backends.sdk_standin --port 6742 --latency-ms 1 --jitter-ms 2 --drop 0.01 --quantize 6
+(src/ 에서 실행)
+"""
+
+import json
+import random
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from openrgb import utils as orgb
+
+from backends.sim_keyboard import _default_map_path
+
+_HEADER = struct.Struct("ccccIII")
+_MAGIC = (b"O", b"R", b"G", b"B")
+# Highest protocol the stand-in answers with (plugin packets of v4 are not emulated)
+SERVER_PROTOCOL_VERSION = 3
+# LED update packets subject to the `drop` probability
+_LED_UPDATES = (
+    orgb.PacketType.RGBCONTROLLER_UPDATELEDS,
+    orgb.PacketType.RGBCONTROLLER_UPDATEZONELEDS,
+    orgb.PacketType.RGBCONTROLLER_UPDATESINGLELED,
+)
+# Vendor reported in the controller metadata (lets clients tell the stand-in from hardware)
+STANDIN_VENDOR = "Stand-in"
+
+
+def _build_controller(map_path: Optional[str] = None) -> orgb.ControllerData:
+    """Keyboard ControllerData (Direct + Static modes) from a *_leds.json map."""
+    with open(map_path or _default_map_path(), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rows = sorted(data.get("leds", []), key=lambda r: int(r["index"]))
+    names = [str(r.get("name_raw", f"LED {i}")) for i, r in enumerate(rows)]
+    n = len(names)
+    leds = [orgb.LEDData(nm, i) for i, nm in enumerate(names)]
+    colors = [orgb.RGBColor(0, 0, 0) for _ in range(n)]
+    modes = [
+        orgb.ModeData(0, "Direct", 0, orgb.ModeFlags.HAS_PER_LED_COLOR, None, None, None, None,
+                      None, None, None, None, None, orgb.ModeColors.PER_LED, None),
+        orgb.ModeData(1, "Static", 1, orgb.ModeFlags.HAS_MODE_SPECIFIC_COLOR, None, None, None, None,
+                      1, 1, None, None, None, orgb.ModeColors.MODE_SPECIFIC, [orgb.RGBColor(0, 0, 0)]),
+    ]
+    # Zones from the optional "zone" column (contiguous runs), else one LINEAR zone
+    zones = []
+    start = 0
+    for i in range(1, n + 1):
+        if i == n or rows[i].get("zone", "") != rows[start].get("zone", ""):
+            cnt = i - start
+            zname = str(rows[start].get("zone", "") or "Keyboard")
+            zones.append(orgb.ZoneData(zname, orgb.ZoneType.LINEAR, cnt, cnt, cnt, 0, 0, None, None,
+                                       leds[start:i], colors[start:i], start))
+            start = i
+    meta = orgb.MetaData(STANDIN_VENDOR, "SDK stand-in keyboard", "1.0", "STANDIN-0001", "local")
+    name = str(data.get("keyboard", "Stand-in Keyboard"))
+    return orgb.ControllerData(name, meta, orgb.DeviceType.KEYBOARD, leds, zones, modes, colors, 1)
+
+
+class SDKStandInServer:
+    """Threaded TCP server speaking the OpenRGB SDK subset rgb_controller uses."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6742, map_path: Optional[str] = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, drop: float = 0.0,
+                 quantize: int = 8, seed: Optional[int] = None) -> None:
+        self.controller = _build_controller(map_path)
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.drop = float(drop)
+        self.quantize = max(1, min(8, int(quantize)))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._host = host
+        self._port = int(port)
+        self._sock: Optional[socket.socket] = None
+        self._conns: List[socket.socket] = []
+        self._running = False
+        # Counters
+        self.packets: Dict[int, int] = {}
+        self.dropped = 0
+        self.clients = 0
+
+    @property
+    def port(self) -> int:
+        return self._sock.getsockname()[1] if self._sock is not None else self._port
+
+    # --- lifecycle ------------------------------------------------------------
+    def start(self) -> "SDKStandInServer":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self._host, self._port))
+        sock.listen(8)
+        self._sock = sock
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="sdk-standin", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        try:
+            if self._sock is not None:
+                # shutdown() wakes the accept() thread so the port is released
+                try:
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                self._sock.close()
+        except Exception:
+            pass
+        for c in list(self._conns):
+            try:
+                c.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                c.close()
+            except Exception:
+                pass
+        self._conns.clear()
+
+    def __enter__(self) -> "SDKStandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"clients": self.clients, "packets": dict(self.packets), "dropped": self.dropped}
+
+    # --- wire -----------------------------------------------------------------
+    def _accept_loop(self) -> None:
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._conns.append(conn)
+            with self._lock:
+                self.clients += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _recv_exact(conn: socket.socket, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = conn.recv(n - len(buf))
+            if not chunk:
+                raise EOFError
+            buf += chunk
+        return bytes(buf)
+
+    @staticmethod
+    def _reply(conn: socket.socket, dev: int, ptype: int, payload: bytes) -> None:
+        conn.sendall(_HEADER.pack(*_MAGIC, dev, ptype, len(payload)) + payload)
+
+    def _delay(self) -> None:
+        d = self.latency_ms
+        if self.jitter_ms > 0:
+            d += self._rng.uniform(0.0, self.jitter_ms)
+        if d > 0:
+            time.sleep(d / 1000.0)
+
+    def _q(self, v: int) -> int:
+        if self.quantize >= 8:
+            return v
+        mask = (0xFF << (8 - self.quantize)) & 0xFF
+        return v & mask
+
+    def _store(self, idx: int, raw: bytes) -> None:
+        colors = self.controller.colors
+        if 0 <= idx < len(colors):
+            colors[idx] = orgb.RGBColor(self._q(raw[0]), self._q(raw[1]), self._q(raw[2]))
+
+    def _serve(self, conn: socket.socket) -> None:
+        version = 0
+        try:
+            while self._running:
+                head = _HEADER.unpack(self._recv_exact(conn, _HEADER.size))
+                if head[:4] != _MAGIC:
+                    break
+                dev, ptype, size = head[4:]
+                data = self._recv_exact(conn, size) if size else b""
+                self._delay()
+                with self._lock:
+                    self.packets[ptype] = self.packets.get(ptype, 0) + 1
+                    if ptype in _LED_UPDATES and self.drop > 0 and self._rng.random() < self.drop:
+                        self.dropped += 1
+                        continue
+                    reply = self._handle(dev, ptype, data, version)
+                if ptype == orgb.PacketType.REQUEST_PROTOCOL_VERSION:
+                    version = min(struct.unpack_from("I", data)[0] if size >= 4 else 0, SERVER_PROTOCOL_VERSION)
+                if reply is not None:
+                    self._reply(conn, dev, ptype, reply)
+        except (EOFError, OSError, struct.error):
+            pass
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            try:
+                self._conns.remove(conn)
+            except ValueError:
+                pass
+
+    def _handle(self, dev: int, ptype: int, data: bytes, version: int) -> Optional[bytes]:
+        cd = self.controller
+        if ptype == orgb.PacketType.REQUEST_PROTOCOL_VERSION:
+            return struct.pack("I", SERVER_PROTOCOL_VERSION)
+        if ptype == orgb.PacketType.REQUEST_CONTROLLER_COUNT:
+            return struct.pack("I", 1)
+        if ptype == orgb.PacketType.REQUEST_CONTROLLER_DATA:
+            want = struct.unpack_from("I", data)[0] if len(data) >= 4 else version
+            return cd.pack(min(want, SERVER_PROTOCOL_VERSION))
+        if ptype == orgb.PacketType.REQUEST_PROFILE_LIST:
+            return struct.pack("IH", 6, 0)
+        if ptype == orgb.PacketType.RGBCONTROLLER_UPDATELEDS:
+            n = struct.unpack_from("H", data, 4)[0]
+            for i in range(n):
+                self._store(i, data[6 + 4 * i:9 + 4 * i])
+        elif ptype == orgb.PacketType.RGBCONTROLLER_UPDATEZONELEDS:
+            zone_id, n = struct.unpack_from("iH", data, 4)
+            if 0 <= zone_id < len(cd.zones):
+                start = sum(z.num_leds for z in cd.zones[:zone_id])
+                for i in range(min(n, cd.zones[zone_id].num_leds)):
+                    self._store(start + i, data[10 + 4 * i:13 + 4 * i])
+        elif ptype == orgb.PacketType.RGBCONTROLLER_UPDATESINGLELED:
+            idx = struct.unpack_from("i", data, 0)[0]
+            self._store(idx, data[4:7])
+        elif ptype == orgb.PacketType.RGBCONTROLLER_UPDATEMODE:
+            mode_id = struct.unpack_from("i", data, 4)[0]
+            if 0 <= mode_id < len(cd.modes):
+                cd.active_mode = mode_id
+        elif ptype == orgb.PacketType.RGBCONTROLLER_SETCUSTOMMODE:
+            cd.active_mode = 0
+        # SET_CLIENT_NAME, RESIZEZONE and unknown packets have no reply
+        return None
+
+
+def main() -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="OpenRGB SDK stand-in server (no hardware)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=6742)
+    ap.add_argument("--map", default=None, help="*_leds.json layout (default: maps/ folder)")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--drop", type=float, default=0.0, help="probability of dropping an LED update")
+    ap.add_argument("--quantize", type=int, default=8, help="bits per color channel kept")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    srv = SDKStandInServer(args.host, args.port, args.map, args.latency_ms, args.jitter_ms,
+                           args.drop, args.quantize, args.seed).start()
+    print(f"[STANDIN] listening on {args.host}:{srv.port} ({len(srv.controller.leds)} LEDs)")
+    try:
+        while True:
+            time.sleep(5.0)
+            print(f"[STANDIN] {srv.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+"""
+프로세스 내 시뮬레이션 키보드 백엔드
+
+data/maps/*_leds.json 레이아웃(인덱스/이름, 선택적으로 zone 열)을 읽어
+하드웨어/서버 없이 LED 배열을 메모리에 둔다. 헤드리스 실행과 결정적 벤치마크용.
+
+조절 가능한 값:
+- write_latency_ms : 쓰기 호출(set_color/set_colors/존 쓰기/모드 변경)이 막히는 시간
+- read_latency_ms  : refresh(update) 한 번이 막히는 시간
+- apply_lag_ms     : 쓴 색이 리드백에 보이기까지 걸리는 시간 (settle 검증용)
+- noise            : 리드백 색에 더해지는 가우시안 잡음 표준편차 (0 = 없음)
+- seed             : 잡음 난수 시드 (같은 시드 → 같은 실행)
+- count            : 같은 레이아웃 키보드 개수 (장치 샤딩 시험용)
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from openrgb.utils import DeviceType, RGBColor
+
+from backends.base import KeyboardBackend, KeyboardDevice
+from config import MAPS_DIR
+
+
+def _default_map_path() -> str:
+    preferred = os.path.join(MAPS_DIR, "Corsair K70 RGB TKL_leds.json")
+    if os.path.exists(preferred):
+        return preferred
+    for fn in sorted(os.listdir(MAPS_DIR)):
+        if fn.endswith("_leds.json"):
+            return os.path.join(MAPS_DIR, fn)
+    raise FileNotFoundError("maps/ 폴더에 *_leds.json 파일이 없습니다.")
+
+
+class _SimMode:
+    def __init__(self, mode_id: int, name: str) -> None:
+        self.id = mode_id
+        self.name = name
+
+
+class SimLED:
+    def __init__(self, dev: "SimKeyboard", idx: int, name: str) -> None:
+        self._dev = dev
+        self.id = idx
+        self.name = name
+
+    @property
+    def colors(self) -> List[RGBColor]:
+        return [self._dev.colors[self.id]]
+
+    def set_color(self, color: RGBColor, fast: bool = False) -> None:
+        self._dev._write({self.id: color})
+        if not fast:
+            self._dev.update()
+
+
+class SimZone:
+    def __init__(self, dev: "SimKeyboard", zone_id: int, name: str, start: int, count: int) -> None:
+        self._dev = dev
+        self.id = zone_id
+        self.name = name
+        self.leds = dev.leds[start:start + count]
+        self._start = start
+
+    def set_colors(self, colors: List[RGBColor], fast: bool = False) -> None:
+        if len(colors) != len(self.leds):
+            raise IndexError("Number of colors doesn't match number of LEDs in the zone")
+        self._dev._write({self._start + i: c for i, c in enumerate(colors)})
+        if not fast:
+            self._dev.update()
+
+
+class SimKeyboard(KeyboardDevice):
+    """In-memory keyboard with the LED layout of an exported map."""
+
+    type = DeviceType.KEYBOARD
+
+    def __init__(self, map_path: Optional[str] = None, write_latency_ms: float = 0.0,
+                 read_latency_ms: float = 0.0, apply_lag_ms: float = 0.0, noise: float = 0.0,
+                 seed: Optional[int] = 0, device_id: int = 0) -> None:
+        path = map_path or _default_map_path()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows = sorted(data.get("leds", []), key=lambda r: int(r["index"]))
+        self.id = int(device_id)
+        self.name = str(data.get("keyboard", "Simulated Keyboard"))
+        if self.id:
+            self.name = f"{self.name} #{self.id}"
+        self.write_latency_ms = float(write_latency_ms)
+        self.read_latency_ms = float(read_latency_ms)
+        self.apply_lag_ms = float(apply_lag_ms)
+        self.noise = float(noise)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.leds = [SimLED(self, int(r["index"]), str(r.get("name_raw", ""))) for r in rows]
+        n = len(self.leds)
+        # Device truth, pending (not yet visible) writes, and last readback
+        self._state: List[Tuple[int, int, int]] = [(0, 0, 0)] * n
+        self._pending: List[Tuple[float, int, Tuple[int, int, int]]] = []
+        self.colors: List[RGBColor] = [RGBColor(0, 0, 0) for _ in range(n)]
+
+        self.modes = [_SimMode(0, "Direct"), _SimMode(1, "Static")]
+        self.active_mode = 1
+
+        # Zones from the map's optional "zone" column (contiguous runs)
+        self.zones: List[SimZone] = []
+        start = 0
+        for i in range(1, n + 1):
+            if i == n or rows[i].get("zone", "") != rows[start].get("zone", ""):
+                zname = str(rows[start].get("zone", "") or "Keyboard") if n else "Keyboard"
+                self.zones.append(SimZone(self, len(self.zones), zname, start, i - start))
+                start = i
+
+        self.writes = 0
+        self.reads = 0
+
+    # --- internals ----------------------------------------------------------
+    def _write(self, idx_to_color) -> None:
+        if self.write_latency_ms > 0:
+            time.sleep(self.write_latency_ms / 1000.0)
+        now = time.perf_counter()
+        with self._lock:
+            self.writes += 1
+            for idx, c in idx_to_color.items():
+                if not (0 <= idx < len(self._state)):
+                    raise IndexError(idx)
+                rgb = (int(c.red), int(c.green), int(c.blue))
+                if self.apply_lag_ms > 0:
+                    self._pending.append((now + self.apply_lag_ms / 1000.0, idx, rgb))
+                else:
+                    self._state[idx] = rgb
+
+    def _apply_due(self, now: float) -> None:
+        if not self._pending:
+            return
+        keep = []
+        for t, idx, rgb in self._pending:
+            if t <= now:
+                self._state[idx] = rgb
+            else:
+                keep.append((t, idx, rgb))
+        self._pending = keep
+
+    def _noisy(self, v: int) -> int:
+        return max(0, min(255, int(round(v + self._rng.gauss(0.0, self.noise)))))
+
+    # --- KeyboardDevice -------------------------------------------------------
+    def update(self) -> None:
+        if self.read_latency_ms > 0:
+            time.sleep(self.read_latency_ms / 1000.0)
+        with self._lock:
+            self.reads += 1
+            self._apply_due(time.perf_counter())
+            if self.noise > 0:
+                cols = [RGBColor(self._noisy(r), self._noisy(g), self._noisy(b)) for (r, g, b) in self._state]
+            else:
+                cols = [RGBColor(r, g, b) for (r, g, b) in self._state]
+        self.colors = cols
+
+    def set_colors(self, colors: List[RGBColor], fast: bool = False) -> None:
+        if len(colors) != len(self.leds):
+            raise IndexError("Number of colors doesn't match number of LEDs")
+        self._write({i: c for i, c in enumerate(colors)})
+        if not fast:
+            self.update()
+
+    def set_mode(self, mode: Any) -> None:
+        if isinstance(mode, str):
+            matches = [m for m in self.modes if m.name.lower() == mode.lower()]
+            if not matches:
+                raise ValueError(f"Mode `{mode}` not found for device `{self.name}`")
+            target = matches[0].id
+        elif isinstance(mode, int):
+            target = self.modes[mode].id
+        else:
+            target = int(getattr(mode, "id"))
+        if self.write_latency_ms > 0:
+            time.sleep(self.write_latency_ms / 1000.0)
+        self.active_mode = target
+        self.update()
+
+
+class SimClient:
+    """Client facade over shared SimKeyboards (every connect sees the same LEDs)."""
+
+    def __init__(self, keyboards: List[SimKeyboard]) -> None:
+        self.devices = list(keyboards)
+
+    def get_devices(self) -> List[SimKeyboard]:
+        return self.devices
+
+    def disconnect(self) -> None:
+        pass
+
+
+class SimKeyboardBackend(KeyboardBackend):
+    """Pure in-process keyboard; no OpenRGB server or hardware needed."""
+
+    name = "sim"
+    startup_grace_s = 0.0
+
+    def __init__(self, map_path: Optional[str] = None, count: int = 1, **knobs: Any) -> None:
+        seed = knobs.pop("seed", 0)
+        self.keyboards = [
+            SimKeyboard(map_path, seed=(None if seed is None else seed + k), device_id=k, **knobs)
+            for k in range(max(1, int(count)))
+        ]
+        self.keyboard = self.keyboards[0]
+
+    @classmethod
+    def from_env(cls) -> "SimKeyboardBackend":
+        """Knobs from RGB_SIM_WRITE_MS / _READ_MS / _LAG_MS / _NOISE / _SEED / _KEYBOARDS."""
+        def _f(name: str) -> float:
+            try:
+                return float(os.environ.get(name, "0") or 0)
+            except Exception:
+                return 0.0
+        try:
+            seed: Optional[int] = int(os.environ.get("RGB_SIM_SEED", "0"))
+        except Exception:
+            seed = 0
+        return cls(count=int(_f("RGB_SIM_KEYBOARDS") or 1), write_latency_ms=_f("RGB_SIM_WRITE_MS"), read_latency_ms=_f("RGB_SIM_READ_MS"),
+                   apply_lag_ms=_f("RGB_SIM_LAG_MS"), noise=_f("RGB_SIM_NOISE"), seed=seed)
+
+    def connect(self) -> SimClient:
+        return SimClient(self.keyboards)
@@ -60,3 +60,5 @@ def _resolve_data_dir(project_root: Path) -> Path:
 
 DATA_DIR = _resolve_data_dir(PROJECT_ROOT)
 MAPS_DIR = DATA_DIR / "maps"
+# Generated, machine-local files (decode cubes, update cost fits); RGB_CACHE_DIR overrides
+CACHE_DIR = Path(os.environ.get("RGB_CACHE_DIR", "") or (PROJECT_ROOT / ".cache"))
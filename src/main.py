@@ -73,8 +73,11 @@ def main():
             except Exception:
                 pass
             return
-        time.sleep(0.6)
         rc.init_all_keys()
+        try:
+            print("[INFO] startup:", rc.startup_report())
+        except Exception:
+            pass
         # 시작 대기 동안 PAUSE 표시
         try:
             run_off()
@@ -89,7 +92,9 @@ def main():
         # input()
 
         # LED 메모리 I/O 샘플 설정(지연 0~5ms 권장)
-        mem_core = DataMemoryRGBVisual(binary_labels=kp.BINARY_COLORS, samples=3, sample_delay_ms=0, debug=False)
+        # 적응형(SPRT): 판정이 확실한 키는 1회, 애매한 키만 최대 5회까지 다시 읽음
+        mem_core = DataMemoryRGBVisual(binary_labels=kp.BINARY_COLORS, samples=5, sample_delay_ms=0, debug=False,
+                                       adaptive=True)
         bus = BusInterface(ack_mode="internal", ack_pulse_ms=12, settle_ms=8, ack_timeout_ms=200)
         mem = BusMemory(mem_core, bus, only_variable_keys=True)
         # 1) CPU 구성: ISA 모드 + 인터랙티브 실행(콘솔 입력으로 스텝/제어)
@@ -186,7 +191,8 @@ def main():
                     cpu._apply_speed_preset("FAST_SAFE")
                     print("[BENCH] preset=FAST (FAST_SAFE)")
                 else:
-                    # Ensure fast-specific toggles are off
+                    # Ensure fast-specific toggles are off (bit_lut group helpers only;
+                    # CPU group writes always go out as one set_many frame)
                     try:
                         from rgb_controller import set_group_atomic
                         set_group_atomic(False)
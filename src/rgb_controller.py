@@ -5,16 +5,36 @@ Centralizes connection management and low‑flicker LED updates.
 
 from __future__ import annotations
 
+import asyncio
+import os
+import queue
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple, Union
 
+import numpy as np
 from openrgb import OpenRGBClient
 from openrgb.utils import RGBColor
 
-from config import MAPS_DIR
+from backends import KeyboardBackend, RecordingBackend, make_backend
+from config import CACHE_DIR, MAPS_DIR
+from utils.channel_pool import ReadChannelPool
 from utils.keyboard_map import RGBLabelController
+from utils.keyboard_presets import SHARD_GROUPS
+from utils.frame_pacer import FramePacer
+from utils.frame_shm import SharedFrameWriter, pack_flags
+from utils.circuit_breaker import CircuitBreaker, LinkDown, RetryPolicy
+from utils import poll_clock
+from utils.phase_timer import PhaseTimer
+from utils.update_cost import UpdateCostModel
+from utils.settle import get_settle_mode, get_settle_tolerance, set_settle_mode, settle, settle_mode_switch, settle_stats
 
 client: Optional[OpenRGBClient] = None
+_BACKEND: Optional[KeyboardBackend] = None
 kb = None
 km: Optional[RGBLabelController] = None
 
@@ -23,14 +43,343 @@ _ATOMIC_DEBUG: bool = False
 _APPLY_DELAY_MS: int = 20  # settle after updates (ms)
 _GROUP_ATOMIC: bool = False
 
-# Cache to skip no‑op writes (label -> (r,g,b))
-_LAST_LABEL_COLOR: Dict[str, Tuple[int, int, int]] = {}
+
+class FrameBuffer:
+    """In-process shadow of the device color array (write-behind).
+
+    Writes only touch the shadow and mark the LED index dirty; `flush()`
+    pushes all dirty entries to the device in one update. The shadow also
+    acts as the no-op cache: writing the color already held is skipped.
+    Every method is guarded by the buffer's own lock, so staging threads,
+    the writer thread and readers never see a half-updated frame.
+
+    Storage is a contiguous uint8 N x 3 array plus a dirty mask, so batch
+    diffing and dedup against the shadow run as array operations.
+    """
+
+    def __init__(self, size: int = 0) -> None:
+        self._lock = threading.Lock()
+        self.colors = np.zeros((int(size), 3), dtype=np.uint8)
+        self.dirty = np.zeros(int(size), dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.colors)
+
+    def reset(self, colors) -> None:
+        """Adopt `colors` as the known device state (nothing dirty)."""
+        new = as_color_array(colors)
+        with self._lock:
+            self.colors = new
+            self.dirty = np.zeros(len(new), dtype=bool)
+
+    def write(self, idx: int, rgb: Tuple[int, int, int]) -> bool:
+        """Stage one LED color. Returns False when it is already the shadow value."""
+        with self._lock:
+            if not (0 <= idx < len(self.colors)):
+                return False
+            row = self.colors[idx]
+            if row[0] == rgb[0] and row[1] == rgb[1] and row[2] == rgb[2]:
+                return False
+            row[:] = rgb
+            self.dirty[idx] = True
+            return True
+
+    def write_many(self, items: Mapping[int, Tuple[int, int, int]]) -> int:
+        """Stage several LEDs under one lock hold; returns how many changed."""
+        if not items:
+            return 0
+        idxs = np.fromiter(items.keys(), dtype=np.intp, count=len(items))
+        return self.write_arrays(idxs, as_color_array(list(items.values())))
+
+    def write_arrays(self, idxs: np.ndarray, rgbs: np.ndarray) -> int:
+        """Vectorized staging: diff `rgbs` against the shadow at `idxs`, keep changes."""
+        with self._lock:
+            ok = (idxs >= 0) & (idxs < len(self.colors))
+            if not ok.all():
+                idxs, rgbs = idxs[ok], rgbs[ok]
+            if len(idxs) == 0:
+                return 0
+            changed = (self.colors[idxs] != rgbs).any(axis=1)
+            if not changed.any():
+                return 0
+            idxs, rgbs = idxs[changed], rgbs[changed]
+            # Duplicate indices: fancy assignment keeps the last one, like dict order
+            self.colors[idxs] = rgbs
+            self.dirty[idxs] = True
+            return int(np.unique(idxs).size)
+
+    def take_dirty(self) -> List[int]:
+        """Return dirty indices (ascending) and clear the dirty set."""
+        with self._lock:
+            out = np.flatnonzero(self.dirty)
+            self.dirty[out] = False
+            return out.tolist()
+
+    def take_changes(self) -> Dict[int, Tuple[int, int, int]]:
+        """Atomically take the dirty entries with their colors."""
+        with self._lock:
+            idxs = np.flatnonzero(self.dirty)
+            self.dirty[idxs] = False
+            return _items(idxs, self.colors[idxs])
+
+    def mark_dirty(self, idxs) -> None:
+        """Re-mark entries whose push failed so a later flush retries them."""
+        arr = np.fromiter(idxs, dtype=np.intp)
+        with self._lock:
+            self.dirty[arr[(arr >= 0) & (arr < len(self.dirty))]] = True
+
+    def has_dirty(self) -> bool:
+        return bool(self.dirty.any())
+
+    def dirty_count(self) -> int:
+        return int(np.count_nonzero(self.dirty))
+
+    def dirty_items(self) -> Dict[int, Tuple[int, int, int]]:
+        """Staged-but-unsent entries (for read-your-writes overlays)."""
+        with self._lock:
+            idxs = np.flatnonzero(self.dirty)
+            return _items(idxs, self.colors[idxs])
+
+    def array(self) -> np.ndarray:
+        """Consistent copy of the whole shadow (N x 3 uint8)."""
+        with self._lock:
+            return self.colors.copy()
+
+    def view(self) -> Tuple[Tuple[int, int, int], ...]:
+        """Consistent copy of the whole shadow as (r, g, b) tuples."""
+        return tuple(map(tuple, self.array().tolist()))
+
+
+def as_color_array(colors) -> np.ndarray:
+    """N x 3 uint8 array from (r, g, b) rows, RGBColor objects or an array."""
+    if isinstance(colors, np.ndarray):
+        return colors.astype(np.uint8, copy=True).reshape(-1, 3)
+    rows = list(colors)
+    if rows and not isinstance(rows[0], (tuple, list)):
+        rows = [(c.red, c.green, c.blue) for c in rows]
+    return np.array(rows, dtype=np.uint8).reshape(-1, 3)
+
+
+def _items(idxs: np.ndarray, rgbs: np.ndarray) -> Dict[int, Tuple[int, int, int]]:
+    return dict(zip(idxs.tolist(), map(tuple, rgbs.tolist())))
+
+
+# Shadow frame for the active device
+_FRAME = FrameBuffer()
+# Per-thread frame() nesting depth and writes held back until the frame ends
+_TLS = threading.local()
+# Serializes connect/disconnect/reconnect against each other
+_STATE_LOCK = threading.RLock()
+# Last snapshot taken; readable without locks or I/O via last_snapshot()
+_PUBLISHED: Optional["Snapshot"] = None
+# Background writer (None = synchronous pushes); serializes device I/O with reads
+_WRITER: Optional["LedWriter"] = None
+# Device lock of the primary keyboard; each shard keyboard has its own (_Shard.lock)
+_IO_LOCK = threading.RLock()
+# Optional dedicated readback connections (None = reads share the write socket)
+_READ_POOL: Optional[ReadChannelPool] = None
+# Writes sent but not yet completed, and writes not yet seen on a read channel
+_INFLIGHT: Dict[int, Tuple[int, int, int]] = {}
+_UNCONFIRMED: Dict[int, Tuple[int, int, int]] = {}
+_TRACK_LOCK = threading.Lock()
+# Chooses single-LED / zone / full-device packets; calibrated in connect()
+_COST = UpdateCostModel()
+# Frame pacing (target period from RGB_FRAME_HZ; 0 = unpaced)
+try:
+    _FRAME_HZ_ENV = float(os.environ.get("RGB_FRAME_HZ", "0") or 0)
+except Exception:
+    _FRAME_HZ_ENV = 0.0
+_PACER = FramePacer(period_ms=(1000.0 / _FRAME_HZ_ENV) if _FRAME_HZ_ENV > 0 else 0.0)
+# Per-phase timings of the last connect() / init_all_keys()
+_STARTUP = PhaseTimer()
+# Options of the last connect() (reused by reconnect()) and link health
+_CONNECT_OPTS: Dict[str, object] = {}
+_LINK_FAILS: int = 0
+_RECONNECTS: int = 0
+# Transport guard: breaker over consecutive failed pushes/reads, bounded retries
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "") or default)
+    except Exception:
+        return default
+
+
+_BREAKER = CircuitBreaker(fail_threshold=int(_env_num("RGB_BREAKER_FAILS", 5)),
+                          cooldown_s=_env_num("RGB_BREAKER_COOLDOWN_MS", 1000) / 1000.0)
+_RETRY = RetryPolicy(attempts=int(_env_num("RGB_RETRIES", 2)) + 1,
+                     budget_per_s=_env_num("RGB_RETRY_BUDGET", 5))
+_LINK_WAIT_S = _env_num("RGB_LINK_WAIT_S", 30.0)
+# Shared-memory copy of the current frame + CPU state for external viewers
+_SHM: Optional[SharedFrameWriter] = None
+
+
+@dataclass(frozen=True)
+class ZoneSpan:
+    """Contiguous LED range of one OpenRGB zone (device-wide indices)."""
+    id: int
+    name: str
+    start: int
+    count: int
+
+    def covers(self, lo: int, hi: int) -> bool:
+        return self.start <= lo and hi < self.start + self.count
+
+
+# Zone table of the bound device, learned in connect()
+_ZONES: List[ZoneSpan] = []
+
+
+class _Shard:
+    """A secondary keyboard that holds some label groups.
+
+    Each shard has its own connection, shadow frame and single-thread
+    executor: its pushes stay in order, while different keyboards are
+    written in parallel with each other and with the primary device.
+    Each also has its own frame pacer (same period as the primary's);
+    submissions that arrive while a push waits for a token are folded
+    into it, like the background writer does.
+    """
+
+    def __init__(self, position: int, client, device, label_to_index: Dict[str, int],
+                 groups: List[str]) -> None:
+        self.position = position
+        self.client = client
+        self.device = device
+        self.label_to_index = label_to_index
+        self.groups = list(groups)
+        self.labels: Set[str] = set()
+        for g in self.groups:
+            self.labels.update(str(lab).lower() for lab in SHARD_GROUPS[g])
+        self.frame = FrameBuffer(len(device.leds))
+        self.lock = threading.RLock()
+        self.inflight: Dict[int, Tuple[int, int, int]] = {}
+        # What this device was last sent (only touched on the executor thread)
+        self._sent: List[Tuple[int, int, int]] = list(self.frame.view())
+        self._exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"led-shard{position}")
+        self.last: Optional[Future] = None
+        self.frames: int = 0
+        self.pacer = FramePacer(period_ms=_PACER.period_s * 1000.0, burst=_PACER.burst)
+        # Submissions not yet taken by a push, and the queued push that will take them
+        self._pending: List[Dict[int, Tuple[int, int, int]]] = []
+        self._queued: Optional[Future] = None
+        self._plock = threading.Lock()
+
+    def reset(self, colors: List[Tuple[int, int, int]]) -> None:
+        self.wait_idle()
+        self.frame.reset(colors)
+        self._sent = list(self.frame.view())
+
+    def submit_dirty(self) -> Optional[Future]:
+        changes = self.frame.take_changes()
+        if not changes:
+            return None
+        with _TRACK_LOCK:
+            self.inflight.update(changes)
+        with self._plock:
+            self._pending.append(changes)
+            if self._queued is None:
+                self._queued = self._exec.submit(self._drain)
+            self.last = self._queued
+            return self.last
+
+    def _drain(self) -> bool:
+        # Wait for frame budget first; submissions arriving meanwhile join this push
+        self.pacer.acquire()
+        with self._plock:
+            batch = self._pending
+            self._pending = []
+            self._queued = None
+        merged: Dict[int, Tuple[int, int, int]] = {}
+        for changes in batch:
+            merged.update(changes)
+        if len(batch) > 1:
+            # Dropped: every LED of that submission is overwritten later
+            later: Set[int] = set()
+            n_drop = 0
+            for changes in reversed(batch):
+                if later and set(changes) <= later:
+                    n_drop += 1
+                later.update(changes)
+            self.pacer.note_coalesced(len(batch) - 1 - n_drop, n_drop)
+        return self._apply(merged)
+
+    def _apply(self, changes: Dict[int, Tuple[int, int, int]]) -> bool:
+        dbg = _atomic_debug_enabled()
+        for idx, rgb in changes.items():
+            if 0 <= idx < len(self._sent):
+                self._sent[idx] = rgb
+        try:
+            with self.lock:
+                ok = _push(self.device, changes, self._sent, dbg, zoned=False)
+            _note_link(ok)
+            if ok:
+                _shm_publish()
+                settle(self.device, changes, float(_APPLY_DELAY_MS) / 1000.0, lock=self.lock)
+            else:
+                self.frame.mark_dirty(changes)
+        except Exception as ex:
+            ok = False
+            self.frame.mark_dirty(changes)
+            if dbg:
+                try:
+                    print(f"[RGB-SHARD] #{self.position} exception: {ex}")
+                except Exception:
+                    pass
+        with _TRACK_LOCK:
+            for idx, rgb in changes.items():
+                if self.inflight.get(idx) == rgb:
+                    del self.inflight[idx]
+        self.frames += 1
+        return ok
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        fut = self.last
+        if fut is None:
+            return True
+        try:
+            return bool(fut.result(timeout=timeout))
+        except Exception:
+            return False
+
+    def read(self, fresh: bool) -> np.ndarray:
+        with self.lock:
+            if fresh:
+                _refresh_device_leds(self.device)
+            return _read_device_colors(self.device)
+
+    def close(self) -> None:
+        self.wait_idle(2.0)
+        self._exec.shutdown(wait=False)
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+# Secondary keyboards and the label -> shard routing table (empty = single device)
+_SHARDS: List[_Shard] = []
+_ROUTE: Dict[str, _Shard] = {}
+_SHARD_READS: Optional[ThreadPoolExecutor] = None
 
 __all__ = [
     'connect', 'disconnect', 'is_connected',
     'get_key_color', 'set_key_color', 'set_labels_atomic',
     'init_all_keys', 'set_apply_delay_ms', 'set_atomic_debug',
-    'set_group_atomic', 'is_group_atomic'
+    'set_group_atomic', 'is_group_atomic',
+    'frame', 'flush', 'pending_writes',
+    'start_led_writer', 'stop_led_writer', 'is_led_writer_running',
+    'wait_writes', 'set_labels_async',
+    'set_settle_mode', 'get_settle_mode', 'get_settle_tolerance', 'settle_stats',
+    'snapshot_future', 'asnapshot', 'aflush', 'aset_labels',
+    'calibrate_update_cost', 'update_cost_report',
+    'ZoneSpan', 'zones',
+    'set_frame_period_ms', 'set_frame_rate_hz', 'frame_budget', 'frame_stats',
+    'Snapshot', 'snapshot', 'last_snapshot',
+    'set_device_shards', 'device_shards',
+    'startup_timing', 'startup_report',
+    'reconnect', 'link_lost',
+    'publish_frame', 'stop_publishing', 'set_machine_state',
+    'LinkDown', 'link_open', 'link_stats',
 ]
 
 
@@ -48,6 +397,42 @@ def is_group_atomic() -> bool:
     return bool(_GROUP_ATOMIC)
 
 
+def set_frame_period_ms(ms: float, burst: int = 1) -> None:
+    """Pace flushes to at most one frame per `ms` (bursts up to `burst`); 0 disables.
+
+    Applies to every keyboard; each shard keyboard has its own budget.
+    """
+    _PACER.configure(ms, burst)
+    for sh in list(_SHARDS):
+        sh.pacer.configure(ms, burst)
+
+
+def set_frame_rate_hz(hz: float, burst: int = 1) -> None:
+    """Pace flushes to the device refresh rate, e.g. the keyboard's USB polling rate."""
+    try:
+        h = float(hz)
+    except Exception:
+        return
+    set_frame_period_ms(1000.0 / h if h > 0 else 0.0, burst)
+
+
+def frame_budget() -> float:
+    """Frames that can be flushed right now without waiting (inf when unpaced)."""
+    return _PACER.budget()
+
+
+def frame_stats() -> Dict[str, object]:
+    """Pacing counters: frames sent, waits, and merged / dropped frames.
+
+    With shard keyboards, "shards" maps each one's position to its own counters.
+    """
+    out: Dict[str, object] = dict(_PACER.stats())
+    shards = list(_SHARDS)
+    if shards:
+        out["shards"] = {sh.position: sh.pacer.stats() for sh in shards}
+    return out
+
+
 def set_apply_delay_ms(ms: int) -> None:
     global _APPLY_DELAY_MS
     try:
@@ -64,308 +449,1519 @@ def set_apply_delay_ms(ms: int) -> None:
 def _refresh_device_leds(dev=None) -> None:
     target = dev or kb
     try:
-        if target is not None:
-            target.refresh()
+        if target is None:
+            return
+        # openrgb-python devices re-read their state via update()
+        refresh = getattr(target, "refresh", None) or getattr(target, "update", None)
+        if refresh is not None:
+            refresh()
+            _note_link(True)
     except Exception:
-        pass
+        _note_link(False)
 
 
-def safe_set_direct_and_sync(dev) -> None:
-    try:
-        dev.set_mode("direct")
-    except Exception:
-        pass
-    time.sleep(0.15)
-    _refresh_device_leds(dev)
-    try:
-        dev.set_colors([RGBColor(0, 0, 0)] * len(dev.leds))
-    except Exception:
-        pass
-    time.sleep(0.05)
+def _note_link(ok: bool) -> None:
+    """Count consecutive device I/O failures (reset by any success); feeds the breaker."""
+    global _LINK_FAILS
+    with _TRACK_LOCK:
+        _LINK_FAILS = 0 if ok else _LINK_FAILS + 1
+    _BREAKER.record(ok)
 
 
-def connect(wait_s: float = 10.0) -> bool:
-    """Connect to OpenRGB SDK server and prepare label mapping.
+def link_lost(threshold: int = 3) -> bool:
+    """True once the server connection dropped or I/O keeps failing."""
+    if client is None:
+        return bool(_CONNECT_OPTS)
+    return (not _server_ready(client)) or _LINK_FAILS >= max(1, int(threshold))
 
-    Polls up to `wait_s` seconds for a keyboard device to appear.
+
+def link_open() -> bool:
+    """True while the circuit breaker refuses device I/O (callers should pause)."""
+    return _BREAKER.state == "open"
+
+
+def link_stats() -> Dict[str, object]:
+    """Failure counters of the LED transport, for monitoring."""
+    out: Dict[str, object] = dict(_BREAKER.stats())
+    out.update(_RETRY.stats())
+    out["retry_in_s"] = round(_BREAKER.retry_in(), 3)
+    out["link_fails"] = _LINK_FAILS
+    out["reconnects"] = _RECONNECTS
+    return out
+
+
+def _await_link(deadline: Optional[float] = None) -> float:
+    """Block while the breaker is open (no I/O meanwhile); returns the deadline.
+
+    Gives up with LinkDown after RGB_LINK_WAIT_S seconds (default 30).
     """
-    global client, kb, km
-    client = OpenRGBClient(address="127.0.0.1", port=6742, name="K70Demo")
+    if deadline is None:
+        deadline = time.perf_counter() + _LINK_WAIT_S
+    while True:
+        wait = _BREAKER.retry_in()
+        if wait <= 0:
+            return deadline
+        if time.perf_counter() + wait > deadline:
+            raise LinkDown(f"LED link down for {_LINK_WAIT_S:.0f}s ({_BREAKER.stats()})")
+        time.sleep(wait)
+
+
+def _guard_read() -> None:
+    """Let a read through only when the breaker allows it (one probe per cooldown)."""
+    deadline = _await_link()
+    while not _BREAKER.allow():
+        # Another thread holds the half-open probe, or the breaker re-opened
+        deadline = _await_link(deadline)
+        time.sleep(0.01)
 
-    # Small grace period after server start
-    try:
-        time.sleep(0.6)
-    except Exception:
-        pass
 
-    # Poll for keyboard device enumeration
-    keyboards = []
-    deadline = time.perf_counter() + max(0.0, float(wait_s))
-    while time.perf_counter() < deadline:
+def safe_set_direct_and_sync(dev, timer: Optional[PhaseTimer] = None, clear: bool = True) -> None:
+    """Switch to direct mode and blank the device, confirming both by readback.
+
+    The old fixed waits (150 ms / 50 ms) are now only the probe deadlines.
+    With `clear=False` the LEDs are left as they are (warm reconnect).
+    """
+    timer = timer or PhaseTimer()
+    with timer.phase("direct_mode"):
+        try:
+            dev.set_mode("direct")
+        except Exception:
+            pass
+        if not settle_mode_switch(dev, "direct", 0.15, probe=True):
+            _refresh_device_leds(dev)
+    if not clear:
+        return
+    with timer.phase("clear"):
         try:
-            devices = getattr(client, "devices", None) or client.get_devices()
-            keyboards = [
-                d for d in (devices or [])
-                if str(getattr(d.type, "name", str(d.type))).lower() == "keyboard"
-            ]
-            if keyboards:
-                break
+            dev.set_colors([RGBColor(0, 0, 0)] * len(dev.leds))
         except Exception:
             pass
-        time.sleep(0.25)
+        try:
+            black = {i: (0, 0, 0) for i in range(len(dev.leds))}
+        except Exception:
+            black = {}
+        settle(dev, black, 0.05, probe=True)
+
+
+def _make_client(transport: Optional[str]) -> OpenRGBClient:
+    """New client from the bound backend (OpenRGB sync/async or simulation)."""
+    global _BACKEND
+    if _BACKEND is None:
+        _BACKEND = make_backend(None, transport)
+    return _BACKEND.connect()
+
+
+def connect(wait_s: float = 10.0, transport: Optional[str] = None, calibrate: bool = True,
+            read_channels: Optional[int] = None,
+            backend: Union[str, KeyboardBackend, None] = None,
+            record: Optional[str] = None,
+            shards: Optional[Dict[str, int]] = None,
+            clear: bool = True) -> bool:
+    """Connect to OpenRGB SDK server and prepare label mapping.
+
+    Polls up to `wait_s` seconds for a keyboard device to appear.
+    `transport="async"` (or RGB_TRANSPORT=async) pipelines requests.
+    With `calibrate` the update cost model is fitted to this device; the
+    fit of a real OpenRGB device is measured once and reused from
+    config.CACHE_DIR later (sim/stand-in/replay runs always measure).
+    `read_channels` (or RGB_READ_CHANNELS) opens that many extra
+    connections used only for readback, so reads do not queue behind
+    frame flushes on the write connection.
+    `backend` ("openrgb", "openrgb-async", "sim" or a KeyboardBackend;
+    default RGB_BACKEND) selects where the keyboard lives.
+    `record` (or RGB_RECORD) logs every refresh/write to that file;
+    play it back with backend="replay:<file>".
+    `shards` (or RGB_SHARDS="IR=1,PC=1") moves label groups from
+    `keyboard_presets.SHARD_GROUPS` onto other keyboards, by their
+    position among the detected keyboards (0 = the primary one).
+    With `clear=False` the keyboard is not blanked (see `reconnect()`).
+    """
+    global client, kb, km, _READ_POOL, _BACKEND, _LINK_FAILS
+    with _STATE_LOCK:
+        _STARTUP.reset()
+        _LINK_FAILS = 0
+        _BREAKER.reset()
+        _BACKEND = make_backend(backend, transport)
+        record = record or os.environ.get("RGB_RECORD", "") or None
+        if record and not isinstance(_BACKEND, RecordingBackend):
+            _BACKEND = RecordingBackend(_BACKEND, record)
+        deadline = time.perf_counter() + max(0.0, float(wait_s))
+        with _STARTUP.phase("handshake"):
+            client = _make_client(transport)
+            # Readiness probe: the client's version/name handshake has completed
+            delay = 0.005
+            while not _server_ready(client) and time.perf_counter() < deadline:
+                time.sleep(delay)
+                delay = min(0.25, delay * 2)
+            # Optional extra wait for backends that ask for it
+            try:
+                if _BACKEND.startup_grace_s > 0:
+                    time.sleep(_BACKEND.startup_grace_s)
+            except Exception:
+                pass
+
+        # Poll for keyboard device enumeration (short first retries, backing off)
+        keyboards = []
+        with _STARTUP.phase("enumerate"):
+            delay = 0.01
+            while True:
+                try:
+                    keyboards = _list_keyboards(client)
+                    if keyboards:
+                        break
+                except Exception:
+                    pass
+                if time.perf_counter() >= deadline:
+                    break
+                time.sleep(delay)
+                delay = min(0.25, delay * 2)
+
+        if not keyboards:
+            raise RuntimeError(
+                "Keyboard device not found. Ensure OpenRGB SDK server is running "
+                "and that a keyboard is detected in OpenRGB UI."
+            )
 
-    if not keyboards:
-        raise RuntimeError(
-            "Keyboard device not found. Ensure OpenRGB SDK server is running "
-            "and that a keyboard is detected in OpenRGB UI."
-        )
+        kb_device = keyboards[0]
+        safe_set_direct_and_sync(kb_device, timer=_STARTUP, clear=clear)
 
-    kb_device = keyboards[0]
-    safe_set_direct_and_sync(kb_device)
+        map_path = MAPS_DIR / "Corsair K70 RGB TKL_leds.json"
+        with _STARTUP.phase("label_map"):
+            km = RGBLabelController(client, json_path=map_path)
+        # Session starts from the handle we just switched to direct mode
+        km.session.adopt(kb_device, "direct")
+        note_labels = getattr(_BACKEND, "note_labels", None)
+        if note_labels is not None:
+            note_labels(km.label_to_index)
+
+        # Bind active device
+        global kb
+        kb = kb_device
+
+        _learn_zones(kb_device)
+
+        # Shadow starts from the black frame pushed by safe_set_direct_and_sync
+        try:
+            _FRAME.reset([(0, 0, 0)] * len(kb_device.leds))
+        except Exception:
+            _FRAME.reset([])
+        if calibrate:
+            with _STARTUP.phase("calibrate"):
+                calibrate_update_cost(cached=True)
+
+        try:
+            n_read = int(read_channels if read_channels is not None else os.environ.get("RGB_READ_CHANNELS", "0") or 0)
+        except Exception:
+            n_read = 0
+        if n_read > 0:
+            with _STARTUP.phase("read_channels"):
+                _READ_POOL = ReadChannelPool(lambda: _make_client(transport), size=n_read,
+                                             device_index=getattr(kb_device, "id", None))
 
-    map_path = MAPS_DIR / "Corsair K70 RGB TKL_leds.json"
-    km = RGBLabelController(client, json_path=map_path)
+        if shards is None:
+            shards = _shards_from_env()
+        if shards:
+            with _STARTUP.phase("shards"):
+                set_device_shards(shards, wait_s=wait_s, clear=clear)
+        shm_name = os.environ.get("RGB_SHM", "")
+        if shm_name and _SHM is None:
+            publish_frame(None if shm_name == "1" else shm_name)
+        elif _SHM is not None:
+            # Reconnect: the same segment keeps being updated
+            _shm_publish()
+        _CONNECT_OPTS.clear()
+        _CONNECT_OPTS.update(transport=transport, read_channels=n_read, backend=_BACKEND,
+                             shards=dict(shards or {}))
+        if _atomic_debug_enabled():
+            try:
+                print(f"[RGB-STARTUP] {startup_report()}")
+            except Exception:
+                pass
+        return True
 
-    # Bind active device
-    global kb
-    kb = kb_device
 
-    # Clear state cache on (re)connect
+def _server_ready(cl) -> bool:
+    """Readiness probe: handshake done on clients that expose their socket state."""
+    comms = getattr(cl, "comms", None)
+    if comms is None:
+        return True
     try:
-        _LAST_LABEL_COLOR.clear()
+        return bool(getattr(comms, "connected", True))
     except Exception:
-        pass
-    return True
+        return False
 
 
-def disconnect() -> None:
-    global client, kb, km
-    if client is not None:
+def startup_timing() -> Dict[str, float]:
+    """Milliseconds spent per phase of the last connect()/init_all_keys(), plus total."""
+    return _STARTUP.report()
+
+
+def startup_report() -> str:
+    """One-line form of `startup_timing()`."""
+    return _STARTUP.format()
+
+
+def _shards_from_env() -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for part in str(os.environ.get("RGB_SHARDS", "") or "").split(","):
+        if "=" not in part:
+            continue
+        name, pos = part.split("=", 1)
         try:
-            client.disconnect()
+            out[name.strip().upper()] = int(pos)
         except Exception:
             pass
-        finally:
-            client = None
-    kb = None
-    km = None
-    try:
-        _LAST_LABEL_COLOR.clear()
-    except Exception:
-        pass
+    return out
 
 
-def is_connected() -> bool:
-    return (client is not None) and (kb is not None) and (km is not None)
+def _list_keyboards(cl) -> List[object]:
+    devices = getattr(cl, "devices", None) or cl.get_devices()
+    return [
+        d for d in (devices or [])
+        if d is not None and str(getattr(d.type, "name", str(d.type))).lower() == "keyboard"
+    ]
 
 
-def init_all_keys(debug: bool = False) -> bool:
+def _close_shards() -> None:
+    global _SHARDS, _ROUTE
+    shards, _SHARDS, _ROUTE = _SHARDS, [], {}
+    for sh in shards:
+        sh.close()
+
+
+def set_device_shards(assign: Dict[str, int], wait_s: float = 10.0, clear: bool = True) -> Dict[str, int]:
+    """Place label groups on other keyboards: `{"IR": 1, "VAR": 2}`.
+
+    Group names come from `keyboard_presets.SHARD_GROUPS`; positions index
+    the keyboards the backend reports, in order (0 = primary, no shard).
+    Each secondary keyboard gets its own connection, is switched to direct
+    mode and cleared. Replaces any previous assignment.
+    Returns the effective group -> position table.
+    """
     if kb is None or km is None:
         raise RuntimeError("connect() must be called before using LED functions.")
+    by_pos: Dict[int, List[str]] = {}
+    for name, pos in (assign or {}).items():
+        group = str(name).upper()
+        if group not in SHARD_GROUPS:
+            raise ValueError(f"unknown shard group '{name}' (expected one of {sorted(SHARD_GROUPS)})")
+        if int(pos) > 0:
+            by_pos.setdefault(int(pos), []).append(group)
 
-    device = None
+    flush()
+    _close_shards()
+    new: List[_Shard] = []
     try:
-        device = km._load_keyboard()  # type: ignore[attr-defined]
+        for pos, groups in sorted(by_pos.items()):
+            cl = _make_client(None)
+            keyboards: List[object] = []
+            deadline = time.perf_counter() + max(0.0, float(wait_s))
+            while True:
+                try:
+                    keyboards = _list_keyboards(cl)
+                except Exception:
+                    keyboards = []
+                if len(keyboards) > pos or time.perf_counter() >= deadline:
+                    break
+                time.sleep(0.25)
+            if len(keyboards) <= pos:
+                try:
+                    cl.disconnect()
+                except Exception:
+                    pass
+                raise RuntimeError(f"Keyboard #{pos} not found ({len(keyboards)} keyboard(s) detected).")
+            dev = keyboards[pos]
+            safe_set_direct_and_sync(dev, clear=clear)
+            # Same-model keyboards share the default map; a per-device map wins if present
+            map_path = MAPS_DIR / f"{getattr(dev, 'name', '')}_leds.json"
+            if not map_path.exists():
+                map_path = MAPS_DIR / "Corsair K70 RGB TKL_leds.json"
+            labels = RGBLabelController(cl, json_path=map_path).label_to_index
+            sh = _Shard(pos, cl, dev, labels, groups)
+            new.append(sh)
     except Exception:
-        device = None
-    device = device or kb
+        for sh in new:
+            sh.close()
+        raise
+
+    global _SHARDS, _ROUTE
+    route: Dict[str, _Shard] = {}
+    for sh in new:
+        for lab in sh.labels:
+            route[lab] = sh
+    _SHARDS, _ROUTE = new, route
+    if _SHM is not None:
+        # LED count and label table changed; viewers re-attach by name
+        publish_frame(_SHM.name)
+    return device_shards()
+
 
+def publish_frame(name: Optional[str] = None) -> str:
+    """Publish the current frame in a shared-memory segment (see `utils.frame_shm`).
+
+    Every pushed frame and every `set_machine_state()` call updates it, so
+    dashboards and test harnesses can follow the machine without their own
+    device connection. Also enabled at connect by RGB_SHM=<name> (or 1).
+    Returns the segment name.
+    """
+    global _SHM
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+    labels = dict(km.label_to_index)
+    offset = len(_FRAME)
+    for sh in _SHARDS:
+        for lab in sh.labels:
+            idx = sh.label_to_index.get(lab)
+            if idx is not None:
+                labels[lab] = offset + idx
+        offset += len(sh.frame)
+    stop_publishing()
+    _SHM = SharedFrameWriter(offset, labels, name=name)
+    _shm_publish()
+    return _SHM.name
+
+
+def stop_publishing() -> None:
+    """Remove the shared-memory frame segment (no-op if not publishing)."""
+    global _SHM
+    shm, _SHM = _SHM, None
+    if shm is not None:
+        shm.close()
+
+
+def set_machine_state(pc: int, ir: int = -1, flags: Optional[Mapping[str, int]] = None,
+                      step: Optional[int] = None) -> None:
+    """Record decoded PC/IR/flags next to the published frame (no-op if not publishing)."""
+    shm = _SHM
+    if shm is None:
+        return
     try:
-        device.set_mode("direct")
+        shm.publish_state(pc, ir, pack_flags(flags or {}), step)
     except Exception:
         pass
 
+
+def _shm_publish() -> None:
+    shm = _SHM
+    if shm is None:
+        return
     try:
-        _refresh_device_leds(device)
+        shm.publish_colors(np.concatenate([_FRAME.array()] + [sh.frame.array() for sh in _SHARDS]))
     except Exception:
         pass
 
-    try:
-        colors = [RGBColor(0, 0, 0)] * len(device.leds)
-        device.set_colors(colors)
-        time.sleep(0.05)
-        device.set_colors(colors)
+
+def device_shards() -> Dict[str, int]:
+    """Current group -> keyboard position table (groups not listed stay on 0)."""
+    return {g: sh.position for sh in _SHARDS for g in sh.groups}
+
+
+_COST_CACHE = CACHE_DIR / "update_cost.json"
+
+
+def _cost_cache_key(device, n_leds: int) -> Optional[str]:
+    """Cache entry name for this server/device (None = do not cache).
+
+    Only real OpenRGB servers are cached. The sim keyboard and the SDK
+    stand-in run with artificial latency, so their fits must never be
+    reused for a real device (they share its name and 127.0.0.1).
+    Recording and replay always measure: a replay must issue the same
+    barrier reads its recording did. RGB_COST_CACHE=0 disables the cache.
+    """
+    if str(os.environ.get("RGB_COST_CACHE", "1")).strip().lower() in ("0", "false", "no", "off"):
+        return None
+    from backends.sdk_standin import STANDIN_VENDOR
+
+    backend = _BACKEND
+    name = str(getattr(backend, "name", "") or "")
+    if name in ("record", "replay", "sim"):
+        return None
+    if name == "proc":
+        inner = str(getattr(backend, "inner", "") or "")
+        if inner == "sim" or inner.startswith("replay:"):
+            return None
+    meta = getattr(device, "metadata", None)
+    if str(getattr(meta, "vendor", "") or "") == STANDIN_VENDOR:
+        return None
+    # proc children resolve the server from the same environment as make_backend()
+    address = getattr(backend, "address", None) or os.environ.get("RGB_SDK_HOST", "") or "127.0.0.1"
+    port = getattr(backend, "port", None) or os.environ.get("RGB_SDK_PORT", "") or 6742
+    return "|".join([name, str(getattr(backend, "transport", "") or ""), f"{address}:{port}",
+                     str(getattr(device, "name", "") or ""), str(getattr(meta, "serial", "") or ""),
+                     str(int(n_leds))])
+
+
+def calibrate_update_cost(reps: int = 8, cached: bool = False) -> Dict[str, object]:
+    """Measure per-packet latency on the bound device and refit the cost model.
+
+    Rewrites the current shadow colors, so nothing visibly changes.
+    With `cached` a fit saved earlier for this device is applied instead
+    (no writes); every measurement is saved for the next connect.
+    """
+    device = _active_device()
+    shadow = _FRAME.view()
+    if device is None or not shadow:
+        return _COST.report()
+    key = _cost_cache_key(device, len(shadow))
+    if cached and key is not None and _COST.load(_COST_CACHE, key):
+        return _COST.report()
+
+    def _single() -> None:
+        device.leds[0].set_color(RGBColor(*shadow[0]), fast=True)
+
+    def _full() -> None:
+        device.set_colors([RGBColor(*c) for c in shadow], fast=True)
+
+    with _IO_LOCK:
+        fitted = _COST.calibrate(_single, _full, lambda: _refresh_device_leds(device), len(shadow), reps=reps)
+    if fitted and key is not None:
+        _COST.save(_COST_CACHE, key)
+    rep = _COST.report()
+    if _atomic_debug_enabled():
         try:
-            time.sleep(max(0.0, float(_APPLY_DELAY_MS) / 1000.0))
+            print(f"[RGB-COST] a={rep['a_ms']:.3f}ms b={rep['b_ms_per_byte'] * 1000:.3f}us/B "
+                  f"breakeven={_COST.breakeven(len(shadow))} LEDs")
         except Exception:
             pass
-        if debug:
-            try:
-                print(f"[INFO] Cleared {len(colors)} LEDs to black (atomic)")
-            except Exception:
-                pass
-        return True
-    except Exception:
-        return False
+    return rep
 
 
-def get_key_color(label: str, fresh: bool = True) -> List[Tuple[int, int, int]]:
-    if kb is None or km is None:
-        raise RuntimeError("connect() must be called before using LED functions.")
-    if fresh:
-        _refresh_device_leds()
+def update_cost_report() -> Dict[str, object]:
+    """Cost model parameters plus how often each update primitive was picked."""
+    rep = _COST.report()
+    n = len(_FRAME)
+    rep["breakeven"] = _COST.breakeven(n) if n else None
+    return rep
 
-    idx = km.label_to_index.get(label.lower())
-    if idx is None:
-        raise KeyError(f"Unknown label '{label}'.")
 
+def _learn_zones(device) -> None:
+    """Build the zone table from the device's OpenRGB zones."""
+    global _ZONES
+    table: List[ZoneSpan] = []
+    start = 0
     try:
-        c = kb.leds[idx].color
+        for zid, z in enumerate(getattr(device, "zones", None) or []):
+            leds = list(getattr(z, "leds", None) or [])
+            n = len(leds)
+            try:
+                # Zone LED ids are device-wide indices
+                start = int(leds[0].id) if n else start
+            except Exception:
+                pass
+            table.append(ZoneSpan(id=int(getattr(z, "id", zid)), name=str(getattr(z, "name", "")), start=start, count=n))
+            start += n
     except Exception:
-        c = kb.colors[idx]
-    return [(c.red, c.green, c.blue)]
+        table = []
+    _ZONES = table
 
 
-def set_key_color(label: str, color: RGBColor, debug: bool = False) -> bool:
-    if kb is None or km is None:
-        raise RuntimeError("connect() must be called before using LED functions.")
+def zones() -> List[ZoneSpan]:
+    """Zone table learned at connect (empty if the device reports none)."""
+    return list(_ZONES)
 
-    prev = get_key_color(label, fresh=True)[0] if debug else None
-    ok = km.set(label, color)
-    try:
-        time.sleep(max(0.0, float(_APPLY_DELAY_MS) / 1000.0))
-    except Exception:
-        pass
 
-    if ok and debug:
-        after = (color.red, color.green, color.blue)
-        print(f"[DEBUG] {label.upper()} {prev} -> {after}")
-    return ok
+def _zone_for(idxs) -> Optional[ZoneSpan]:
+    if not idxs or not _ZONES:
+        return None
+    lo, hi = min(idxs), max(idxs)
+    for span in _ZONES:
+        if span.covers(lo, hi):
+            return span
+    return None
 
 
-def set_labels_atomic(label_to_color: Dict[str, RGBColor]) -> bool:
-    if kb is None or km is None:
-        raise RuntimeError("connect() must be called before using LED functions.")
+def disconnect() -> None:
+    _teardown(close_backend=True)
+    stop_publishing()
+    _CONNECT_OPTS.clear()
 
-    try:
-        device = None
-        try:
-            device = km._load_keyboard()  # type: ignore[attr-defined]
-        except Exception:
-            device = None
-        device = device or kb
-        if device is None:
-            return False
 
+def _teardown(close_backend: bool) -> None:
+    global client, kb, km, _ZONES, _READ_POOL, _PUBLISHED
+    with _STATE_LOCK:
+        stop_led_writer()
+        _close_shards()
+        if _READ_POOL is not None:
+            _READ_POOL.close()
+            _READ_POOL = None
+        with _TRACK_LOCK:
+            _INFLIGHT.clear()
+            _UNCONFIRMED.clear()
+        if client is not None:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+            finally:
+                client = None
         try:
-            device.set_mode("direct")
+            close = getattr(_BACKEND, "close", None)
+            if close_backend and close is not None:
+                close()
         except Exception:
             pass
+        kb = None
+        km = None
+        _PUBLISHED = None
+        _FRAME.reset([])
+        _ZONES = []
 
-        # Debug toggle via env or API
-        dbg = _ATOMIC_DEBUG
-        if not dbg:
-            try:
-                import os
-                dbg = str(os.environ.get("RGB_ATOMIC_DEBUG", "")).strip().lower() in ("1", "true", "y", "yes")
-            except Exception:
-                dbg = False
-
-        # Resolve changes and skip cached no‑ops
-        changes: List[Tuple[int, RGBColor]] = []
-        for lab, col in label_to_color.items():
-            key = str(lab).lower()
-            idx = km.label_to_index.get(key)
-            if idx is None:
-                if dbg:
-                    try:
-                        print(f"[RGB-ATOMIC] unknown label='{lab}'")
-                    except Exception:
-                        pass
-                continue
-            tgt = (int(col.red), int(col.green), int(col.blue))
-            if _LAST_LABEL_COLOR.get(key) == tgt:
-                if dbg:
-                    try:
-                        print(f"[RGB-ATOMIC] skip-noop idx={idx} label='{lab}'")
-                    except Exception:
-                        pass
-                continue
-            changes.append((idx, col))
 
-        if not changes:
-            if dbg:
-                try:
-                    print("[RGB-ATOMIC] no-op (no changes)")
-                except Exception:
-                    pass
-            return True
+def reconnect(warm: bool = True, wait_s: float = 10.0) -> bool:
+    """Re-open the device link after a server hiccup, with the last connect() options.
 
-        SMALL_N = 5
-        ok = False
-        if len(changes) <= SMALL_N:
-            ok_any = False
-            for idx, col in changes:
-                try:
-                    device.leds[idx].set_color(col)
-                    ok_any = True
-                except Exception as ex:
-                    if dbg:
-                        try:
-                            print(f"[RGB-ATOMIC] per-key set fail idx={idx}: {ex}")
-                        except Exception:
-                            pass
-            ok = ok_any
+    Warm: the last-known frame (including writes that never got out) is
+    kept in process, re-pushed as one full frame per keyboard on the new
+    connection and verified with a single snapshot read. Nothing is blanked,
+    so LED-held registers and variables survive. Cold: connect and clear.
+    Returns True when the readback matches the restored frame.
+    """
+    global _RECONNECTS
+    with _STATE_LOCK:
+        if not _CONNECT_OPTS:
+            raise RuntimeError("connect() must be called before reconnect().")
+        opts = dict(_CONNECT_OPTS)
+        _commit_local()
+        main_cols = _FRAME.array() if warm else None
+        shard_cols = {sh.position: sh.frame.array() for sh in _SHARDS} if warm else {}
+        writer_on = is_led_writer_running()
+        # Queued frames are not lost: their colors are already in the shadow
+        _teardown(close_backend=False)
+        connect(wait_s=wait_s, calibrate=False, clear=not warm, **opts)  # type: ignore[arg-type]
+        _RECONNECTS += 1
+        if not warm:
+            ok = init_all_keys()
         else:
-            try:
-                colors: List[RGBColor] = list(getattr(device, "colors", []))
-            except Exception:
-                colors = []
-            if not colors:
+            device = _active_device()
+            with _IO_LOCK:
+                if main_cols is not None and len(main_cols) and len(main_cols) == len(device.leds):
+                    device.set_colors([RGBColor(*c) for c in main_cols.tolist()], fast=True)
+                    _FRAME.reset(main_cols)
+            for sh in _SHARDS:
+                cols = shard_cols.get(sh.position)
+                if cols is not None and len(cols) and len(cols) == len(sh.device.leds):
+                    with sh.lock:
+                        sh.device.set_colors([RGBColor(*c) for c in cols.tolist()], fast=True)
+                    sh.reset(cols)
+            # One read covers every keyboard
+            snap = snapshot(fresh=True, barrier=False)
+            want = np.concatenate([_FRAME.array()] + [sh.frame.array() for sh in _SHARDS])
+            same = snap.array.shape == want.shape
+            ok = same and bool((snap.array == want).all())
+            if _atomic_debug_enabled() or not ok:
                 try:
-                    colors = [led.color for led in device.leds]
+                    bad = int((snap.array != want).any(axis=1).sum()) if same else len(want)
+                    print(f"[RGB-RECONNECT] warm resync #{_RECONNECTS}: {len(want)} LEDs, mismatched={bad}")
                 except Exception:
-                    colors = []
-            try:
-                for idx, col in changes:
-                    if 0 <= idx < len(colors):
-                        colors[idx] = col
-                device.set_colors(colors)
-                ok = True
-            except Exception as ex:
-                ok = False
-                if dbg:
+                    pass
+        if writer_on:
+            start_led_writer()
+        return ok
+
+
+def is_connected() -> bool:
+    return (client is not None) and (kb is not None) and (km is not None)
+
+
+def init_all_keys(debug: bool = False) -> bool:
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+    with _STARTUP.phase("init_all_keys"):
+        return _init_all_keys(debug)
+
+
+def _init_all_keys(debug: bool) -> bool:
+
+    device = _active_device()
+    # Queued frames must not land on top of the cleared keyboard
+    wait_writes()
+
+    _ensure_direct(device)
+
+    try:
+        _refresh_device_leds(device)
+    except Exception:
+        pass
+
+    try:
+        colors = [RGBColor(0, 0, 0)] * len(device.leds)
+        black = {i: (0, 0, 0) for i in range(len(colors))}
+        device.set_colors(colors)
+        # Readback confirms the black frame; re-send only if it was dropped
+        if not settle(device, black, 0.05, lock=_IO_LOCK, probe=True):
+            device.set_colors(colors)
+            settle(device, black, float(_APPLY_DELAY_MS) / 1000.0, lock=_IO_LOCK, probe=True)
+        # Device is now known-black; pending shadow writes are superseded
+        _FRAME.reset([(0, 0, 0)] * len(colors))
+        if _WRITER is not None:
+            _WRITER.rebase(list(_FRAME.view()))
+        for sh in _SHARDS:
+            sh.wait_idle()
+            with sh.lock:
+                sh.device.set_colors([RGBColor(0, 0, 0)] * len(sh.device.leds), fast=True)
+            sh.reset([(0, 0, 0)] * len(sh.device.leds))
+        if debug:
+            try:
+                print(f"[INFO] Cleared {len(colors)} LEDs to black (atomic)")
+            except Exception:
+                pass
+        return True
+    except Exception:
+        return False
+
+
+def _atomic_debug_enabled() -> bool:
+    """Debug toggle via API or RGB_ATOMIC_DEBUG env."""
+    if _ATOMIC_DEBUG:
+        return True
+    try:
+        import os
+        return str(os.environ.get("RGB_ATOMIC_DEBUG", "")).strip().lower() in ("1", "true", "y", "yes")
+    except Exception:
+        return False
+
+
+def _stage(label: str, color: RGBColor, dbg: bool = False) -> bool:
+    """Write one label into the shadow frame. Returns False for unknown labels."""
+    key = str(label).lower()
+    shard = _ROUTE.get(key)
+    if shard is not None:
+        fb = shard.frame
+        idx = shard.label_to_index.get(key)
+    else:
+        fb = _FRAME
+        idx = km.label_to_index.get(key) if km is not None else None
+    if idx is None:
+        if dbg:
+            try:
+                print(f"[RGB-ATOMIC] unknown label='{label}'")
+            except Exception:
+                pass
+        return False
+    tgt = (int(color.red), int(color.green), int(color.blue))
+    if _frame_depth() > 0:
+        # Held per thread until the outermost frame() of this thread ends
+        _TLS.pending[(id(fb), idx)] = (fb, idx, tgt)
+        return True
+    if not fb.write(idx, tgt) and dbg:
+        try:
+            print(f"[RGB-ATOMIC] skip-noop idx={idx} label='{label}'")
+        except Exception:
+            pass
+    return True
+
+
+def _stage_many(label_to_color: Mapping[str, RGBColor], dbg: bool = False) -> None:
+    """Stage a batch of labels: one index/color array per shadow, diffed in one go."""
+    groups: Dict[int, Tuple[FrameBuffer, List[int], List[Tuple[int, int, int]]]] = {}
+    table = km.label_to_index if km is not None else {}
+    for label, color in label_to_color.items():
+        key = str(label).lower()
+        shard = _ROUTE.get(key)
+        if shard is not None:
+            fb, idx = shard.frame, shard.label_to_index.get(key)
+        else:
+            fb, idx = _FRAME, table.get(key)
+        if idx is None:
+            if dbg:
+                try:
+                    print(f"[RGB-ATOMIC] unknown label='{label}'")
+                except Exception:
+                    pass
+            continue
+        g = groups.get(id(fb))
+        if g is None:
+            g = groups[id(fb)] = (fb, [], [])
+        g[1].append(idx)
+        g[2].append((int(color.red), int(color.green), int(color.blue)))
+    if _frame_depth() > 0:
+        for fb, idxs, rgbs in groups.values():
+            for idx, tgt in zip(idxs, rgbs):
+                _TLS.pending[(id(fb), idx)] = (fb, idx, tgt)
+        return
+    for fb, idxs, rgbs in groups.values():
+        n = fb.write_arrays(np.array(idxs, dtype=np.intp), np.array(rgbs, dtype=np.uint8))
+        if dbg and n < len(idxs):
+            try:
+                print(f"[RGB-ATOMIC] skip-noop {len(idxs) - n} of {len(idxs)}")
+            except Exception:
+                pass
+
+
+def _frame_depth() -> int:
+    return getattr(_TLS, "depth", 0)
+
+
+def _commit_local() -> None:
+    """Move this thread's held frame writes into the shared shadow(s)."""
+    pending = getattr(_TLS, "pending", None)
+    if not pending:
+        return
+    _TLS.pending = {}
+    by_fb: Dict[int, Tuple[FrameBuffer, Dict[int, Tuple[int, int, int]]]] = {}
+    for fb, idx, rgb in pending.values():
+        by_fb.setdefault(id(fb), (fb, {}))[1][idx] = rgb
+    for fb, items in by_fb.values():
+        fb.write_many(items)
+
+
+def _active_device():
+    """Resolve the keyboard device currently bound by the label controller."""
+    device = None
+    try:
+        device = km._load_keyboard() if km is not None else None  # type: ignore[attr-defined]
+    except Exception:
+        device = None
+    return device or kb
+
+
+def _ensure_direct(device) -> None:
+    """Switch to direct mode once per session instead of on every write."""
+    try:
+        session = getattr(km, "session", None)
+        if session is not None and session.device() is device:
+            session.ensure_mode("direct")
+        else:
+            device.set_mode("direct")
+    except Exception:
+        pass
+
+
+def _invalidate_session() -> None:
+    try:
+        if km is not None:
+            km.session.invalidate()
+    except Exception:
+        pass
+
+
+def _push(device, changes: Dict[int, Tuple[int, int, int]],
+          base: List[Tuple[int, int, int]], dbg: bool, zoned: bool = True) -> bool:
+    """Send `changes` with the primitive the cost model rates cheapest.
+
+    `base` is the full frame the device should end up showing; it is
+    used for the single full-device `set_colors` on larger changes.
+    The zone table describes the primary device, so shards pass
+    `zoned=False`. Devices that batch writes (the out-of-process I/O
+    backend) get the whole push as one message.
+
+    A failed push is retried within the retry budget (with backoff); no
+    per-key fallback. While the circuit breaker is open nothing is sent
+    and the caller keeps the changes dirty for after recovery.
+    """
+    if not _BREAKER.allow():
+        return False
+    try:
+        attempt = 0
+        while True:
+            if _push_ops(device, changes, base, dbg, zoned):
+                return True
+            attempt += 1
+            if attempt >= _RETRY.attempts or not _RETRY.take():
+                return False
+            time.sleep(_RETRY.backoff_s(attempt - 1))
+    finally:
+        send_batch = getattr(device, "send_batch", None)
+        if send_batch is not None:
+            try:
+                send_batch()
+            except Exception:
+                _note_link(False)
+
+
+def _push_ops(device, changes: Dict[int, Tuple[int, int, int]],
+              base: List[Tuple[int, int, int]], dbg: bool, zoned: bool) -> bool:
+    span = _zone_for(changes) if zoned else None
+    pick = _COST.choose(len(changes), len(base), span.count if span is not None else None)
+    if pick == "zone" and span is not None:
+        try:
+            # UpdateZoneLEDs carries only this zone's slice of the frame
+            zone = device.zones[span.id]
+            zone.set_colors([RGBColor(*c) for c in base[span.start:span.start + span.count]], fast=True)
+            return True
+        except Exception as ex:
+            if dbg:
+                try:
+                    print(f"[RGB-ATOMIC] zone '{span.name}' update failed: {ex}")
+                except Exception:
+                    pass
+            pick = "full"
+    if pick == "single":
+        for idx, rgb in sorted(changes.items()):
+            try:
+                device.leds[idx].set_color(RGBColor(*rgb), fast=True)
+            except Exception as ex:
+                # Stop at the first failure: the whole change set stays dirty and is
+                # retried, instead of hammering a struggling server key by key
+                if dbg:
                     try:
-                        print(f"[RGB-ATOMIC] device.set_colors failed: {ex}")
+                        print(f"[RGB-ATOMIC] per-key set fail idx={idx}: {ex}")
                     except Exception:
                         pass
-                ok_any = False
-                for idx, col in changes:
-                    try:
-                        device.leds[idx].set_color(col)
-                        ok_any = True
-                    except Exception as ex2:
-                        if dbg:
-                            try:
-                                print(f"[RGB-ATOMIC] per-key fallback fail idx={idx}: {ex2}")
-                            except Exception:
-                                pass
-                ok = ok_any
-
-        if ok:
+                return False
+        return True
+    try:
+        device.set_colors([RGBColor(*c) for c in base], fast=True)
+        return True
+    except Exception as ex:
+        if dbg:
             try:
-                time.sleep(max(0.0, float(_APPLY_DELAY_MS) / 1000.0))
+                print(f"[RGB-ATOMIC] device.set_colors failed: {ex}")
             except Exception:
                 pass
+        return False
+
+
+def _apply_frame(changes: Dict[int, Tuple[int, int, int]],
+                 base: List[Tuple[int, int, int]], paced: bool = True) -> bool:
+    """Apply `changes` onto `base`, push them and pay the apply delay once.
+
+    Shared by the synchronous `flush()` and the background writer; on
+    failure the indices are marked dirty again so a later flush retries.
+    Takes a frame token first unless the caller already holds one.
+    """
+    dbg = _atomic_debug_enabled()
+    if paced:
+        _PACER.acquire()
+    try:
+        device = _active_device()
+        if device is None:
+            _FRAME.mark_dirty(changes)
+            return False
+        for idx, rgb in changes.items():
+            if 0 <= idx < len(base):
+                base[idx] = rgb
+
+        with _IO_LOCK:
+            _ensure_direct(device)
+            ok = _push(device, changes, base, dbg)
+        _note_link(ok)
+        if not ok:
+            # Keep entries dirty so the next flush retries them; the cached
+            # handle may be stale (unplugged / re-enumerated)
+            _FRAME.mark_dirty(changes)
+            _invalidate_session()
+            _untrack(changes, confirmed=True)
+            return False
+        _untrack(changes, confirmed=False)
+        _shm_publish()
+        # Fixed apply delay, or poll readback until the colors are observed
+        settled = settle(device, changes, float(_APPLY_DELAY_MS) / 1000.0, lock=_IO_LOCK)
+        if dbg:
             try:
-                for lab, col in label_to_color.items():
-                    _LAST_LABEL_COLOR[str(lab).lower()] = (int(col.red), int(col.green), int(col.blue))
+                mode = _COST.last or '?'
+                note = '' if settled else ' settle-timeout'
+                print(f"[RGB-ATOMIC] applied; changes={len(changes)} mode={mode}{note}")
             except Exception:
                 pass
+        return True
+    except Exception as ex:
+        _note_link(False)
+        _FRAME.mark_dirty(changes)
+        _invalidate_session()
+        _untrack(changes, confirmed=True)
+        if dbg:
+            try:
+                print(f"[RGB-ATOMIC] exception: {ex}")
+            except Exception:
+                pass
+        return False
+
+
+class LedWriter:
+    """Background LED writer fed by a bounded queue.
+
+    Submissions queued while a frame is being sent are coalesced per LED
+    index (last write wins) and go out together as the next frame. Each
+    submission gets a Future that resolves (True/False) once its colors
+    were pushed and the apply delay has elapsed. A full queue blocks the
+    submitter, which keeps the CPU from running far ahead of the LEDs.
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        self._q: "queue.Queue[Optional[Tuple[Dict[int, Tuple[int, int, int]], Future]]]" = \
+            queue.Queue(maxsize=max(1, int(maxsize)))
+        self._thread: Optional[threading.Thread] = None
+        self._last: Optional[Future] = None
+        # What the device was last sent (the writer's own full frame)
+        self._sent: List[Tuple[int, int, int]] = []
+        self.frames: int = 0
+        self.coalesced: int = 0
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, base: List[Tuple[int, int, int]]) -> None:
+        if self.is_alive():
+            return
+        self._sent = list(base)
+        self._thread = threading.Thread(target=self._run, name="led-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Drain queued frames, then stop the thread."""
+        if not self.is_alive():
+            self._thread = None
+            return
+        self._q.put(None)
+        self._thread.join(timeout)  # type: ignore[union-attr]
+        self._thread = None
+
+    def rebase(self, base: List[Tuple[int, int, int]]) -> None:
+        """Adopt `base` as the device state (after an out-of-band full write)."""
+        self.wait_idle()
+        self._sent = list(base)
+
+    def submit(self, changes: Dict[int, Tuple[int, int, int]]) -> Future:
+        fut: Future = Future()
+        self._q.put((dict(changes), fut))
+        self._last = fut
+        return fut
+
+    @property
+    def last(self) -> Optional[Future]:
+        """Future of the most recent submission (resolves after all earlier ones)."""
+        return self._last
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submission so far has been sent (FIFO barrier)."""
+        fut = self._last
+        if fut is None:
+            return True
+        try:
+            return bool(fut.result(timeout=timeout))
+        except Exception:
+            return False
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            # Wait for frame budget first; submissions arriving meanwhile
+            # are folded into this frame
+            _PACER.acquire()
+            batch = [item]
+            stop = False
+            while True:
+                try:
+                    nxt = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            merged: Dict[int, Tuple[int, int, int]] = {}
+            for changes, _ in batch:
+                merged.update(changes)
+            self.coalesced += len(batch) - 1
+            if len(batch) > 1:
+                # Dropped: every LED of that submission is overwritten later
+                later: Set[int] = set()
+                n_drop = 0
+                for changes, _ in reversed(batch):
+                    if later and set(changes) <= later:
+                        n_drop += 1
+                    later.update(changes)
+                _PACER.note_coalesced(len(batch) - 1 - n_drop, n_drop)
+            try:
+                ok = _apply_frame(merged, self._sent, paced=False) if merged else True
+            except Exception:
+                ok = False
+            self.frames += 1
+            for _, fut in batch:
+                try:
+                    fut.set_result(ok)
+                except Exception:
+                    pass
+            if stop:
+                return
+
+
+def start_led_writer(maxsize: int = 32) -> None:
+    """Move LED pushes off the calling thread onto a background writer."""
+    global _WRITER
+    if _WRITER is not None and _WRITER.is_alive():
+        return
+    # Writer starts from the device state, so settle the shadow first
+    if _FRAME.has_dirty() and is_connected():
+        flush()
+    _WRITER = LedWriter(maxsize=maxsize)
+    _WRITER.start(list(_FRAME.view()))
+
+
+def stop_led_writer() -> None:
+    """Drain queued frames and return to synchronous pushes."""
+    global _WRITER
+    w = _WRITER
+    _WRITER = None
+    if w is not None:
+        w.stop()
+
+
+def is_led_writer_running() -> bool:
+    return _WRITER is not None and _WRITER.is_alive()
+
+
+def wait_writes(timeout: Optional[float] = None) -> bool:
+    """Barrier: wait until every submitted LED write has reached the device."""
+    w = _WRITER
+    ok = True if w is None else w.wait_idle(timeout)
+    for sh in list(_SHARDS):
+        ok = sh.wait_idle(timeout) and ok
+    return ok
+
+
+def _any_dirty() -> bool:
+    return _FRAME.has_dirty() or any(sh.frame.has_dirty() for sh in _SHARDS)
+
+
+def _all_of(futs: List[Future]) -> Future:
+    """Future that resolves to True once every one of `futs` resolved True."""
+    out: Future = Future()
+    left = [len(futs)]
+    lock = threading.Lock()
+
+    def _ok(f: Future) -> bool:
+        try:
+            return bool(f.result())
+        except Exception:
+            return False
+
+    def _done(_f: Future) -> None:
+        with lock:
+            left[0] -= 1
+            last = left[0] == 0
+        if last:
+            out.set_result(all(_ok(f) for f in futs))
+
+    for f in futs:
+        f.add_done_callback(_done)
+    return out
+
+
+def _untrack(changes: Dict[int, Tuple[int, int, int]], confirmed: bool) -> None:
+    """Move finished writes out of the in-flight set.
+
+    Unless `confirmed`, they stay listed as unconfirmed until a read on a
+    separate channel sees them (cross-connection ordering is not guaranteed).
+    """
+    with _TRACK_LOCK:
+        for idx, rgb in changes.items():
+            if _INFLIGHT.get(idx) == rgb:
+                del _INFLIGHT[idx]
+            if not confirmed and _READ_POOL is not None:
+                _UNCONFIRMED[idx] = rgb
+
+
+def pending_writes() -> int:
+    """Number of LEDs written to the shadow but not yet pushed to the device."""
+    return _FRAME.dirty_count() + sum(sh.frame.dirty_count() for sh in _SHARDS)
+
+
+def _submit_dirty() -> Future:
+    """Hand the dirty shadow entries to the writer (or push them inline).
+
+    Shard keyboards are submitted first, so their pushes overlap with
+    the primary device's.
+    """
+    shard_futs = [f for f in (sh.submit_dirty() for sh in list(_SHARDS)) if f is not None]
+    changes = _FRAME.take_changes()
+    with _TRACK_LOCK:
+        _INFLIGHT.update(changes)
+    w = _WRITER
+    if w is not None and w.is_alive():
+        done = w.submit(changes)
+    else:
+        done = Future()
+        done.set_result(_apply_frame(changes, list(_FRAME.view())) if changes else True)
+    return _all_of([done] + shard_futs) if shard_futs else done
+
+
+def flush(wait: bool = True) -> bool:
+    """Push every dirty shadow entry to the device as one logical frame.
+
+    Small changes go out as per-LED updates, larger ones as a single
+    full-device `set_colors`. The apply delay is paid once per flush.
+    With the background writer running, `wait=False` only enqueues.
+    """
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+    # This thread's open frame is pushed too (explicit flush / read barrier)
+    _commit_local()
+    if not _any_dirty():
+        return wait_writes() if wait else True
+    fut = _submit_dirty()
+    if not is_led_writer_running():
+        return bool(fut.result())
+    return wait_writes() if wait else True
+
+
+@contextmanager
+def frame() -> Iterator[None]:
+    """Group LED writes into one logical frame.
+
+    Frames are per thread: inside the block this thread's writes are held
+    back, and the outermost block moves them into the shadow in one step
+    and flushes, so other threads never push half a frame. Reads flush
+    pending writes first, so read-after-write inside a frame still
+    observes the device state.
+    """
+    _TLS.depth = _frame_depth() + 1
+    if _TLS.depth == 1:
+        _TLS.pending = {}
+    try:
+        yield
+    finally:
+        _TLS.depth -= 1
+        if _TLS.depth == 0:
+            _commit_local()
+            if _any_dirty() and is_connected():
+                # With the writer running the frame is only enqueued
+                flush(wait=False)
+
+
+@dataclass(frozen=True, eq=False)
+class Snapshot:
+    """Immutable readback of every LED on the keyboard, taken with one refresh.
+
+    Index by label (`snap["esc"]`) to get an (r, g, b) tuple. `array` is
+    the read-only N x 3 uint8 readback for vectorized decoding; `colors`
+    is the same data as tuples.
+    """
+    array: np.ndarray
+    label_to_index: Mapping[str, int]
+    ts: float
+
+    @property
+    def colors(self) -> Tuple[Tuple[int, int, int], ...]:
+        return tuple(map(tuple, self.array.tolist()))
+
+    def __getitem__(self, label: str) -> Tuple[int, int, int]:
+        idx = self.label_to_index.get(str(label).lower())
+        if idx is None or not (0 <= idx < len(self.array)):
+            raise KeyError(f"Unknown label '{label}'.")
+        r, g, b = self.array[idx].tolist()
+        return (r, g, b)
+
+    def __contains__(self, label: object) -> bool:
+        return str(label).lower() in self.label_to_index
+
+    def get(self, label: str, default: Optional[Tuple[int, int, int]] = None) -> Optional[Tuple[int, int, int]]:
+        try:
+            return self[label]
+        except KeyError:
+            return default
+
+
+def _read_device_colors(device) -> np.ndarray:
+    # Devices that keep the packed readback (the I/O process proxy) skip RGBColor
+    raw = getattr(device, "raw_colors", None)
+    if raw:
+        return np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+    try:
+        cols = list(device.colors)
+    except Exception:
+        cols = []
+    if not cols:
+        try:
+            cols = [led.colors[0] for led in device.leds]
+        except Exception:
+            cols = []
+    return as_color_array(cols)
+
+
+def _overlay(cols: np.ndarray, items: Mapping[int, Tuple[int, int, int]]) -> np.ndarray:
+    """Copy of `cols` with `items` written over it (out-of-range indices ignored)."""
+    out = cols.copy()
+    if items:
+        idxs = np.fromiter(items.keys(), dtype=np.intp, count=len(items))
+        vals = as_color_array(list(items.values()))
+        ok = (idxs >= 0) & (idxs < len(out))
+        out[idxs[ok]] = vals[ok]
+    return out
+
+
+def _shows(cols: np.ndarray, items: Mapping[int, Tuple[int, int, int]]) -> bool:
+    if not items:
+        return True
+    idxs = np.fromiter(items.keys(), dtype=np.intp, count=len(items))
+    if idxs.min() < 0 or idxs.max() >= len(cols):
+        return False
+    return bool((cols[idxs] == as_color_array(list(items.values()))).all())
+
+
+def _read_via_pool(pool: ReadChannelPool, fresh: bool) -> Tuple[Tuple[int, int, int], ...]:
+    """Read on a dedicated channel, re-reading until our last pushes are visible."""
+    with _TRACK_LOCK:
+        expect = dict(_UNCONFIRMED)
+    deadline = poll_clock.now() + 0.05
+    while True:
+        with pool.device() as dev:
+            if fresh:
+                (getattr(dev, "refresh", None) or dev.update)()
+            cols = _read_device_colors(dev)
+        if _shows(cols, expect) or poll_clock.now() >= deadline:
+            break
+        poll_clock.sleep(0.001)
+    with _TRACK_LOCK:
+        for i, rgb in expect.items():
+            if _UNCONFIRMED.get(i) == rgb:
+                del _UNCONFIRMED[i]
+    return cols
+
+
+def snapshot(fresh: bool = True, barrier: bool = True) -> Snapshot:
+    """Read the whole keyboard once and return an immutable label-indexed view.
+
+    Pending shadow writes are flushed first. With `fresh=False` the last
+    refreshed device state is reused (no round trip). With `barrier=False`
+    the read does not wait for queued writes; their values are overlaid
+    from the shadow instead (read-your-writes), which lets readback
+    polling run concurrently with frame flushes.
+    """
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+    if barrier:
+        # Read-after-write: deferred and queued writes must reach the device first;
+        # after an outage they go out (as the breaker's probe) before the read
+        _await_link()
+        flush()
+    if fresh:
+        _guard_read()
+    shards = list(_SHARDS)
+    # Shard keyboards are read concurrently with the primary one
+    shard_reads = [_shard_reader().submit(sh.read, fresh) for sh in shards]
+    pool = _READ_POOL
+    cols: Optional[np.ndarray] = None
+    if pool is not None:
+        try:
+            cols = _read_via_pool(pool, fresh)
+            _note_link(True)
+        except Exception:
+            cols = None  # channel dropped; fall back to the write connection
+    if cols is None:
+        device = _active_device()
+        if fresh:
+            with _IO_LOCK:
+                _refresh_device_leds(device)
+        cols = _read_device_colors(device)
+    if not barrier:
+        with _TRACK_LOCK:
+            overlay = dict(_INFLIGHT)
+        overlay.update(_FRAME.dirty_items())
+        if overlay:
+            cols = _overlay(cols, overlay)
+    labels: Mapping[str, int] = km.label_to_index
+    if shards:
+        cols, labels = _merge_shard_reads(cols, shards, shard_reads, barrier)
+    # Every read path hands over a fresh array; freeze it for the immutable Snapshot
+    cols.flags.writeable = False
+    snap = Snapshot(
+        array=cols,
+        label_to_index=MappingProxyType(labels),
+        ts=time.perf_counter(),
+    )
+    _publish(snap)
+    return snap
+
+
+def _publish(snap: Snapshot) -> None:
+    # A slower read finishing late must not replace a newer published view
+    global _PUBLISHED
+    with _TRACK_LOCK:
+        if _PUBLISHED is None or snap.ts >= _PUBLISHED.ts:
+            _PUBLISHED = snap
+
+
+def last_snapshot() -> Optional[Snapshot]:
+    """Most recent snapshot() result, without I/O or locks (None before the first read).
+
+    The reference is swapped in whole, so any thread can read it at any
+    time; use `snapshot()` when the value must reflect the latest writes.
+    """
+    return _PUBLISHED
+
+
+def _shard_reader() -> ThreadPoolExecutor:
+    global _SHARD_READS
+    if _SHARD_READS is None:
+        _SHARD_READS = ThreadPoolExecutor(max_workers=4, thread_name_prefix="led-shard-read")
+    return _SHARD_READS
+
+
+def _merge_shard_reads(cols: np.ndarray, shards: List[_Shard], reads: List[Future],
+                       barrier: bool) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Append each shard's colors to `cols` and point its labels at them."""
+    parts = [cols]
+    offset = len(cols)
+    labels = dict(km.label_to_index)
+    for sh, fut in zip(shards, reads):
+        scols = fut.result()
+        if not barrier:
+            with _TRACK_LOCK:
+                overlay = dict(sh.inflight)
+            overlay.update(sh.frame.dirty_items())
+            scols = _overlay(scols, overlay)
+        parts.append(scols)
+        for lab in sh.labels:
+            idx = sh.label_to_index.get(lab)
+            if idx is not None:
+                labels[lab] = offset + idx
+        offset += len(scols)
+    return np.concatenate(parts), labels
+
+
+def get_key_color(label: str, fresh: bool = True, barrier: bool = True) -> List[Tuple[int, int, int]]:
+    """Single-key read. Prefer `snapshot()` when reading several keys."""
+    return [snapshot(fresh=fresh, barrier=barrier)[label]]
+
+
+def set_key_color(label: str, color: RGBColor, debug: bool = False) -> bool:
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+
+    prev = get_key_color(label, fresh=True)[0] if debug else None
+    ok = _stage(label, color)
+    if ok and _frame_depth() == 0:
+        # Enqueue only when the writer runs; reads wait for it
+        ok = flush(wait=False)
+
+    if ok and debug:
+        after = (color.red, color.green, color.blue)
+        print(f"[DEBUG] {label.upper()} {prev} -> {after}")
+    return ok
+
+
+def set_labels_atomic(label_to_color: Dict[str, RGBColor]) -> bool:
+    """Stage several labels and push them together in one frame.
+
+    Inside an open `frame()` the push is deferred to the end of the frame.
+    """
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+
+    try:
+        dbg = _atomic_debug_enabled()
+        _stage_many(label_to_color, dbg)
+        if _frame_depth() > 0:
+            return True
+
+        if not _any_dirty():
             if dbg:
                 try:
-                    mode = 'per-key' if len(changes) <= SMALL_N else 'batch'
-                    print(f"[RGB-ATOMIC] applied; changes={len(changes)} mode={mode}")
+                    print("[RGB-ATOMIC] no-op (no changes)")
                 except Exception:
                     pass
             return True
-        return False
+        return flush(wait=False)
     except Exception as ex:
-        try:
-            import os
-            if str(os.environ.get("RGB_ATOMIC_DEBUG", "")).strip().lower() in ("1", "true", "y", "yes"):
+        if _atomic_debug_enabled():
+            try:
                 print(f"[RGB-ATOMIC] exception: {ex}")
-        except Exception:
-            pass
+            except Exception:
+                pass
         return False
 
+
+def set_labels_async(label_to_color: Dict[str, RGBColor]) -> Future:
+    """Stage several labels and enqueue them; the Future resolves once applied.
+
+    Use this where a caller must know the LEDs are lit before going on
+    (e.g. the bus ACK pulse). Without the writer the push runs inline.
+    """
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+    _stage_many(label_to_color, _atomic_debug_enabled())
+    # Everything dirty so far (even inside a frame) goes out with these labels
+    _commit_local()
+    return _submit_dirty()
+
+
+def snapshot_future(fresh: bool = True) -> Future:
+    """Start a whole-keyboard read without blocking; the Future yields a Snapshot.
+
+    On the asyncio transport the RequestControllerData goes out right behind
+    the queued writes, so the caller can keep working while it is in flight.
+    On the blocking client this degrades to a completed `snapshot()`.
+    """
+    if kb is None or km is None:
+        raise RuntimeError("connect() must be called before using LED functions.")
+    flush(wait=False)
+    device = _active_device()
+    request = getattr(getattr(client, "comms", None), "request_device_data", None)
+    out: Future = Future()
+    if not fresh or request is None or device is None or _SHARDS:
+        try:
+            out.set_result(snapshot(fresh=fresh))
+        except Exception as ex:
+            out.set_exception(ex)
+        return out
+    # Same breaker gate as snapshot(); every outcome below is reported back to it
+    try:
+        _guard_read()
+    except Exception as ex:
+        out.set_exception(ex)
+        return out
+
+    labels = MappingProxyType(km.label_to_index)
+
+    def _issue(_prev: Optional[Future] = None) -> None:
+        try:
+            reply = request(device.id)
+        except Exception as ex:
+            _note_link(False)
+            out.set_exception(ex)
+            return
+
+        def _done(f: Future) -> None:
+            try:
+                data = f.result()
+            except Exception as ex:
+                _note_link(False)
+                out.set_exception(ex)
+                return
+            _note_link(True)
+            try:
+                try:
+                    device._update(data)
+                except Exception:
+                    pass
+                cols = as_color_array(data.colors)
+                cols.flags.writeable = False
+                snap = Snapshot(array=cols, label_to_index=labels, ts=time.perf_counter())
+                _publish(snap)
+                out.set_result(snap)
+            except Exception as ex:
+                out.set_exception(ex)
+
+        reply.add_done_callback(_done)
+
+    # Writes still queued on the background writer must be sent first
+    last = _WRITER.last if _WRITER is not None and _WRITER.is_alive() else None
+    if last is not None and not last.done():
+        last.add_done_callback(_issue)
+    else:
+        _issue()
+    return out
+
+
+async def asnapshot(fresh: bool = True) -> Snapshot:
+    """Awaitable `snapshot()` for asyncio run loops."""
+    return await asyncio.wrap_future(snapshot_future(fresh=fresh))
+
+
+async def aflush() -> bool:
+    """Awaitable `flush()`: enqueue dirty entries and await their completion."""
+    flush(wait=False)
+    last = _WRITER.last if _WRITER is not None and _WRITER.is_alive() else None
+    if last is None:
+        return True
+    return bool(await asyncio.wrap_future(last))
+
+
+async def aset_labels(label_to_color: Dict[str, RGBColor]) -> bool:
+    """Awaitable `set_labels_async()`."""
+    return bool(await asyncio.wrap_future(set_labels_async(label_to_color)))
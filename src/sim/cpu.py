@@ -6,7 +6,7 @@ from queue import Queue, Empty
 
 from utils.keyboard_presets import FLAG_LABELS, BINARY_COLORS
 import utils.color_presets as cp
-from rgb_controller import set_key_color, set_atomic_debug
+from rgb_controller import set_key_color, set_atomic_debug, frame as led_frame, flush as led_flush, set_machine_state
 from utils.stage_indicator import post_stage, clear_stages
 from utils.ir_indicator import update_from_decoded, clear_ir, encode_from_source_line_fixed, set_ir, read_ir
 from utils.ir_indicator import calibrate_ir
@@ -110,6 +110,8 @@ class CPU:
         # ?뚮옒洹? Zero / Negative / oVerflow / Carry
         self.flags: Dict[str, int] = {"Z": 0, "N": 0, "V": 0, "C": 0}
         self._pc_overridden: bool = False
+        # Last IR word (ISA: op4|dst4|arg8; -1 = none), published with the frame
+        self._ir_word: int = -1
 
         self.interactive = interactive                         # ???ㅽ뀦 ?ㅽ뻾 ?뚮옒洹?        self._continue_run = False                             # ??'c' ?낅젰 ??怨꾩냽 吏꾪뻾
         self.use_isa = use_isa                                 # ??ISA 紐⑤뱶 ?ъ슜 ?щ?
@@ -340,6 +342,7 @@ class CPU:
         self.pc.reset()
         self.halted = False
         self.ir.clear()
+        self._ir_word = -1
         self.flags["Z"] = 0
         self.flags["N"] = 0
         self.flags["V"] = 0
@@ -376,10 +379,17 @@ class CPU:
             self._on_halt()
             return False
 
-        if self.use_isa:
-            return self._step_isa()
-        else:
-            return self._step_micro()
+        # One logical LED frame per step: writes are coalesced in the shadow
+        # and pushed at the next readback or when the step ends.
+        try:
+            with led_frame():
+                if self.use_isa:
+                    return self._step_isa()
+                else:
+                    return self._step_micro()
+        finally:
+            # Shared-memory viewers see PC/IR/flags next to the frame (no-op unless publishing)
+            set_machine_state(self.pc.value, self._ir_word, self.flags)
 
     def _step_micro(self) -> bool:
         # Original micro-op per line execution (legacy)
@@ -465,6 +475,7 @@ class CPU:
                 update_pc(cur_pc)
             except Exception:
                 pass
+            self._ir_word = ((insn.op4 & 0xF) << 12) | ((insn.dst4 & 0xF) << 8) | (insn.arg8 & 0xFF)
             try:
                 set_ir(insn.op4, insn.dst4, insn.arg8)
             except Exception:
@@ -530,42 +541,6 @@ class CPU:
             from utils.keyboard_presets import ID_TO_VAR
             return ID_TO_VAR.get(int(v4) & 0xF, 'q')
 
-        # Helper: write group from signed int
-        def _write_u8_to_group(grp: str, u8: int):
-            labels = self._group_labels(grp)
-            u8 &= 0xFF
-            width = len(labels)
-            # Fast path: for RES only, batch-commit to visually latch bits together
-            try:
-                from rgb_controller import is_group_atomic, set_labels_atomic
-                from openrgb.utils import RGBColor
-                if is_group_atomic() and str(grp).upper() == "RES":
-                    payload: Dict[str, RGBColor] = {}
-                    bits_map: Dict[str, int] = {}
-                    for i in range(width):
-                        bit = (u8 >> i) & 1
-                        lab = labels[width - 1 - i]
-                        on_rgb, off_rgb = BINARY_COLORS.get(lab, ((255, 255, 255), (0, 0, 0)))
-                        rgb = on_rgb if bit else off_rgb
-                        payload[lab] = RGBColor(*rgb)
-                        bits_map[lab] = int(bit)
-                    ok = set_labels_atomic(payload)
-                    if not ok:
-                        # Fallback per-bit via memory wrapper
-                        for lab, bit in bits_map.items():
-                            try:
-                                self.mem.set(lab, bit)
-                            except Exception:
-                                pass
-                    return
-            except Exception:
-                pass
-            # Default: sequential per-bit writes
-            for i in range(width):
-                bit = (u8 >> i) & 1
-                lab = labels[width - 1 - i]
-                self.mem.set(lab, bit)
-
         def _read_res_s8() -> int:
             u8 = self._read_u8_from_group("RES")
             return u8 if u8 < 128 else u8 - 256
@@ -579,7 +554,7 @@ class CPU:
         elif op4 == OPCODES["MOVI"]:
             dst = var_name(dst4)
             imm = int(arg8 if arg8 < 128 else arg8 - 256)
-            _write_u8_to_group("SRC1", arg8)
+            self._write_u8_to_group("SRC1", arg8)
             self._on_execute(f"MOVI {dst}, #{imm}")
             # COPY ??PACK
             ch = {}
@@ -879,6 +854,11 @@ class CPU:
             run_off()
         except Exception:
             pass
+        # Make the step's deferred writes visible while waiting for input
+        try:
+            led_flush()
+        except Exception:
+            pass
         # Prompt via stdout and read from the background command queue to avoid
         # nested input() calls fighting for stdin. This makes the prompt appear
         # immediately without needing an extra Enter press.
@@ -1086,7 +1066,10 @@ class CPU:
 
     def _sync_flag_leds(self) -> None:
         """?꾩옱 Z/N/V 媛믪쓣 吏?뺣맂 ??LED??諛섏쁺"""
-        if hasattr(self.mem, "set_flag"):
+        if hasattr(self.mem, "set_flags"):
+            # All flag LEDs change in the same frame
+            self.mem.set_flags({led: bool(self.flags.get(k, 0)) for k, led in FLAG_LABELS.items()})
+        elif hasattr(self.mem, "set_flag"):
             for k, led in FLAG_LABELS.items():
                 self.mem.set_flag(led, bool(self.flags.get(k, 0)))
 
@@ -1129,6 +1112,9 @@ class CPU:
         # Pending request to transition to RUN (avoid PAUSE block overriding RUN LED immediately)
         self._cp_run_requested = False
         while True:
+            # Server hiccup: warm-reconnect and resume from the same CPU state
+            if self._led_link_check():
+                continue
             # Drain any console commands to update LED states immediately
             try:
                 self._drain_cmd_queue()
@@ -1393,6 +1379,7 @@ class CPU:
         self.pc.reset()
         self.halted = False
         self.ir.clear()
+        self._ir_word = -1
         self.flags["Z"] = 0
         self.flags["N"] = 0
         self.flags["V"] = 0
@@ -1559,28 +1546,42 @@ class CPU:
         if g == "RES":  return RES
         raise ValueError(f"unknown bit-group: {grp}")
 
+    def _mem_get_many(self, labels) -> Dict[str, int]:
+        """One snapshot for several keys when the memory supports it."""
+        if hasattr(self.mem, "get_many"):
+            return self.mem.get_many(list(labels))
+        return {lab: self.mem.get(lab) for lab in labels}
+
+    def _mem_set_many(self, values: Dict[str, int]) -> None:
+        """One atomic LED frame for several keys when the memory supports it."""
+        if hasattr(self.mem, "set_many"):
+            self.mem.set_many(values)
+            return
+        for lab, val in values.items():
+            self.mem.set(lab, val)
+
     def _write_u8_to_group(self, grp: str, u8: int):
         labels = self._group_labels(grp)
         u8 &= 0xFF
         width = len(labels)
         # labels[-1]??LSB媛 ?섎룄濡???씤?깆떛
+        bits: Dict[str, int] = {}
         for i in range(width):  # i=0..7 -> 鍮꾪듃 i
-            bit = (u8 >> i) & 1
-            lab = labels[width - 1 - i]
-            self.mem.set(lab, bit)
+            bits[labels[width - 1 - i]] = (u8 >> i) & 1
+        self._mem_set_many(bits)
 
     def _clear_group(self, grp: str):
-        for lab in self._group_labels(grp):
-            self.mem.set(lab, 0)
+        self._mem_set_many({lab: 0 for lab in self._group_labels(grp)})
 
     def _read_u8_from_group(self, grp: str) -> int:
         labels = self._group_labels(grp)
         width = len(labels)
         val = 0
         # labels[-1]??LSB ????씤?깆떛?쇰줈 ?쎌뼱??i踰덉㎏ 鍮꾪듃濡?
+        got = self._mem_get_many(labels)
         for i in range(width):  # i=0..7
             lab = labels[width - 1 - i]
-            val |= (int(self.mem.get(lab)) & 1) << i
+            val |= (int(got[lab]) & 1) << i
         return val & 0xFF
 
     # ---------- ?대? ?ㅽ뻾湲?----------
@@ -1609,6 +1610,40 @@ class CPU:
         except Exception:
             self._cmd_thread = None
 
+    def _led_link_check(self) -> bool:
+        """LED 링크가 끊겼으면 warm reconnect 후 True (루프를 처음부터 다시 돈다).
+
+        마지막 프레임을 다시 밀어 넣으므로 레지스터/변수 LED 상태와 PC가 그대로 이어진다.
+        """
+        try:
+            from rgb_controller import link_lost, link_open, link_stats, reconnect
+            if link_open():
+                # Breaker open: hold the run at the step boundary (no LED traffic) until the cooldown ends
+                st = link_stats()
+                if not getattr(self, "_led_paused", False):
+                    self._led_paused = True
+                    self._println(f"[RUN-LED] LED link failing at PC={self.pc.value} -> paused ({st})")
+                time.sleep(max(0.05, float(st.get("retry_in_s", 0.0) or 0.0)))
+                return True
+            if getattr(self, "_led_paused", False):
+                self._led_paused = False
+                self._println(f"[RUN-LED] LED link probe allowed; resuming at PC={self.pc.value}")
+            if not link_lost():
+                return False
+        except Exception:
+            return False
+        self._println(f"[RUN-LED] LED link lost at PC={self.pc.value} -> warm reconnect")
+        delay = 0.25
+        while True:
+            try:
+                ok = reconnect(warm=True)
+                self._println(f"[RUN-LED] reconnected (frame verified={ok}); resuming at PC={self.pc.value}")
+                return True
+            except Exception as ex:
+                self._println(f"[RUN-LED] reconnect failed: {ex}; retry in {delay:.2f}s")
+                time.sleep(delay)
+                delay = min(5.0, delay * 2)
+
     def _drain_cmd_queue(self) -> None:
         while True:
             try:
@@ -1652,6 +1687,29 @@ class CPU:
             except Exception:
                 pass
             return
+        if s.startswith("settle"):
+            # Usage: settle fixed | settle readback | settle stats
+            try:
+                parts = [p for p in s.split(" ") if p]
+                mode = parts[1] if len(parts) > 1 else "stats"
+            except Exception:
+                mode = "stats"
+            try:
+                from rgb_controller import set_settle_mode, get_settle_mode, settle_stats
+                if mode in ("fixed", "readback"):
+                    set_settle_mode(mode)
+                st = settle_stats()
+                msg = f"[SETTLE] mode={get_settle_mode()} n={int(st.get('n', 0))} timeouts={int(st.get('timeouts', 0))}"
+                if st.get("n"):
+                    msg += (f" mean={st['mean_ms']:.1f}ms p50={st['p50_ms']:.1f}ms"
+                            f" p90={st['p90_ms']:.1f}ms max={st['max_ms']:.1f}ms")
+                self._println(msg)
+            except Exception:
+                try:
+                    self._println("[SETTLE] usage: settle fixed|readback|stats")
+                except Exception:
+                    pass
+            return
         if s in ("c", "run", "r", "continue"):
             # Continuous run request
             self._continue_run = True
@@ -1882,25 +1940,29 @@ class CPU:
                     bus.ack_timeout_ms = max(200, int(getattr(bus, "ack_timeout_ms", 200)))
             except Exception:
                 pass
-            # DataMemory sampling: keep 3 samples, zero inter-sample delay for speed
+            # DataMemory sampling: adaptive (SPRT) up to 5 samples, zero inter-sample delay
             try:
                 if hasattr(mem_core, "_samples"):
-                    setattr(mem_core, "_samples", 3)
+                    setattr(mem_core, "_samples", 5 if hasattr(mem_core, "set_adaptive") else 3)
+                if hasattr(mem_core, "set_adaptive"):
+                    mem_core.set_adaptive(True)
                 if hasattr(mem_core, "_delay"):
                     setattr(mem_core, "_delay", 0)
             except Exception:
                 pass
             # Reduce per-apply settle used by RGB controller (batch/per-key)
             try:
-                from rgb_controller import set_apply_delay_ms, set_group_atomic
+                from rgb_controller import set_apply_delay_ms, set_group_atomic, start_led_writer
                 set_apply_delay_ms(8)
                 # Enable group-atomic register updates for SRC1/SRC2/RES
                 set_group_atomic(True)
+                # Push LED frames from the background writer; reads still wait for it
+                start_led_writer()
             except Exception:
                 pass
             # User-facing summary
             try:
-                msg = "[SPEED] applied FAST_SAFE preset (samples=3, delay=0ms, ack_pulse=10ms, settle=5ms)"
+                msg = "[SPEED] applied FAST_SAFE preset (adaptive samples<=5, delay=0ms, ack_pulse=10ms, settle=5ms, async writer)"
                 self._println(msg)
             except Exception:
                 pass
@@ -1998,14 +2060,12 @@ class CPU:
             src_labels = self._group_labels(str(src))
             dst_labels = self._group_labels(str(dst))
             
-            # 1. Read all bits from source group first
-            bits = []
-            for label in src_labels:
-                bits.append(int(self.mem.get(label)) & 1)
-
-            # 2. Then write all bits to destination group
-            for i, label in enumerate(dst_labels):
-                self.mem.set(label, bits[i])
+            # 1. Read all bits from source group first (one snapshot)
+            got = self._mem_get_many(src_labels)
+            bits = [int(got[label]) & 1 for label in src_labels]
+
+            # 2. Then write all bits to destination group (one frame)
+            self._mem_set_many({label: bits[i] for i, label in enumerate(dst_labels)})
             
             self._on_execute(f"COPYBITS {dst}, {src}")
             return ch
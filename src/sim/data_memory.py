@@ -16,4 +16,13 @@ class DataMemory:
 
     def set(self, name: str, val: int) -> None:
         """입력값을 -128..127로 래핑하여 저장"""
-        self.vars[name] = self._wrap_s8(val)
\ No newline at end of file
+        self.vars[name] = self._wrap_s8(val)
+
+    def get_many(self, names) -> dict[str, int]:
+        """여러 변수를 한 번에 읽기 (LED 메모리와 같은 인터페이스)"""
+        return {name: self.get(name) for name in names}
+
+    def set_many(self, values) -> None:
+        """여러 변수를 한 번에 쓰기"""
+        for name, val in values.items():
+            self.set(name, val)
\ No newline at end of file
@@ -1,9 +1,15 @@
 # sim/data_memory_rgb_visual.py
-from rgb_controller import set_key_color, get_key_color
+from rgb_controller import set_key_color, set_labels_atomic, snapshot, Snapshot
 from openrgb.utils import RGBColor
 from utils.keyboard_presets import VARIABLE_KEYS
+from utils.batch_decode import KeyDecoder, decode_batch
+from utils.adaptive_sampler import SPRTSampler
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+import os
 import time
 
+import numpy as np
+
 # 거리 계산에서 G 채널은 낮은 가중치를 둬서 R/B 악센트 차이를 더 잘 반영
 WG = 0.3  # R,B=1.0, G=0.3
 
@@ -44,27 +50,54 @@ for v in VALS:
     VAL_TO_RGB_LIST.append(rgb)
     RGB_TO_VAL_EXACT[rgb] = v
 
+# 같은 LUT를 배열로: 최근접 탐색을 256행 한 번의 벡터 연산으로
+LUT_RGB = np.array(VAL_TO_RGB_LIST, dtype=np.float64)       # (256, 3)
+LUT_WEIGHTS = np.array([1.0, WG, 1.0], dtype=np.float64)    # G 채널의 가중치는 낮춰서 R/B 차이를 강조
+LUT_VALS = np.array(VALS, dtype=np.int16)
+
+# 양자화 디코드 큐브(64^3 칸, 디스크 캐시 + mmap): 첫 비정확 읽기 때 로드
+# RGB_DECODE_CUBE=0 이면 큐브 없이 256행 정확 탐색만 사용
+_CUBE_BITS = 6
+_CUBE = None
+_CUBE_OFF = os.environ.get("RGB_DECODE_CUBE", "1").strip() == "0"
+
+def _decode_cube():
+    global _CUBE, _CUBE_OFF
+    if _CUBE is None and not _CUBE_OFF:
+        try:
+            from utils.decode_cube import DecodeCube
+            _CUBE = DecodeCube.load_or_build(VAL_TO_RGB_LIST, LUT_WEIGHTS, bits=_CUBE_BITS)
+        except Exception:
+            _CUBE_OFF = True
+    return _CUBE
+
+def _nearest_val_exact(r: int, g: int, b: int) -> int:
+    """256행 가중 거리 탐색 (큐브 밖/모호한 칸 처리용)."""
+    # Same arithmetic as the batch decoder, so both agree on ties (first entry wins)
+    idx, _ = decode_batch((int(r), int(g), int(b)), LUT_RGB, LUT_WEIGHTS)
+    return VALS[int(idx)]
+
 def _nearest_val_from_rgb(r: int, g: int, b: int) -> int:
     """입력(r,g,b) 측정값을 가장 가까운 LUT 인덱스로 매핑."""
     tup = (int(r), int(g), int(b))
     if tup in RGB_TO_VAL_EXACT:
         return RGB_TO_VAL_EXACT[tup]
-
-    best_idx = 0
-    best_d2 = 10**12
-    for i, (rr, gg, bb) in enumerate(VAL_TO_RGB_LIST):
-        dr = r - rr
-        dg = g - gg
-        db = b - bb
-        # G 채널의 가중치는 낮춰서 R/B 차이를 강조
-        d2 = (dr*dr) + (WG * dg*dg) + (db*db)
-        if d2 < best_d2:
-            best_d2 = d2
-            best_idx = i
-    return VALS[best_idx]
+    cube = _CUBE if _CUBE is not None else _decode_cube()
+    if cube is None:
+        return _nearest_val_exact(*tup)
+    i = cube.index(_clamp(tup[0]), _clamp(tup[1]), _clamp(tup[2]))
+    if i == cube.ambiguous:
+        # 칸 안을 결정 경계가 지나감 → 이 칸만 정확 탐색
+        return _nearest_val_exact(*tup)
+    return VALS[i]
 
 class DataMemoryRGBVisual:
-    def __init__(self, *, binary_labels=None, samples: int = 3, sample_delay_ms: int = 0, debug: bool = False) -> None:
+    def __init__(self, *, binary_labels=None, samples: int = 3, sample_delay_ms: int = 0, debug: bool = False,
+                 adaptive: bool = False, noise_sigma: float = 2.0, alpha: float = 1e-3) -> None:
+        """samples: fixed reads per key, or the per-key cap when `adaptive`.
+        adaptive: SPRT sampling (utils.adaptive_sampler) - re-read only keys whose
+        nearest/second-nearest margin is not yet conclusive for `noise_sigma`/`alpha`.
+        """
         self._binary = dict(binary_labels) if binary_labels else {}
         for k in VARIABLE_KEYS:
             if k in self._binary:
@@ -72,24 +105,36 @@ class DataMemoryRGBVisual:
         self._samples = int(samples) if int(samples) >= 1 else 1
         self._delay = int(sample_delay_ms) if int(sample_delay_ms) >= 0 else 0
         self._debug = bool(debug)
+        self._decoders: Dict[Tuple[str, ...], KeyDecoder] = {}
+        self._sampler: Optional[SPRTSampler] = None
+        if adaptive:
+            self.set_adaptive(True, noise_sigma=noise_sigma, alpha=alpha)
+
+    def set_adaptive(self, on: bool, *, noise_sigma: float = 2.0, alpha: float = 1e-3) -> None:
+        """Switch SPRT sampling on/off; `samples` stays the per-key cap."""
+        self._sampler = SPRTSampler(noise_sigma, alpha, max_samples=self._samples) if on else None
+
+    def sample_counts(self) -> Dict[str, Dict[str, float]]:
+        """Per-key sample statistics from adaptive reads (empty when not adaptive)."""
+        return self._sampler.stats() if self._sampler is not None else {}
 
     def _sleep(self):
         if self._delay > 0:
             time.sleep(self._delay / 1000.0)
 
-    def _read_rgb_multi(self, name: str) -> tuple[int, int, int]:
+    def _read_rgb_multi(self, name: str, snap: Optional[Snapshot] = None) -> tuple[int, int, int]:
         """Read RGB multiple times with optional early exit if stable.
-        - Refresh device once, then reuse cached state for subsequent samples in the window.
+        - Refresh device once (one snapshot), then reuse it for subsequent samples in the window.
         - If the first two samples are very close, skip remaining samples to save time.
         """
         rs = gs = bs = 0
         n = max(1, self._samples)
         prev: tuple[int, int, int] | None = None
-        fresh = True
+        if snap is None:
+            snap = snapshot()
         taken = 0
         for i in range(n):
-            r, g, b = get_key_color(name, fresh=fresh)[0]
-            fresh = False  # avoid repeated full-device refreshes within the same read window
+            r, g, b = snap[name]
             rs += int(r); gs += int(g); bs += int(b)
             taken += 1
             # Early-exit: if two consecutive samples are nearly identical, stop
@@ -105,20 +150,24 @@ class DataMemoryRGBVisual:
             return (0, 0, 0)
         return (rs // taken, gs // taken, bs // taken)
 
-    def get(self, name: str) -> int:
+    def get(self, name: str, snap: Optional[Snapshot] = None) -> int:
+        """Decode one key. Pass `snap` to decode from an existing snapshot."""
+        if self._sampler is not None:
+            return self.get_many([name], snap)[name]
         if name in self._binary:
             # Majority vote over multiple samples for robust bit read
             on_rgb, off_rgb = self._binary[name]
             def d2(px, py):
                 dr, dg, db = px[0]-py[0], px[1]-py[1], px[2]-py[2]
-                return (dr*dr) + (WG*dg*dg) + (db*db)
+                # Same term order/rounding as decode_batch, so exact ties resolve identically on both paths
+                return (dr*dr) + (dg*dg*WG) + (db*db)
             votes_on = 0
             votes_off = 0
             n = max(1, self._samples)
-            fresh = True
+            if snap is None:
+                snap = snapshot()  # refresh once at the start
             for i in range(n):
-                r, g, b = get_key_color(name, fresh=fresh)[0]
-                fresh = False  # refresh once at the start
+                r, g, b = snap[name]
                 if d2((r,g,b), on_rgb) <= d2((r,g,b), off_rgb):
                     votes_on += 1
                 else:
@@ -132,26 +181,84 @@ class DataMemoryRGBVisual:
                 print(f"[RGBMem] get-bit {name}: on={votes_on} off={votes_off} -> {bit}")
             return bit
         # For numeric variables, average RGB and map to nearest LUT color
-        r, g, b = self._read_rgb_multi(name)
+        r, g, b = self._read_rgb_multi(name, snap)
         v = _nearest_val_from_rgb(r, g, b)
         val = _wrap_s8(v)
         if self._debug:
             print(f"[RGBMem] get-val {name}: avg=({r},{g},{b}) -> {val}")
         return val
 
-    def set(self, name: str, val: int) -> None:
+    def decoder(self, names: Sequence[str]) -> KeyDecoder:
+        """Packed palettes for `names` (binary on/off or the value LUT), built once per name list."""
+        key = tuple(names)
+        dec = self._decoders.get(key)
+        if dec is None:
+            palettes = {}
+            symbols = {}
+            weights = {}
+            for name in key:
+                if name in self._binary:
+                    # (on, off): 'on' wins a tie, like get()'s '<=' vote
+                    on_rgb, off_rgb = self._binary[name]
+                    palettes[name] = [on_rgb, off_rgb]
+                    symbols[name] = [1, 0]
+                else:
+                    palettes[name] = VAL_TO_RGB_LIST
+                    symbols[name] = VALS
+                weights[name] = (1.0, WG, 1.0)
+            dec = self._decoders[key] = KeyDecoder(palettes, symbols, weights)
+        return dec
+
+    def decode_colors(self, names: Sequence[str], colors) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode sampled colors (N x 3, in `names` order) in one vectorized pass.
+
+        Returns (values, margins): bits for binary keys, signed values for variables.
+        """
+        return self.decoder(names).decode(colors)
+
+    def get_many(self, names: Sequence[str], snap: Optional[Snapshot] = None) -> Dict[str, int]:
+        """Decode several keys from one snapshot (one refresh, one vectorized decode)."""
+        names = list(names)
+        if not names:
+            return {}
+        dec = self.decoder(names)
+        if self._sampler is not None:
+            # `snap` (if given) is the first sample; undecided keys get fresh ones
+            vals, _, n = self._sampler.sample(dec, snapshot, first=snap, between=self._sleep)
+        else:
+            if snap is None:
+                snap = snapshot()
+            vals, _ = dec.decode_snapshot(snap)
+            n = None
+        out = dict(zip(names, vals.tolist()))
+        if self._debug:
+            extra = f" samples={dict(zip(names, n.tolist()))}" if n is not None else ""
+            print(f"[RGBMem] get-many {out}{extra}")
+        return out
+
+    def _color_of(self, name: str, val: int) -> Tuple[int, int, int]:
         if name in self._binary:
             on_rgb, off_rgb = self._binary[name]
-            tgt = on_rgb if int(val) != 0 else off_rgb
-            set_key_color(name, RGBColor(*tgt))
+            return on_rgb if int(val) != 0 else off_rgb
+        return VAL_TO_RGB_LIST[_wrap_s8(val) + 128]
+
+    def set(self, name: str, val: int) -> None:
+        set_key_color(name, RGBColor(*self._color_of(name, val)))
+
+    def set_many(self, values: Mapping[str, int]) -> None:
+        """Write several keys in one atomic frame (falls back to per-key writes)."""
+        if not values:
             return
-        v = _wrap_s8(val)
-        idx = v - (-128)
-        r, g, b = VAL_TO_RGB_LIST[idx]
-        set_key_color(name, RGBColor(r, g, b))
+        payload = {name: RGBColor(*self._color_of(name, val)) for name, val in values.items()}
+        if not set_labels_atomic(payload):
+            for name, col in payload.items():
+                set_key_color(name, col)
 
     def set_flag(self, label: str, on: bool) -> None:
         self.set(label, 1 if on else 0)
 
+    def set_flags(self, flags: Mapping[str, bool]) -> None:
+        self.set_many({label: 1 if on else 0 for label, on in flags.items()})
+
     def get_flag(self, label: str) -> bool:
         return bool(self.get(label))
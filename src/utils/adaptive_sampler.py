@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+"""
+적응형 LED 읽기 샘플링 (순차 확률비 검정, SPRT)
+
+키마다 고정 횟수를 읽는 대신, 지금까지 읽은 색의 평균으로 1등/2등 팔레트 항목을 고르고
+두 후보 사이 로그 우도비가 신뢰 경계를 넘으면 그 키는 바로 확정한다.
+애매한 키만 스냅샷을 더 읽는다 → 깨끗한 키는 1회, 잡음 많은 키는 max_samples까지.
+
+잡음 모델: 채널마다 표준편차 sigma인 가우시안(디코더 가중치 적용 거리 기준).
+평균 색 m, 샘플 n개일 때 두 후보의 로그 우도비는
+    LLR = n * (d_2등(m) - d_1등(m)) / (2 sigma^2) = n * margin / (2 sigma^2)
+LLR >= ln((1 - alpha) / alpha) 이면 확정 (alpha: 허용 오판 확률).
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.batch_decode import KeyDecoder
+
+
+class SPRTSampler:
+    """Adaptive sampler: extra snapshots only for keys whose decision is not yet confident."""
+
+    def __init__(self, sigma: float = 2.0, alpha: float = 1e-3, max_samples: int = 5) -> None:
+        self.sigma = max(1e-6, float(sigma))
+        self.alpha = min(0.5, max(1e-12, float(alpha)))
+        self.max_samples = max(1, int(max_samples))
+        self.threshold = math.log((1.0 - self.alpha) / self.alpha)
+        self._scale = 1.0 / (2.0 * self.sigma * self.sigma)
+        self._lock = threading.Lock()
+        # label -> [decodes, samples, decodes that hit max_samples undecided]
+        self._counts: Dict[str, list] = {}
+
+    def confident(self, n: int, margin: float) -> bool:
+        return n * margin * self._scale >= self.threshold
+
+    def sample(self, decoder: KeyDecoder, read: Callable[[], object], first: Optional[object] = None,
+               between: Optional[Callable[[], None]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Decode every key of `decoder`, reading more snapshots only for undecided keys.
+
+        read    : returns a fresh Snapshot
+        first   : an already taken Snapshot to use as the first sample
+        between : called before each extra read (e.g. an inter-sample delay)
+        Returns (symbols, margins, samples per key).
+        """
+        snap = first if first is not None else read()
+        acc = decoder.gather(snap).astype(np.int64)
+        n = np.ones(len(decoder), dtype=np.int64)
+        syms, margins = decoder.decode(acc)
+        pending = margins * self._scale < self.threshold
+        for _ in range(self.max_samples - 1):
+            if not pending.any():
+                break
+            if between is not None:
+                between()
+            # Only undecided keys take the new sample; decided ones keep their verdict
+            fresh = decoder.gather(read()).astype(np.int64)
+            acc[pending] += fresh[pending]
+            n[pending] += 1
+            s2, m2 = decoder.decode(acc / n[:, None])
+            syms = np.where(pending, s2, syms)
+            margins = np.where(pending, m2, margins)
+            pending &= n * margins * self._scale < self.threshold
+        self._record(decoder.labels, n, pending)
+        return syms, margins, n
+
+    def _record(self, labels, n: np.ndarray, undecided: np.ndarray) -> None:
+        with self._lock:
+            for lab, k, u in zip(labels, n.tolist(), undecided.tolist()):
+                c = self._counts.get(lab)
+                if c is None:
+                    c = self._counts[lab] = [0, 0, 0]
+                c[0] += 1
+                c[1] += k
+                c[2] += int(u)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per key: decodes, total samples, mean samples per decode, decodes left undecided at the cap."""
+        with self._lock:
+            return {
+                lab: {"decodes": c[0], "samples": c[1], "mean": round(c[1] / c[0], 3) if c[0] else 0.0,
+                      "capped": c[2]}
+                for lab, c in self._counts.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counts.clear()
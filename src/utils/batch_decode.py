@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+"""
+벡터화 색 디코딩: 키 N개의 샘플 색 (N×3) + 키별 팔레트 → 기호/여유(margin) 한 번에
+
+- decode_batch : 가장 가까운 팔레트 항목 인덱스와 margin(2등 거리 - 1등 거리)을 NumPy 한 번으로
+- KeyDecoder   : 라벨별 팔레트/기호/채널 가중치를 미리 배열로 묶어 두고(같은 팔레트끼리 한 그룹)
+                 스냅샷(들)에서 바로 디코딩 (샘플 S개면 (S, N) 결과)
+
+동률은 팔레트의 앞쪽 항목이 이긴다 (기존 '<' 순차 탐색과 같은 규칙).
+margin이 작을수록 판정이 불안정하다 (팔레트 항목이 1개뿐이면 inf).
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+RGB = Tuple[int, int, int]
+
+
+def decode_batch(colors: np.ndarray, palettes: np.ndarray, weights: Optional[np.ndarray] = None,
+                 sizes: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest palette entry per color.
+
+    colors   : (..., 3) sampled colors
+    palettes : (..., K, 3) candidates, broadcast against `colors` (a single (K, 3) is shared)
+    weights  : (3,) or (..., 3) per-channel weights on squared differences
+    sizes    : (...,) valid entries per palette; entries at or past it are padding
+    Returns (index, margin): int index into the palette and the second-best minus best distance.
+    """
+    c = np.asarray(colors, dtype=np.float64)
+    pal = np.asarray(palettes, dtype=np.float64)
+    d = pal - c[..., None, :]
+    d *= d
+    if weights is not None:
+        d *= np.asarray(weights, dtype=np.float64)[..., None, :]
+    dist = d.sum(axis=-1)
+    k = dist.shape[-1]
+    if sizes is not None:
+        dist = np.where(np.arange(k) >= np.asarray(sizes)[..., None], np.inf, dist)
+    best = np.argmin(dist, axis=-1)
+    lo = np.take_along_axis(dist, best[..., None], axis=-1)
+    if k < 2:
+        return best, np.full(best.shape, np.inf)
+    np.put_along_axis(dist, best[..., None], np.inf, axis=-1)
+    margin = dist.min(axis=-1) - lo[..., 0]
+    return best, margin
+
+
+class KeyDecoder:
+    """Per-key palettes packed once; decodes every key's sampled color in one call.
+
+    Keys with the same large palette share one (K, 3) table, so a 256-entry
+    value LUT is not copied per key. All small palettes (on/off pairs,
+    control-key states) are padded into one per-key table. Each table is a
+    single decode_batch call.
+    """
+
+    SHARED_MIN_K = 16
+
+    def __init__(self, palettes: Mapping[str, Sequence[RGB]],
+                 symbols: Optional[Mapping[str, Sequence[Any]]] = None,
+                 weights: Optional[Mapping[str, Sequence[float]]] = None) -> None:
+        self.labels: Tuple[str, ...] = tuple(palettes)
+        groups: Dict[Tuple[Any, ...], List[int]] = {}
+        for i, lab in enumerate(self.labels):
+            pal = tuple(tuple(int(v) for v in rgb) for rgb in palettes[lab])
+            if not pal:
+                raise ValueError(f"Empty palette for '{lab}'")
+            sym = tuple(symbols[lab]) if symbols is not None and lab in symbols else tuple(range(len(pal)))
+            if len(sym) != len(pal):
+                raise ValueError(f"'{lab}': {len(sym)} symbols for {len(pal)} colors")
+            w = tuple(float(x) for x in weights[lab]) if weights is not None and lab in weights else (1.0, 1.0, 1.0)
+            groups.setdefault((pal, sym, w), []).append(i)
+        # (rows, palette, weights, sizes, symbols): shared (K, 3)/(3,)/None/(K,)
+        # or per key (M, K, 3)/(M, 3)/(M,)/(M, K)
+        self._groups: List[Tuple[Any, ...]] = []
+        small = []
+        for (pal, sym, w), rows in groups.items():
+            if len(pal) >= self.SHARED_MIN_K:
+                self._groups.append((np.array(rows, dtype=np.intp), np.array(pal, dtype=np.float64),
+                                     np.array(w, dtype=np.float64), None, np.array(sym)))
+            else:
+                small.extend((i, pal, sym, w) for i in rows)
+        if small:
+            small.sort()
+            k = max(len(pal) for _, pal, _, _ in small)
+            pals = np.zeros((len(small), k, 3), dtype=np.float64)
+            for j, (_, pal, _, _) in enumerate(small):
+                pals[j, :len(pal)] = pal
+            self._groups.append((
+                np.array([i for i, _, _, _ in small], dtype=np.intp), pals,
+                np.array([w for _, _, _, w in small], dtype=np.float64),
+                np.array([len(pal) for _, pal, _, _ in small], dtype=np.intp),
+                np.array([sym + (sym[0],) * (k - len(sym)) for _, _, sym, _ in small]),
+            ))
+        kinds = {g[4].dtype.kind for g in self._groups}
+        self._sym_dtype = self._groups[0][4].dtype if len(kinds) == 1 and "U" not in kinds else object
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def decode(self, colors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """`colors`: (N, 3) or (S, N, 3) in `labels` order -> (symbols, margins) of shape (N,) / (S, N)."""
+        c = np.asarray(colors)
+        lead = c.shape[:-1]
+        out = np.empty(lead, dtype=self._sym_dtype)
+        margins = np.empty(lead, dtype=np.float64)
+        for rows, pal, w, sizes, sym in self._groups:
+            idx, margin = decode_batch(c[..., rows, :], pal, w, sizes)
+            out[..., rows] = sym[idx] if sizes is None else sym[np.arange(len(rows)), idx]
+            margins[..., rows] = margin
+        return out, margins
+
+    def gather(self, snaps) -> np.ndarray:
+        """(N, 3) colors from one snapshot, or (S, N, 3) from a sequence of snapshots."""
+        if hasattr(snaps, "array"):
+            return snaps.array[[snaps.label_to_index[lab.lower()] for lab in self.labels]]
+        return np.stack([self.gather(s) for s in snaps])
+
+    def decode_snapshot(self, snaps) -> Tuple[np.ndarray, np.ndarray]:
+        return self.decode(self.gather(snaps))
@@ -1,6 +1,6 @@
 from typing import Sequence, List, Tuple
 from openrgb.utils import RGBColor
-from rgb_controller import set_key_color, get_key_color  # 기존 공개 API 재사용
+from rgb_controller import set_key_color, snapshot  # 기존 공개 API 재사용
 import utils.color_presets as cp
 
 def _value_to_bits_lsb(n: int, width: int) -> List[int]:
@@ -90,10 +90,10 @@ def get_group_value(
     bits_lsb: List[int] = []
     on_labels: List[str] = []
 
-    for idx, lab in enumerate(order):
-        # Refresh device at most once per group read to reduce overhead
-        do_fresh = bool(fresh) and (idx == 0)
-        (r, g, b) = get_key_color(lab, fresh=do_fresh)[0]  # (R,G,B)
+    # One refresh (snapshot) covers the whole group
+    snap = snapshot(fresh=bool(fresh))
+    for lab in order:
+        (r, g, b) = snap[lab]  # (R,G,B)
         on = ((r + g + b) / 3.0) >= threshold
         bit = 1 if on else 0
         bits_lsb.append(bit)
@@ -19,10 +19,11 @@ LED-bus handshake utilities
 - 변수 키(VARIABLE_KEYS)에 한해 핸드셰이크를 적용하여 과도한 토글을 방지.
 """
 
-from typing import Dict, Tuple, Any
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 import time
 from openrgb.utils import RGBColor
-from rgb_controller import set_labels_atomic, set_key_color, get_key_color
+from utils import poll_clock
+from rgb_controller import set_labels_atomic, set_labels_async, set_key_color, get_key_color
 from utils.keyboard_presets import (
     BINARY_COLORS,
     VARIABLE_KEYS,
@@ -47,7 +48,9 @@ def _dist2(a: Tuple[int, int, int], b: Tuple[int, int, int]) -> int:
 
 def _read_bool(label: str) -> bool:
     on_rgb, off_rgb = _on_off(label)
-    r, g, b = get_key_color(label, fresh=True)[0]
+    # 핸드셰이크는 장치의 실제 상태를 봐야 한다: barrier=False는 대기/실패한 쓰기를
+    # 섀도에서 덧씌워 보여 주므로, 실패한 ACK 쓰기도 "켜짐"으로 읽힌다
+    r, g, b = get_key_color(label, fresh=True, barrier=True)[0]
     cur = (int(r), int(g), int(b))
     return _dist2(cur, on_rgb) <= _dist2(cur, off_rgb)
 
@@ -87,12 +90,15 @@ class BusInterface:
         # Note: set_labels_atomic/set_key_color already include an apply delay;
         # avoid double-sleep here to reduce cycle latency safely.
 
-    def _ack_on(self) -> None:
+    def _ack_on(self) -> bool:
+        """Light the ACK LED; False if the write failed or did not finish in ack_timeout_ms."""
         on_rgb, _ = _on_off(BUS_ACK)
         try:
-            set_key_color(BUS_ACK, RGBColor(*on_rgb))
+            # ACK 펄스는 LED가 실제로 켜진 뒤부터 잰다 (백그라운드 writer 완료 대기)
+            fut = set_labels_async({BUS_ACK: RGBColor(*on_rgb)})
+            return bool(fut.result(timeout=max(0.05, self.ack_timeout_ms / 1000.0)))
         except Exception:
-            pass
+            return False
 
     def _ack_off(self) -> None:
         _, off_rgb = _on_off(BUS_ACK)
@@ -103,11 +109,11 @@ class BusInterface:
 
     def _wait_ack(self, timeout_ms: int | None = None) -> bool:
         limit = self.ack_timeout_ms if timeout_ms is None else max(1, int(timeout_ms))
-        deadline = time.time() + (limit / 1000.0)
-        while time.time() < deadline:
+        deadline = poll_clock.now() + (limit / 1000.0)
+        while poll_clock.now() < deadline:
             if _read_bool(BUS_ACK):
                 return True
-            time.sleep(0.005)
+            poll_clock.sleep(0.005)
         return False
 
     # --- public API ---
@@ -128,9 +134,11 @@ class BusInterface:
     def handshake(self) -> bool:
         mode = (self.ack_mode or "internal").lower()
         if mode == "internal":
-            self._ack_on()
-            time.sleep(self.ack_pulse_ms / 1000.0)
-            ok = _read_bool(BUS_ACK)
+            # ACK 쓰기 자체가 실패/시간 초과면 읽어 볼 것도 없이 실패
+            ok = self._ack_on()
+            if ok:
+                time.sleep(self.ack_pulse_ms / 1000.0)
+                ok = _read_bool(BUS_ACK)
             self._ack_off()
             return ok
         elif mode == "external":
@@ -139,9 +147,10 @@ class BusInterface:
             if self._wait_ack(int(self.ack_timeout_ms * 0.4)):
                 return True
             # fallback to internal
-            self._ack_on()
-            time.sleep(self.ack_pulse_ms / 1000.0)
-            ok = _read_bool(BUS_ACK)
+            ok = self._ack_on()
+            if ok:
+                time.sleep(self.ack_pulse_ms / 1000.0)
+                ok = _read_bool(BUS_ACK)
             self._ack_off()
             return ok
 
@@ -253,12 +262,84 @@ class BusMemory:
             return
         self._inner.set(name, val)
 
+    def _batch_cycle(self, write: bool, names: List[str], values: Mapping[str, int] | None = None) -> int:
+        """One handshake covering a whole batch; returns latency (ms) or raises like get/set."""
+        t0 = time.time()
+        if write:
+            self._bus.begin_write()
+        else:
+            self._bus.begin_read()
+        try:
+            ok = self._bus.handshake()
+        finally:
+            self._bus.end_cycle()
+        lat_ms = int((time.time() - t0) * 1000.0)
+        if not ok:
+            try:
+                from utils.control_plane import set_run_state
+                set_run_state("FAULT")
+            except Exception:
+                pass
+            direction = "WRITE" if write else "READ"
+            for name in names:
+                try:
+                    if self._sink is not None and hasattr(self._sink, "on_bus_mem_event"):
+                        val = values.get(name) if values is not None else None
+                        ev = {"dir": direction, "name": str(name), "value": val, "lat_ms": lat_ms, "error": "ACK_FAIL"}
+                        self._sink.on_bus_mem_event(ev)
+                except Exception:
+                    pass
+            raise Exception(f"BUS_ACK_FAIL_{direction}")
+        return lat_ms
+
+    def _emit_batch(self, direction: str, values: Mapping[str, int], lat_ms: int) -> None:
+        for name, val in values.items():
+            try:
+                if self._sink is not None and hasattr(self._sink, "on_bus_mem_event"):
+                    ev = {"dir": direction, "name": str(name), "value": val, "lat_ms": lat_ms}
+                    self._sink.on_bus_mem_event(ev)
+            except Exception:
+                pass
+
+    def get_many(self, names: Sequence[str]) -> Dict[str, int]:
+        """Read several keys from one snapshot; variable keys share one bus read cycle."""
+        names = list(names)
+        mem_vars = [n for n in names if self._is_mem_var(n)]
+        lat_ms = self._batch_cycle(False, mem_vars) if mem_vars else 0
+        if hasattr(self._inner, "get_many"):
+            out = dict(self._inner.get_many(names))
+        else:
+            out = {n: self._inner.get(n) for n in names}
+        if mem_vars:
+            self._emit_batch("READ", {n: out[n] for n in mem_vars}, lat_ms)
+        return out
+
+    def set_many(self, values: Mapping[str, int]) -> None:
+        """Write several keys in one atomic frame; variable keys share one bus write cycle."""
+        mem_vars = [n for n in values if self._is_mem_var(n)]
+        lat_ms = self._batch_cycle(True, mem_vars, values) if mem_vars else 0
+        if hasattr(self._inner, "set_many"):
+            self._inner.set_many(values)
+        else:
+            for n, v in values.items():
+                self._inner.set(n, v)
+        if mem_vars:
+            self._emit_batch("WRITE", {n: values[n] for n in mem_vars}, lat_ms)
+
     # Optional helpers used by CPU/DataMemoryRGBVisual
     def set_flag(self, label: str, on: bool) -> None:
         # 플래그 업데이트에는 버스 강제 적용하지 않음 (시각 신호)
         if hasattr(self._inner, "set_flag"):
             self._inner.set_flag(label, on)
 
+    def set_flags(self, flags: Mapping[str, bool]) -> None:
+        # 여러 플래그를 한 프레임에 (버스 미적용)
+        if hasattr(self._inner, "set_many"):
+            self._inner.set_many({label: 1 if on else 0 for label, on in flags.items()})
+            return
+        for label, on in flags.items():
+            self.set_flag(label, on)
+
     def get_flag(self, label: str) -> bool:
         if hasattr(self._inner, "get_flag"):
             return bool(self._inner.get_flag(label))
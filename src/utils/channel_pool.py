@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+"""
+OpenRGB 읽기 전용 연결 풀
+
+쓰기(프레임 flush)와 읽기(리드백 폴링)가 같은 소켓을 쓰면 서로 줄을 서게 된다.
+읽기 전용 연결을 N개 따로 열어 두고, 읽기 호출은 비어 있는 채널을 골라 쓴다.
+- 채널마다 락 하나 (한 소켓에서 요청/응답이 섞이지 않도록)
+- I/O 오류가 난 채널은 닫고 다음 사용 시 다시 연다
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+
+class _Channel:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.client: Any = None
+        self.device: Any = None
+
+
+class ReadChannelPool:
+    """N dedicated OpenRGB connections used only for readback."""
+
+    def __init__(self, factory: Callable[[], Any], size: int = 1,
+                 device_type: str = "keyboard", device_index: Optional[int] = None) -> None:
+        self._factory = factory
+        self._device_type = str(device_type).lower()
+        self._device_index = device_index
+        self._channels: List[_Channel] = [_Channel() for _ in range(max(1, int(size)))]
+        self._rr = 0
+        self._rr_lock = threading.Lock()
+        self.reads: int = 0
+        self.reopens: int = 0
+        # Open eagerly so connect() fails fast on a bad server
+        for ch in self._channels:
+            self._open(ch)
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def _open(self, ch: _Channel) -> None:
+        ch.client = self._factory()
+        devices = getattr(ch.client, "devices", None) or ch.client.get_devices()
+        dev = None
+        if self._device_index is not None:
+            try:
+                dev = devices[self._device_index]
+            except Exception:
+                dev = None
+        if dev is None:
+            for d in devices or []:
+                if d is not None and str(getattr(d.type, "name", str(d.type))).lower() == self._device_type:
+                    dev = d
+                    break
+        if dev is None:
+            raise RuntimeError("read channel: keyboard device not found")
+        ch.device = dev
+
+    def _close(self, ch: _Channel) -> None:
+        try:
+            if ch.client is not None:
+                ch.client.disconnect()
+        except Exception:
+            pass
+        ch.client = None
+        ch.device = None
+
+    def close(self) -> None:
+        for ch in self._channels:
+            with ch.lock:
+                self._close(ch)
+
+    def _pick(self) -> _Channel:
+        # Prefer an idle channel; otherwise queue on the next one round-robin
+        for ch in self._channels:
+            if not ch.lock.locked():
+                return ch
+        with self._rr_lock:
+            self._rr = (self._rr + 1) % len(self._channels)
+            return self._channels[self._rr]
+
+    @contextmanager
+    def device(self) -> Iterator[Any]:
+        """Borrow one channel's device handle exclusively for a read."""
+        ch = self._pick()
+        with ch.lock:
+            if ch.device is None:
+                self._open(ch)
+                self.reopens += 1
+            try:
+                yield ch.device
+                self.reads += 1
+            except Exception:
+                # Drop the connection; it is reopened on next use
+                self._close(ch)
+                raise
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+"""
+LED 전송 보호: 서킷 브레이커 + 재시도 예산
+
+서버가 느리거나 실패할 때 키 단위 폴백/무한 재시도로 트래픽을 키우지 않도록
+- RetryPolicy     : 호출당 시도 횟수 상한 + 지수 백오프 + 초당 재시도 토큰 버킷(전역 예산)
+- CircuitBreaker  : 연속 실패 fail_threshold 번이면 OPEN → cooldown 동안 장치 I/O 거절
+                    → HALF_OPEN 에서 시험 호출 1개만 통과, 성공하면 CLOSED / 실패하면 다시 OPEN
+두 객체 모두 스레드 안전하며 stats()로 모니터링 카운터를 돌려준다.
+"""
+
+import threading
+import time
+from typing import Dict
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class LinkDown(RuntimeError):
+    """Device I/O refused because the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a cooldown and a single half-open probe."""
+
+    def __init__(self, fail_threshold: int = 5, cooldown_s: float = 1.0) -> None:
+        self.fail_threshold = max(1, int(fail_threshold))
+        self.cooldown_s = max(0.0, float(cooldown_s))
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._fails = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.successes = 0
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._tick(time.perf_counter())
+            return self._state
+
+    def _tick(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.cooldown_s:
+            self._state = HALF_OPEN
+            self._probing = False
+
+    def allow(self) -> bool:
+        """True if a device call may go out now (counts refusals)."""
+        with self._lock:
+            self._tick(time.perf_counter())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probing:
+                # Exactly one trial call; everyone else waits for its verdict
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.successes += 1
+                self._fails = 0
+                self._state = CLOSED
+                self._probing = False
+                return
+            self.failures += 1
+            if self._state == OPEN:
+                # Calls refused while open do not extend the cooldown
+                return
+            self._fails += 1
+            if self._state == HALF_OPEN or self._fails >= self.fail_threshold:
+                self.trips += 1
+                self._state = OPEN
+                self._opened_at = time.perf_counter()
+                self._probing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._fails = 0
+            self._probing = False
+
+    def retry_in(self) -> float:
+        """Seconds until the next trial call is allowed (0 when not open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown_s - (time.perf_counter() - self._opened_at))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            self._tick(time.perf_counter())
+            return {
+                "state": self._state,
+                "consecutive_failures": self._fails,
+                "successes": self.successes,
+                "failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class RetryPolicy:
+    """Bounded retries: per-call attempts, exponential backoff, global token budget."""
+
+    def __init__(self, attempts: int = 2, base_ms: float = 10.0, max_ms: float = 200.0,
+                 budget_per_s: float = 5.0, burst: int = 10) -> None:
+        self.attempts = max(1, int(attempts))
+        self.base_ms = max(0.0, float(base_ms))
+        self.max_ms = max(self.base_ms, float(max_ms))
+        self.budget_per_s = max(0.0, float(budget_per_s))
+        self.burst = max(0, int(burst))
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last = time.perf_counter()
+        self.retries = 0
+        self.exhausted = 0
+
+    def backoff_s(self, attempt: int) -> float:
+        return min(self.max_ms, self.base_ms * (2 ** max(0, int(attempt)))) / 1000.0
+
+    def take(self) -> bool:
+        """Spend one retry token; False when the budget is used up (no retry)."""
+        with self._lock:
+            now = time.perf_counter()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.budget_per_s)
+            self._last = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.retries += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"retries": self.retries, "budget_exhausted": self.exhausted,
+                    "tokens": round(self._tokens, 2)}
@@ -19,9 +19,10 @@ from dataclasses import dataclass
 from typing import Dict, Tuple, Literal, Any
 import time
 
-from rgb_controller import get_key_color, set_key_color
+from rgb_controller import get_key_color, set_key_color, snapshot, Snapshot
 import utils.color_presets as cp
 from utils.ir_indicator import calibrate_ir
+from utils.batch_decode import KeyDecoder
 from utils.keyboard_presets import (
     RUN_PAUSE_LABEL,
     KEY_ESC_LABEL,
@@ -117,8 +118,8 @@ def _push_hist(label: str, rgb: Tuple[int, int, int], keep: int = 6) -> None:
     _HIST[label] = arr
 
 
-def _read_rgb(label: str) -> Tuple[int, int, int]:
-    r, g, b = get_key_color(label, fresh=True)[0]
+def _read_rgb(label: str, snap: Snapshot | None = None) -> Tuple[int, int, int]:
+    r, g, b = snap[label] if snap is not None else get_key_color(label, fresh=True)[0]
     rgb = (int(r), int(g), int(b))
     _push_hist(label, rgb)
     return rgb
@@ -174,77 +175,65 @@ def _off_color(label: str) -> Tuple[int, int, int]:
     return _OFF_COLORS.get(label, _PALETTE["OFF_BLACK"])  # fallback to black
 
 
+# Candidate colors per control key (order matters: the first of equal distances wins)
+_POLL_CANDIDATES: Dict[str, Dict[str, Tuple[int, int, int]]] = {
+    RUN_PAUSE_LABEL: {
+        "RUN": _PALETTE["RUN"],
+        "PAUSE": _PALETTE["PAUSE"],
+        # Use dim per-key OFF tint for classification
+        "OFF": _off_color(RUN_PAUSE_LABEL),
+        "HALT": _PALETTE["HALT"],
+    },
+    KEY_ESC_LABEL: {
+        "EHALT": _PALETTE["EHALT"],
+        "R_HARD": _PALETTE["R_HARD"],
+        "R_SOFT": _PALETTE["R_SOFT"],
+        "NONE": _off_color(KEY_ESC_LABEL),
+    },
+    KEY_TAB_LABEL: {"INSTR": _PALETTE["INSTR"], "MICRO": _PALETTE["MICRO"], "CONT": _off_color(KEY_TAB_LABEL)},
+    KEY_CAPS_LABEL: {"ON": _PALETTE["TRACE"], "MARK": _PALETTE["MARK"], "OFF": _off_color(KEY_CAPS_LABEL)},
+    KEY_LSHIFT_LABEL: {
+        "ALU": _PALETTE["ALU"],
+        "IRPC": _PALETTE["IRPC"],
+        "BUS": _PALETTE["BUS"],
+        "SERVICE": _PALETTE["SERVICE"],
+        "NONE": _off_color(KEY_LSHIFT_LABEL),
+    },
+}
+_POLL_DECODER = KeyDecoder(
+    {lab: list(c.values()) for lab, c in _POLL_CANDIDATES.items()},
+    {lab: list(c) for lab, c in _POLL_CANDIDATES.items()},
+)
+
+
 def poll() -> ControlStates:
-    """Sample keys and classify their states into enums."""
+    """Sample keys and classify their states into enums.
+
+    All five control keys are decoded from a single device refresh.
+    """
     st = ControlStates()
+    # Polling need not wait for queued indicator frames; own writes are overlaid
+    snap = snapshot(barrier=False)
+
+    # Record the samples (history drives smoothing and blink detection)
+    latest = {lab: _read_rgb(lab, snap) for lab in _POLL_DECODER.labels}
+    # ESC is classified from the latest sample (edge sensitivity); the other
+    # keys from the smoothed average. All five are decoded in one pass.
+    cols = [latest[lab] if lab == KEY_ESC_LABEL else _avg_recent_rgb(lab, n=3) for lab in _POLL_DECODER.labels]
+    sel = dict(zip(_POLL_DECODER.labels, _POLL_DECODER.decode(cols)[0].tolist()))
 
     # --- grave ---
-    rgb_g = _read_rgb(RUN_PAUSE_LABEL)
     # Decide RUN/PAUSE/HALT by nearest color; FAULT by blink pattern
-    rn = _nearest(
-        RUN_PAUSE_LABEL,
-        {
-            "RUN": _PALETTE["RUN"],
-            "PAUSE": _PALETTE["PAUSE"],
-            # Use dim per-key OFF tint for classification
-            "OFF": _off_color(RUN_PAUSE_LABEL),
-            "HALT": _PALETTE["HALT"],
-        },
-    )
+    rn = sel[RUN_PAUSE_LABEL]
     if _is_blinking_red(RUN_PAUSE_LABEL):
         st.run = "FAULT"
     else:
         st.run = ("PAUSE" if rn in ("PAUSE", "OFF") else rn)  # type: ignore[assignment]
 
-    # --- esc ---
-    rgb_e = _read_rgb(KEY_ESC_LABEL)
-    # For ESC, classify using the most recent sample (edge sensitivity),
-    # not the smoothed average used by other keys.
-    esc_candidates = {
-        "EHALT": _PALETTE["EHALT"],
-        "R_HARD": _PALETTE["R_HARD"],
-        "R_SOFT": _PALETTE["R_SOFT"],
-        "NONE": _off_color(KEY_ESC_LABEL),
-    }
-    # Compute nearest by direct distance to the latest sample
-    best_k = "NONE"
-    best_d = 10 ** 12
-    for k, col in esc_candidates.items():
-        d = _d2(tuple(int(x) for x in rgb_e), col)
-        if d < best_d:
-            best_d = d
-            best_k = k
-    st.esc = best_k  # type: ignore[assignment]
-
-    # --- tab ---
-    _read_rgb(KEY_TAB_LABEL)
-    tab_sel = _nearest(
-        KEY_TAB_LABEL,
-        {"INSTR": _PALETTE["INSTR"], "MICRO": _PALETTE["MICRO"], "CONT": _off_color(KEY_TAB_LABEL)},
-    )
-    st.step = tab_sel  # type: ignore[assignment]
-
-    # --- caps ---
-    _read_rgb(KEY_CAPS_LABEL)
-    caps_sel = _nearest(
-        KEY_CAPS_LABEL,
-        {"ON": _PALETTE["TRACE"], "MARK": _PALETTE["MARK"], "OFF": _off_color(KEY_CAPS_LABEL)},
-    )
-    st.trace = caps_sel  # type: ignore[assignment]
-
-    # --- left_shift ---
-    _read_rgb(KEY_LSHIFT_LABEL)
-    shift_sel = _nearest(
-        KEY_LSHIFT_LABEL,
-        {
-            "ALU": _PALETTE["ALU"],
-            "IRPC": _PALETTE["IRPC"],
-            "BUS": _PALETTE["BUS"],
-            "SERVICE": _PALETTE["SERVICE"],
-            "NONE": _off_color(KEY_LSHIFT_LABEL),
-        },
-    )
-    st.overlay = shift_sel  # type: ignore[assignment]
+    st.esc = sel[KEY_ESC_LABEL]  # type: ignore[assignment]
+    st.step = sel[KEY_TAB_LABEL]  # type: ignore[assignment]
+    st.trace = sel[KEY_CAPS_LABEL]  # type: ignore[assignment]
+    st.overlay = sel[KEY_LSHIFT_LABEL]  # type: ignore[assignment]
 
     return st
 
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+"""
+양자화 RGB → 팔레트 인덱스 디코드 큐브
+
+팔레트(K색)와 채널 가중치가 정해지면, RGB 공간을 (2^bits)^3 칸으로 나누고
+칸마다 가중 거리로 가장 가까운 팔레트 항목을 미리 계산해 둔다.
+→ 디코딩은 팔레트 크기와 상관없이 인덱스 한 번.
+
+- 칸의 8개 꼭짓점(정수 RGB 끝값)이 모두 같은 항목을 고르면 칸 전체가 그 항목이다
+  (가중 거리 차이는 RGB에 대해 일차식이라 꼭짓점에서 부호가 같으면 칸 안에서도 같다)
+- 결정 경계가 지나가는 칸은 AMBIGUOUS로 두고, 호출 쪽이 정확 탐색으로 처리
+- 한 번 만들어 디스크에 캐시(config.CACHE_DIR), 파일 이름은 팔레트/가중치/비트 수 해시
+- 읽을 때는 mmap (프로세스 여러 개가 같은 페이지를 공유)
+"""
+
+import hashlib
+import mmap
+import os
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from config import CACHE_DIR
+
+# Distance margin below which two palette entries count as tied at a corner
+_TIE_EPS = 1e-6
+# Part of the cache key: bump when the cell layout/meaning changes
+_FORMAT = b"decode-cube-1"
+
+
+
+def palette_key(palette: np.ndarray, weights: np.ndarray, bits: int) -> str:
+    h = hashlib.sha1(_FORMAT)
+    h.update(np.ascontiguousarray(palette, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(weights, dtype=np.float64).tobytes())
+    h.update(str(int(bits)).encode("ascii"))
+    return h.hexdigest()[:16]
+
+
+def cell_dtype(k: int):
+    """uint8 cells while one code is left over for AMBIGUOUS, else uint16."""
+    return np.uint8 if k < 0xFF else np.uint16
+
+
+def ambiguous_code(dtype) -> int:
+    """Cell code meaning "a decision boundary crosses this cell, decode exactly"."""
+    return int(np.iinfo(dtype).max)
+
+
+def build_cube(palette: np.ndarray, weights: np.ndarray, bits: int = 6) -> np.ndarray:
+    """Palette index per cell, flat in (r, g, b) order; AMBIGUOUS where a boundary crosses."""
+    pal = np.asarray(palette, dtype=np.float64).reshape(-1, 3)
+    w = np.asarray(weights, dtype=np.float64).reshape(3)
+    side = 1 << bits
+    step = 256 // side
+    dtype = cell_dtype(len(pal))
+    # Lowest/highest integer of each cell along one axis: lo0, hi0, lo1, hi1, ...
+    ends = (np.arange(side)[:, None] * step + np.array([0, step - 1])).reshape(-1).astype(np.float64)
+    # |c - p|^2_w = w.c^2 - 2 c.(w p) + w.p^2 ; per-point w.c^2 does not change the argmin
+    wp = (pal * w).T                      # (3, K)
+    pp = (pal * pal) @ w                  # (K,)
+    n = len(ends)
+    corner = np.empty(n ** 3, dtype=dtype)
+    gg, bb = np.meshgrid(ends, ends, indexing="ij")
+    gb = np.stack([gg.reshape(-1), bb.reshape(-1)], axis=1)
+    base = pp - 2.0 * (gb @ wp[1:])       # (n*n, K), shared by every r plane
+    amb = ambiguous_code(dtype)
+    rows = np.arange(n * n)
+    for i, r in enumerate(ends):
+        d = base - 2.0 * r * wp[0]
+        best = np.argmin(d, axis=1)
+        lo = d[rows, best]
+        d[rows, best] = np.inf
+        # Exact ties (or float-close ones) are left to the exact scan, so its tie rule wins
+        tie = d.min(axis=1) - lo < _TIE_EPS
+        corner[i * n * n:(i + 1) * n * n] = np.where(tie, amb, best)
+    c = corner.reshape(side, 2, side, 2, side, 2)
+    first = c[:, 0, :, 0, :, 0]
+    same = (c == first[:, None, :, None, :, None]).all(axis=(1, 3, 5))
+    return np.where(same, first, amb).astype(dtype).reshape(-1)
+
+
+class DecodeCube:
+    """mmap-backed lookup: `index(r, g, b)` -> palette index or `self.ambiguous`."""
+
+    def __init__(self, data: Union[mmap.mmap, bytes], bits: int, itemsize: int,
+                 path: Optional[Path] = None) -> None:
+        self.bits = int(bits)
+        self._shift = 8 - self.bits
+        self._data = data
+        self.path = path
+        view = memoryview(data)
+        # Pure-Python indexing of a memoryview yields ints directly (no NumPy scalar)
+        self._view = view.cast("H") if itemsize == 2 else view
+        dtype = np.uint16 if itemsize == 2 else np.uint8
+        self.array = np.frombuffer(data, dtype=dtype)
+        self.ambiguous = ambiguous_code(dtype)
+
+    def index(self, r: int, g: int, b: int) -> int:
+        s = self._shift
+        return self._view[(((r >> s) << self.bits | (g >> s)) << self.bits) | (b >> s)]
+
+    def index_many(self, rgb: np.ndarray) -> np.ndarray:
+        """Cell codes for an N x 3 uint8 array (`self.ambiguous` where undecided)."""
+        q = np.asarray(rgb, dtype=np.intp) >> self._shift
+        return self.array[(q[..., 0] << (2 * self.bits)) | (q[..., 1] << self.bits) | q[..., 2]]
+
+    @classmethod
+    def load_or_build(cls, palette: Sequence[Tuple[int, int, int]], weights: Sequence[float],
+                      bits: int = 6, cache_dir: Optional[Path] = None) -> "DecodeCube":
+        pal = np.asarray(palette, dtype=np.float64).reshape(-1, 3)
+        w = np.asarray(weights, dtype=np.float64)
+        itemsize = np.dtype(cell_dtype(len(pal))).itemsize
+        size = (1 << (3 * bits)) * itemsize
+        path = Path(cache_dir or CACHE_DIR) / f"decode_cube_{palette_key(pal, w, bits)}_b{bits}.bin"
+        cube = cls._open(path, size, bits, itemsize)
+        if cube is not None:
+            return cube
+        raw = build_cube(pal, w, bits).tobytes()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{os.getpid()}")
+            with open(tmp, "wb") as f:
+                f.write(raw)
+            os.replace(tmp, path)
+            cube = cls._open(path, size, bits, itemsize)
+            if cube is not None:
+                return cube
+        except Exception:
+            pass
+        # Read-only install: keep the cube in memory for this run
+        return cls(raw, bits, itemsize)
+
+    @classmethod
+    def _open(cls, path: Path, size: int, bits: int, itemsize: int) -> Optional["DecodeCube"]:
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size != size:
+                    return None
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(mm, bits, itemsize, path)
+        except Exception:
+            return None
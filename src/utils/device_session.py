@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+"""
+키보드 장치 세션 (핸들/모드 캐시)
+
+- 키보드 장치를 한 번만 찾아(client.devices 순회) 핸들을 캐시한다.
+- 마지막으로 설정한 모드("direct")를 기억해 매 쓰기마다 set_mode를 다시 보내지 않는다.
+  (openrgb-python의 set_mode는 내부적으로 update() 왕복까지 수행한다)
+- 캐시는 다음 경우에만 무효화된다:
+  * 서버의 DEVICE_LIST_UPDATED 알림 (핫플러그/장치 재탐색)
+  * 호출 측이 보고한 I/O 오류 (`invalidate()`)
+"""
+
+import threading
+from typing import Any, Optional
+
+try:
+    from openrgb.utils import PacketType
+    _DEVICE_LIST_UPDATED = int(PacketType.DEVICE_LIST_UPDATED)
+except Exception:  # pragma: no cover - older openrgb-python
+    _DEVICE_LIST_UPDATED = 100
+
+
+class DeviceSession:
+    """Cached keyboard handle plus its active mode, invalidated on hotplug."""
+
+    def __init__(self, client: Any, device_type: str = "keyboard") -> None:
+        self.client = client
+        self.device_type = str(device_type).lower()
+        self._lock = threading.RLock()
+        self._device: Any = None
+        self._mode: Optional[str] = None
+        # Bumped on every invalidation; lets holders of a handle notice staleness
+        self.generation: int = 0
+        self.resolves: int = 0
+        self.mode_switches: int = 0
+        self._hook_device_list_updates()
+
+    def _hook_device_list_updates(self) -> None:
+        """Chain into the client's packet callback to see DEVICE_LIST_UPDATED."""
+        comms = getattr(self.client, "comms", None)
+        orig = getattr(comms, "callback", None)
+        if comms is None or orig is None:
+            return
+
+        def _callback(device: int, ptype: int, data: Any) -> None:
+            if int(ptype) == _DEVICE_LIST_UPDATED:
+                self.invalidate()
+            orig(device, ptype, data)
+
+        try:
+            comms.callback = _callback
+        except Exception:
+            pass
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._device = None
+            self._mode = None
+            self.generation += 1
+
+    def _resolve(self) -> Any:
+        devices = getattr(self.client, "devices", None) or self.client.get_devices()
+        for d in devices or []:
+            if d is None:
+                continue  # list is being repopulated after an update notice
+            dtype = str(getattr(d.type, "name", str(d.type))).lower()
+            if dtype == self.device_type:
+                return d
+        return None
+
+    def device(self) -> Any:
+        """Cached device handle (resolved on first use / after invalidation)."""
+        with self._lock:
+            if self._device is None:
+                self._device = self._resolve()
+                self._mode = None
+                self.resolves += 1
+            return self._device
+
+    def adopt(self, device: Any, mode: Optional[str] = None) -> None:
+        """Record a handle (and mode) that the caller already set up."""
+        with self._lock:
+            self._device = device
+            self._mode = str(mode).lower() if mode else None
+
+    def ensure_mode(self, mode: str = "direct") -> Any:
+        """Switch the device to `mode` unless it is already known to be active."""
+        want = str(mode).lower()
+        with self._lock:
+            dev = self.device()
+            if dev is None or self._mode == want:
+                return dev
+            try:
+                dev.set_mode(want)
+            except Exception:
+                # Unknown state: resolve again and retry on the next call
+                self.invalidate()
+                raise
+            self._mode = want
+            self.mode_switches += 1
+            return dev
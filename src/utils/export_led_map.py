@@ -12,19 +12,24 @@ def main():
     if not kb:
         raise SystemExit("키보드 장치를 찾지 못했습니다. OpenRGB에서 인식 상태 확인!")
 
+    # LED 인덱스 → OpenRGB 존 이름 (존의 LED id는 장치 전체 인덱스)
+    zone_of = {}
+    for z in getattr(kb, "zones", None) or []:
+        for led in getattr(z, "leds", None) or []:
+            zone_of[int(led.id)] = z.name
+
     rows = []
     for idx, led in enumerate(kb.leds):
         rows.append({
             "index": idx,
             "name_raw": led.name or "",
-            # 필요시 좌표/존 등 추가 (모델마다 없을 수 있음)
-            # "zone": getattr(led, "zone", None),
+            "zone": zone_of.get(idx, ""),
         })
 
     # CSV
     csv_path = os.path.join(MAPS_DIR, f"{kb.name}_leds.csv")
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["index","name_raw"])
+        w = csv.DictWriter(f, fieldnames=["index","name_raw","zone"])
         w.writeheader()
         w.writerows(rows)
 
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+"""
+LED 프레임 페이싱 (토큰 버킷)
+
+장치 펌웨어가 감당하는 속도(예: USB 폴링 주기)보다 빠르게 프레임을 밀어 넣으면
+펌웨어가 멈칫하며 고정 sleep보다 훨씬 긴 지연이 생긴다. 그래서 flush마다 토큰을 하나
+쓰게 하고, 토큰은 목표 프레임 주기마다 하나씩 채운다(최대 burst개까지 저축).
+
+- budget():  지금 바로 보낼 수 있는 프레임 수(토큰 잔량)
+- acquire(): 토큰이 생길 때까지 기다렸다가 하나 소비
+- merged/dropped: 기다리는 동안 뒤의 프레임에 합쳐졌거나(일부 덮임)
+                  완전히 덮여 장치에 한 번도 나가지 않은 프레임 수
+주기가 0이면 비활성(항상 즉시 통과).
+"""
+
+import threading
+import time
+from typing import Dict
+
+
+class FramePacer:
+    """Token bucket that releases at most one LED frame per target period."""
+
+    def __init__(self, period_ms: float = 0.0, burst: int = 1) -> None:
+        self._lock = threading.Lock()
+        self.period_s = 0.0
+        self.burst = 1
+        self._tokens = 1.0
+        self._t_last = time.perf_counter()
+        self.frames = 0
+        self.waits = 0
+        self.wait_ms = 0.0
+        self.merged = 0
+        self.dropped = 0
+        self.configure(period_ms, burst)
+
+    def configure(self, period_ms: float, burst: int = 1) -> None:
+        with self._lock:
+            self.period_s = max(0.0, float(period_ms)) / 1000.0
+            self.burst = max(1, int(burst))
+            self._tokens = float(self.burst)
+            self._t_last = time.perf_counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.period_s > 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.period_s > 0.0:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._t_last) / self.period_s)
+        self._t_last = now
+
+    def budget(self) -> float:
+        """Frames that could be sent right now without waiting."""
+        if not self.enabled:
+            return float("inf")
+        with self._lock:
+            self._refill(time.perf_counter())
+            return self._tokens
+
+    def acquire(self, block: bool = True) -> bool:
+        """Take one frame token, sleeping until the next period if needed."""
+        if not self.enabled:
+            with self._lock:
+                self.frames += 1
+            return True
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.perf_counter()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self.frames += 1
+                    if waited > 0.0:
+                        self.waits += 1
+                        self.wait_ms += waited * 1000.0
+                    return True
+                if not block:
+                    return False
+                need = (1.0 - self._tokens) * self.period_s
+            time.sleep(need)
+            waited += need
+
+    def note_coalesced(self, merged: int, dropped: int) -> None:
+        with self._lock:
+            self.merged += int(merged)
+            self.dropped += int(dropped)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "period_ms": self.period_s * 1000.0,
+                "burst": float(self.burst),
+                "frames": float(self.frames),
+                "waits": float(self.waits),
+                "wait_ms": self.wait_ms,
+                "merged": float(self.merged),
+                "dropped": float(self.dropped),
+            }
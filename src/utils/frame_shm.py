@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+"""
+공유 메모리 프레임 게시 (외부 뷰어/녹화기/테스트 하네스용)
+
+rgb_controller가 장치로 보낸 현재 프레임(LED 색)과 CPU가 알려 준 PC/IR/플래그를
+multiprocessing.shared_memory 세그먼트 하나에 올린다.
+외부 프로세스는 OpenRGB에 따로 붙어 폴링할 필요 없이 이 세그먼트만 읽으면 된다.
+
+배치 (리틀 엔디언):
+  헤더  magic b"RGBF", u16 버전, u16 LED 수, u64 seq, f64 ts(time.time),
+        i32 pc, i32 ir(ISA 16비트 워드, 없으면 -1), u32 flags(Z=1 N=2 V=4 C=8),
+        u64 step, u32 라벨 JSON 길이
+  본문  LED 수 × 3B rgb, 이어서 라벨→인덱스 JSON (생성 시 한 번 기록)
+
+seqlock: 쓰는 쪽은 seq를 홀수로 올리고 → 본문을 쓰고 → 짝수로 올린다.
+읽는 쪽은 seq가 짝수이고 복사 전후 값이 같을 때까지 다시 읽는다 (잠금 없음).
+"""
+
+import json
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from types import MappingProxyType
+from typing import Mapping, Optional, Sequence, Set, Tuple
+
+MAGIC = b"RGBF"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQdiiIQI")
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 8
+FLAG_BITS = {"Z": 1, "N": 2, "V": 4, "C": 8}
+DEFAULT_NAME = "keyboard_com_frame"
+# Segments created by writers in this process (their tracker entry must stay)
+_OWNED: Set[str] = set()
+
+
+def pack_flags(flags: Mapping[str, int]) -> int:
+    return sum(bit for name, bit in FLAG_BITS.items() if flags.get(name))
+
+
+@dataclass(frozen=True)
+class SharedFrame:
+    """One consistent copy of the published frame."""
+    seq: int
+    ts: float
+    colors: Tuple[Tuple[int, int, int], ...]
+    pc: int
+    ir: int
+    flags: Mapping[str, int]
+    step: int
+    label_to_index: Mapping[str, int]
+
+    def __getitem__(self, label: str) -> Tuple[int, int, int]:
+        idx = self.label_to_index.get(str(label).lower())
+        if idx is None or not (0 <= idx < len(self.colors)):
+            raise KeyError(f"Unknown label '{label}'.")
+        return self.colors[idx]
+
+
+class SharedFrameWriter:
+    """Owns the segment; single writer (calls are serialized by its lock)."""
+
+    def __init__(self, n_leds: int, label_to_index: Optional[Mapping[str, int]] = None,
+                 name: Optional[str] = None) -> None:
+        self.n_leds = int(n_leds)
+        labels = json.dumps(dict(label_to_index or {}), separators=(",", ":")).encode("utf-8")
+        self._body = _HEADER.size
+        size = _HEADER.size + 3 * self.n_leds + len(labels)
+        name = name or DEFAULT_NAME
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a run that did not shut down cleanly
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        _OWNED.add(self.name)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._pc = 0
+        self._ir = -1
+        self._flags = 0
+        self._step = 0
+        self._colors = bytes(3 * self.n_leds)
+        self.shm.buf[self._body + 3 * self.n_leds:size] = labels
+        self._labels_len = len(labels)
+        self._write()
+
+    def _write(self) -> None:
+        buf = self.shm.buf
+        self._seq += 1
+        _SEQ.pack_into(buf, _SEQ_OFFSET, self._seq)
+        _HEADER.pack_into(buf, 0, MAGIC, VERSION, self.n_leds, self._seq, time.time(),
+                          self._pc, self._ir, self._flags, self._step, self._labels_len)
+        buf[self._body:self._body + len(self._colors)] = self._colors
+        self._seq += 1
+        _SEQ.pack_into(buf, _SEQ_OFFSET, self._seq)
+
+    def publish_colors(self, colors: Sequence[Tuple[int, int, int]]) -> None:
+        """`colors`: (r, g, b) rows or an N x 3 uint8 array."""
+        tobytes = getattr(colors[:self.n_leds], "tobytes", None)
+        raw = tobytes() if tobytes is not None else bytes(v for rgb in colors[:self.n_leds] for v in rgb)
+        with self._lock:
+            self._colors = raw.ljust(3 * self.n_leds, b"\0")
+            self._write()
+
+    def publish_state(self, pc: int, ir: int, flags: int, step: Optional[int] = None) -> None:
+        with self._lock:
+            self._pc, self._ir, self._flags = int(pc), int(ir), int(flags)
+            self._step = self._step + 1 if step is None else int(step)
+            self._write()
+
+    def close(self) -> None:
+        _OWNED.discard(self.name)
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except Exception:
+            pass
+
+
+class SharedFrameReader:
+    """Attach to a published frame by name; reads never block the writer."""
+
+    def __init__(self, name: str = DEFAULT_NAME) -> None:
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+        except TypeError:
+            # Python < 3.13: keep the resource tracker from unlinking the writer's segment
+            self.shm = shared_memory.SharedMemory(name=name)
+            if self.shm.name not in _OWNED:
+                try:
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister(self.shm._name, "shared_memory")  # type: ignore[attr-defined]
+                except Exception:
+                    pass
+        head = _HEADER.unpack_from(self.shm.buf, 0)
+        if head[0] != MAGIC:
+            self.shm.close()
+            raise ValueError(f"'{name}' is not a keyboard frame segment")
+        self.n_leds = int(head[2])
+        start = _HEADER.size + 3 * self.n_leds
+        raw = bytes(self.shm.buf[start:start + int(head[9])])
+        self.label_to_index: Mapping[str, int] = MappingProxyType(json.loads(raw.decode("utf-8") or "{}"))
+
+    def seq(self) -> int:
+        return _SEQ.unpack_from(self.shm.buf, _SEQ_OFFSET)[0]
+
+    def read(self, timeout_s: float = 0.1) -> SharedFrame:
+        deadline = time.perf_counter() + timeout_s
+        end = _HEADER.size + 3 * self.n_leds
+        while True:
+            s1 = self.seq()
+            if not s1 & 1:
+                raw = bytes(self.shm.buf[:end])
+                if self.seq() == s1:
+                    break
+            if time.perf_counter() >= deadline:
+                raise TimeoutError("frame writer did not finish an update in time")
+        _, _, n, seq, ts, pc, ir, flags, step, _ = _HEADER.unpack_from(raw, 0)
+        body = raw[_HEADER.size:]
+        colors = tuple((body[i], body[i + 1], body[i + 2]) for i in range(0, 3 * n, 3))
+        return SharedFrame(
+            seq=int(seq), ts=float(ts), colors=colors, pc=int(pc), ir=int(ir),
+            flags=MappingProxyType({k: int(bool(flags & bit)) for k, bit in FLAG_BITS.items()}),
+            step=int(step), label_to_index=self.label_to_index,
+        )
+
+    def wait_next(self, seq: int, timeout_s: float = 1.0, poll_s: float = 0.001) -> Optional[SharedFrame]:
+        """Poll until a frame newer than `seq` is published (None on timeout)."""
+        deadline = time.perf_counter() + timeout_s
+        while self.seq() <= seq:
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll_s)
+        return self.read()
+
+    def close(self) -> None:
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+
+
+def main() -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Print frames published by rgb_controller")
+    ap.add_argument("--name", default=DEFAULT_NAME)
+    args = ap.parse_args()
+    rd = SharedFrameReader(args.name)
+    seq = 0
+    try:
+        while True:
+            fr = rd.wait_next(seq, timeout_s=5.0)
+            if fr is None:
+                continue
+            seq = fr.seq
+            lit = sum(1 for c in fr.colors if c != (0, 0, 0))
+            flags = "".join(k for k, v in fr.flags.items() if v) or "-"
+            print(f"[FRAME] seq={fr.seq} step={fr.step} pc={fr.pc} ir={fr.ir:#06x} flags={flags} lit={lit}/{len(fr.colors)}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rd.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
 from typing import Dict, Tuple, Any, List
 from openrgb.utils import RGBColor
-from rgb_controller import set_labels_atomic, set_key_color, get_key_color
+from rgb_controller import set_labels_atomic, set_key_color, snapshot
 import time
+import numpy as np
 from utils.keyboard_presets import (
     IR12, IR_OP_1BIT, IR_DST_1BIT, IR_ARG_2BIT,
     IR_ONOFF, IR_4STATE, VAR_TO_ID,
 )
 from sim.parser import parse_line  # for high-level source interpretation
+from utils.batch_decode import KeyDecoder
 
 
 def _clamp8(x: int) -> int:
@@ -219,17 +221,18 @@ def calibrate_ir(samples: int = 3, settle_ms: int = 10, debug: bool = False) ->
     - Non-destructive: only affects decoding; can be re-run anytime.
     """
     def _avg_rgb(labels: List[str]) -> Dict[str, Tuple[int, int, int]]:
-        d: Dict[str, Tuple[int, int, int]] = {}
-        for lab in labels:
-            rs = gs = bs = 0
-            for _ in range(max(1, samples)):
-                r, g, b = get_key_color(lab, fresh=True)[0]
-                rs += int(r); gs += int(g); bs += int(b)
-                if settle_ms > 0:
-                    time.sleep(settle_ms / 1000.0)
-            n = max(1, samples)
-            d[lab] = (rs // n, gs // n, bs // n)
-        return d
+        # One snapshot per sample round covers every label
+        n = max(1, samples)
+        acc: Dict[str, List[int]] = {lab: [0, 0, 0] for lab in labels}
+        for _ in range(n):
+            snap = snapshot()
+            for lab in labels:
+                r, g, b = snap[lab]
+                a = acc[lab]
+                a[0] += int(r); a[1] += int(g); a[2] += int(b)
+            if settle_ms > 0:
+                time.sleep(settle_ms / 1000.0)
+        return {lab: (a[0] // n, a[1] // n, a[2] // n) for lab, a in acc.items()}
 
     # OP bits: measure OFF then ON per bit
     global _CAL_OP_ONOFF, _CAL_DST_ONOFF, _CAL_ARG_4STATE
@@ -324,42 +327,50 @@ def _nearest_2bit(role: str, rgb: Tuple[int, int, int], lab: str | None = None)
     return best & 0x3
 
 
+def _ir_decoder(use_calibration: bool) -> KeyDecoder:
+    """OP/DST keys as (off, on) -> bit, ARG keys as 4 states -> 2-bit value (same palettes as _nearest_*)."""
+    palettes: Dict[str, List[Tuple[int, int, int]]] = {}
+    symbols: Dict[str, List[int]] = {}
+    for role, labels, cal in (("OP", IR_OP_1BIT, _CAL_OP_ONOFF), ("DST", IR_DST_1BIT, _CAL_DST_ONOFF)):
+        for lab in labels:
+            on, off = cal[lab] if use_calibration and lab in cal else IR_ONOFF[role]
+            # off first: an exact tie decodes as 0, like _nearest_1bit's strict '<'
+            palettes[lab] = [off, on]
+    arg = IR_4STATE.get("ARG") or IR_4STATE.get("OP") or [
+        (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 255)
+    ]
+    for lab in IR_ARG_2BIT:
+        pal = list(_CAL_ARG_4STATE[lab] if use_calibration and lab in _CAL_ARG_4STATE else arg)
+        palettes[lab] = pal
+        symbols[lab] = [i & 0x3 for i in range(len(pal))]
+    return KeyDecoder(palettes, symbols)
+
+
 def read_ir(*, samples: int = 1, use_calibration: bool = True, debug: bool = False) -> Tuple[int, int, int]:
     """Decode current IR(F1..F12) back to (op4,dst4,arg8) by reading LED colors.
     - OP/DST: 1-bit per key (ON/OFF) on F1..F4 and F5..F8.
     - ARG:    2-bit per key (4-state color) on F9..F12.
     - samples: read multiple times per key and decide by majority vote.
+      Each sample is one whole-keyboard snapshot shared by all 12 keys.
     - use_calibration: if True and calibration data exist, use them for decoding.
     """
-    # Read OP nibble
+    snaps = [snapshot() for _ in range(max(1, samples))]
+    # All 12 keys x all samples in one vectorized pass; votes per key below
+    dec = _ir_decoder(use_calibration)
+    syms, _ = dec.decode_snapshot(snaps)                    # (samples, 12)
+    n = len(snaps)
+    n_op, n_dst = len(IR_OP_1BIT), len(IR_DST_1BIT)
+    bits = (2 * syms[:, :n_op + n_dst].sum(axis=0) >= n).tolist()   # ties -> 1
     op_bits = 0
-    for i, lab in enumerate(IR_OP_1BIT):
-        votes = [0, 0]
-        for _ in range(max(1, samples)):
-            rgb = get_key_color(lab, fresh=True)[0]
-            bit_s = _nearest_1bit("OP", rgb, lab if use_calibration else None)
-            votes[bit_s] += 1
-        bit = 1 if votes[1] >= votes[0] else 0
-        op_bits = (op_bits << 1) | bit
-    # Read DST nibble
+    for bit in bits[:n_op]:
+        op_bits = (op_bits << 1) | int(bit)
     dst_bits = 0
-    for i, lab in enumerate(IR_DST_1BIT):
-        votes = [0, 0]
-        for _ in range(max(1, samples)):
-            rgb = get_key_color(lab, fresh=True)[0]
-            bit_s = _nearest_1bit("DST", rgb, lab if use_calibration else None)
-            votes[bit_s] += 1
-        bit = 1 if votes[1] >= votes[0] else 0
-        dst_bits = (dst_bits << 1) | bit
-    # Read ARG byte (pairs)
+    for bit in bits[n_op:]:
+        dst_bits = (dst_bits << 1) | int(bit)
+    # Read ARG byte (pairs): most common state, lowest on ties
     arg_val = 0
-    for i, lab in enumerate(IR_ARG_2BIT):
-        votes = [0, 0, 0, 0]
-        for _ in range(max(1, samples)):
-            rgb = get_key_color(lab, fresh=True)[0]
-            v2s = _nearest_2bit("ARG", rgb, lab if use_calibration else None)
-            votes[v2s] += 1
-        v2 = max(range(4), key=lambda k: votes[k])
+    for i in range(len(IR_ARG_2BIT)):
+        v2 = int(np.argmax(np.bincount(syms[:, n_op + n_dst + i].astype(np.intp), minlength=4)))
         shift = 6 - 2*i
         arg_val |= (v2 & 0x3) << shift
     if debug:
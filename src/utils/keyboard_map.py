@@ -18,6 +18,8 @@ from typing import Dict, List, Optional
 from openrgb import OpenRGBClient
 from openrgb.utils import RGBColor
 from config import MAPS_DIR
+from utils.settle import settle
+from utils.device_session import DeviceSession
 
 def _norm(s: str) -> str:
     """LED 이름 정규화: 소문자, 공백/특수문자 정리."""
@@ -97,6 +99,8 @@ class RGBLabelController:
         self.client = client
         self.json_path = json_path or self._default_json_path()
         self.label_to_index = self._build_label_map_from_json(self.json_path)
+        # 장치 핸들/모드 캐시 (핫플러그 알림 또는 I/O 오류 시에만 다시 찾는다)
+        self.session = DeviceSession(client)
 
     def _default_json_path(self) -> str:
         # 기본 경로 추정
@@ -107,12 +111,7 @@ class RGBLabelController:
         raise FileNotFoundError("maps/ 폴더에 *_leds.json 파일이 없습니다. export_led_map 먼저 실행하세요.")
 
     def _load_keyboard(self):
-        devices = getattr(self.client, "devices", None) or self.client.get_devices()
-        for d in devices:
-            dtype = getattr(d.type, "name", str(d.type)).lower()
-            if dtype == "keyboard":
-                return d
-        return None
+        return self.session.device()
 
     def _build_label_map_from_json(self, path: str) -> Dict[str, int]:
         """JSON의 name_raw를 정규화하여 ALIASES 라벨과 매칭, 라벨→인덱스 사전 생성."""
@@ -157,7 +156,7 @@ class RGBLabelController:
         if not kb or not kb.leds:
             return False
         try:
-            kb.set_mode("direct")
+            self.session.ensure_mode("direct")
         except Exception:
             pass
 
@@ -167,9 +166,11 @@ class RGBLabelController:
 
         try:
             kb.leds[idx].set_color(color)
-            time.sleep(0.05)  # 하드웨어/서버 업데이트 대기
+            # 하드웨어/서버 업데이트 대기 (fixed: 50ms, readback: 관측될 때까지)
+            settle(kb, {idx: (int(color.red), int(color.green), int(color.blue))}, 0.05)
             return True
         except Exception:
+            self.session.invalidate()
             return False
 
     def available_labels(self) -> Dict[str, int]:
@@ -203,3 +203,17 @@ FLAG_LABELS.update({
 BINARY_COLORS.update({
     CARRY_FLAG_LABEL: (CARRY_ON, CARRY_OFF),
 })
+
+# ---------------------------------------------------------------------
+# Device sharding groups (rgb_controller.connect(shards=...))
+# ---------------------------------------------------------------------
+# 여러 키보드를 쓸 때 그룹 단위로 다른 장치에 배치한다. 값은 같은 모델 키보드 기준 라벨.
+# 예: connect(shards={"IR": 1, "PC": 1, "VAR": 2}) 또는 RGB_SHARDS="IR=1,PC=1,VAR=2"
+SHARD_GROUPS = {
+    "SRC1": list(SRC1),
+    "SRC2": list(SRC2),
+    "RES":  list(RES),
+    "IR":   [lab.lower() for lab in IR_OP_1BIT + IR_DST_1BIT + IR_ARG_2BIT],
+    "PC":   list(PC),
+    "VAR":  sorted(VARIABLE_KEYS),
+}
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+"""
+asyncio 기반 OpenRGB SDK 전송 계층 (요청 파이프라이닝)
+
+openrgb-python의 NetworkClient는 소켓 하나에서 요청→응답을 엄격히 직렬로 처리한다.
+여기서는 전용 이벤트 루프 스레드가 소켓을 소유하고:
+- 쓰기(UpdateLEDs/UpdateSingleLED/UpdateMode 등)는 큐에 넣고 바로 반환한다.
+- 응답이 있는 요청(RequestControllerData 등)은 보낸 순서대로 Future에 대기시키고,
+  수신 루프가 패킷 종류별 FIFO 순서로 응답을 짝지어 준다.
+  (SDK 서버는 한 연결의 패킷을 순서대로 처리하므로 순서 매칭이 성립한다)
+
+`AsyncNetworkClient`는 NetworkClient와 같은 메서드(send_header/send_data/read/
+requestDeviceData ...)를 제공하므로 openrgb-python의 Device/LED/Zone 객체가 그대로 동작한다.
+`AsyncOpenRGBClient`는 이 전송을 쓰는 OpenRGBClient이다.
+"""
+
+import asyncio
+import struct
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from openrgb import OpenRGBClient
+from openrgb import utils
+
+try:
+    from openrgb.network import OPENRGB_PROTOCOL_VERSION
+except Exception:  # pragma: no cover
+    OPENRGB_PROTOCOL_VERSION = 4
+
+_HEADER = struct.Struct("ccccIII")
+
+# Packet types the server answers; replies are matched FIFO per type
+_REPLY_TYPES = (
+    utils.PacketType.REQUEST_CONTROLLER_COUNT,
+    utils.PacketType.REQUEST_CONTROLLER_DATA,
+    utils.PacketType.REQUEST_PROTOCOL_VERSION,
+    utils.PacketType.REQUEST_PROFILE_LIST,
+    utils.PacketType.REQUEST_PLUGIN_LIST,
+)
+
+
+class AsyncNetworkClient:
+    """Drop-in NetworkClient whose socket lives on a private asyncio loop."""
+
+    def __init__(self, update_callback: Callable, address: str = "127.0.0.1", port: int = 6742,
+                 name: str = "openrgb-python", protocol_version: Optional[int] = None,
+                 timeout: float = 10.0) -> None:
+        self.callback = update_callback
+        self.address = address
+        self.port = port
+        self.name = name
+        self.timeout = float(timeout)
+        self.max_protocol_version = OPENRGB_PROTOCOL_VERSION
+        if protocol_version is not None:
+            if protocol_version > self.max_protocol_version:
+                raise utils.SDKVersionError(
+                    f"Requested protocol version {protocol_version} is greater than maximum supported version {self.max_protocol_version}")
+            self._protocol_version = protocol_version
+        else:
+            self._protocol_version = OPENRGB_PROTOCOL_VERSION
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional["asyncio.Task[None]"] = None
+        self._pending: Dict[int, Deque[Future]] = {}
+        self._notices: Deque[Tuple[int, int]] = deque()
+        self._tls = threading.local()
+        # Counters (pipelining visibility)
+        self.sent_packets: int = 0
+        self.max_in_flight: int = 0
+        self.start_connection()
+
+    # --- loop / connection -------------------------------------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._thread is None or not self._thread.is_alive():
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="openrgb-async", daemon=True)
+            self._thread.start()
+        return self._loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._ensure_loop()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    def start_connection(self) -> None:
+        if self._writer is not None:
+            return
+        loop = self._ensure_loop()
+        asyncio.run_coroutine_threadsafe(self._open(), loop).result(self.timeout)
+
+        # Protocol version negotiation (older servers never answer)
+        cf = self._enqueue(0, utils.PacketType.REQUEST_PROTOCOL_VERSION,
+                           struct.pack("I", self._protocol_version))
+        try:
+            _, raw = cf.result(1.0)  # type: ignore[union-attr]
+            self.max_protocol_version = min(struct.unpack("I", raw[:4])[0], OPENRGB_PROTOCOL_VERSION)
+            self._protocol_version = min(self.max_protocol_version, self._protocol_version)
+        except Exception:
+            self._protocol_version = 0
+            self._drop_pending(utils.PacketType.REQUEST_PROTOCOL_VERSION, cf)
+
+        name = bytes(f"{self.name}\0", "utf-8")
+        self._enqueue(0, utils.PacketType.SET_CLIENT_NAME, name)
+
+    async def _open(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.address, self.port)
+        self._read_task = asyncio.ensure_future(self._read_loop())
+
+    def stop_connection(self) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+
+        def _close() -> None:
+            w = self._writer
+            self._writer = None
+            self._reader = None
+            if self._read_task is not None:
+                self._read_task.cancel()
+                self._read_task = None
+            if w is not None:
+                try:
+                    w.close()
+                except Exception:
+                    pass
+            self._fail_pending(utils.OpenRGBDisconnected())
+
+        try:
+            loop.call_soon_threadsafe(_close)
+        except RuntimeError:
+            pass
+
+    async def _read_loop(self) -> None:
+        reader = self._reader
+        try:
+            while reader is not None:
+                header = await reader.readexactly(_HEADER.size)
+                magic = header[:4]
+                _, _, _, _, device_id, packet_type, packet_size = _HEADER.unpack(header)
+                data = await reader.readexactly(packet_size) if packet_size else b""
+                if magic != b"ORGB":
+                    continue
+                if packet_type == utils.PacketType.DEVICE_LIST_UPDATED:
+                    # Delivered to the callback from the next caller thread (see read())
+                    self._notices.append((device_id, packet_type))
+                    continue
+                q = self._pending.get(packet_type)
+                if q:
+                    fut = q.popleft()
+                    if not fut.done():
+                        fut.set_result((device_id, data))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            self._writer = None
+            self._fail_pending(utils.OpenRGBDisconnected(str(e)))
+        except asyncio.CancelledError:
+            pass
+
+    def _fail_pending(self, exc: BaseException) -> None:
+        for q in self._pending.values():
+            while q:
+                fut = q.popleft()
+                if not fut.done():
+                    fut.set_exception(exc)
+
+    def _drop_pending(self, ptype: int, fut: Optional[Future]) -> None:
+        def _drop() -> None:
+            try:
+                self._pending.get(ptype, deque()).remove(fut)  # type: ignore[arg-type]
+            except ValueError:
+                pass
+        self.loop.call_soon_threadsafe(_drop)
+
+    # --- packet queue ---------------------------------------------------------
+    def _enqueue(self, device_id: int, packet_type: int, payload: bytes = b"") -> Optional[Future]:
+        """Queue one packet (header + payload) in call order; Future if it gets a reply."""
+        if not self.connected:
+            raise utils.OpenRGBDisconnected()
+        pkt = _HEADER.pack(b"O", b"R", b"G", b"B", int(device_id), int(packet_type), len(payload)) + payload
+        fut: Optional[Future] = Future() if packet_type in _REPLY_TYPES else None
+        if fut is not None:
+            fut._orgb_type = int(packet_type)  # type: ignore[attr-defined]
+
+        def _send() -> None:
+            w = self._writer
+            if w is None:
+                if fut is not None and not fut.done():
+                    fut.set_exception(utils.OpenRGBDisconnected())
+                return
+            if fut is not None:
+                q = self._pending.setdefault(int(packet_type), deque())
+                q.append(fut)
+                self.max_in_flight = max(self.max_in_flight, sum(len(x) for x in self._pending.values()))
+            w.write(pkt)
+            self.sent_packets += 1
+
+        self.loop.call_soon_threadsafe(_send)
+        return fut
+
+    def request(self, device_id: int, packet_type: int, payload: bytes = b"") -> Future:
+        """Pipelined request: returns a Future of (device_id, raw_payload)."""
+        fut = self._enqueue(device_id, packet_type, payload)
+        if fut is None:
+            raise ValueError(f"packet type {packet_type} has no reply")
+        return fut
+
+    def request_device_data(self, device_id: int) -> Future:
+        """Pipelined RequestControllerData; Future resolves to ControllerData."""
+        raw = self.request(device_id, utils.PacketType.REQUEST_CONTROLLER_DATA,
+                           struct.pack("I", self._protocol_version))
+        out: Future = Future()
+
+        def _done(f: Future) -> None:
+            try:
+                _, data = f.result()
+                out.set_result(utils.ControllerData.unpack(data, self._protocol_version))
+            except Exception as e:
+                out.set_exception(e)
+
+        raw.add_done_callback(_done)
+        return out
+
+    async def arequest_device_data(self, device_id: int) -> Any:
+        """Awaitable RequestControllerData usable from any event loop."""
+        return await asyncio.wrap_future(self.request_device_data(device_id))
+
+    # --- NetworkClient-compatible surface -----------------------------------
+    def check_version(self, packet_type: utils.PacketType) -> None:
+        if self._protocol_version < 2 and packet_type in (utils.PacketType.REQUEST_PROFILE_LIST,
+                                                          utils.PacketType.REQUEST_SAVE_PROFILE,
+                                                          utils.PacketType.REQUEST_LOAD_PROFILE,
+                                                          utils.PacketType.REQUEST_DELETE_PROFILE):
+            raise utils.SDKVersionError("Profile controls not supported on protocol versions < 2.  You probably need to update OpenRGB")
+        elif self._protocol_version < 3 and packet_type == utils.PacketType.RGBCONTROLLER_SAVEMODE:
+            raise utils.SDKVersionError("Saving modes not supported on protocol versions < 3.  You probably need to update OpenRGB")
+        elif self._protocol_version < 4 and packet_type in (utils.PacketType.REQUEST_PLUGIN_LIST,
+                                                            utils.PacketType.PLUGIN_SPECIFIC):
+            raise utils.SDKVersionError("Plugin controls not supported on protocol versions < 4.  You probably need to update OpenRGB")
+
+    def send_header(self, device_id: int, packet_type: utils.PacketType, packet_size: int,
+                    release_lock: bool = True) -> None:
+        self.check_version(packet_type)
+        if not self.connected:
+            raise utils.OpenRGBDisconnected()
+        if packet_size == 0:
+            self._tls.last = self._enqueue(device_id, packet_type)
+            self._tls.hdr = None
+        else:
+            # Payload follows in send_data(); header and payload go out together
+            self._tls.hdr = (int(device_id), int(packet_type))
+
+    def send_data(self, data: bytes, release_lock: bool = True) -> None:
+        hdr = getattr(self._tls, "hdr", None)
+        self._tls.hdr = None
+        if hdr is None:
+            raise utils.OpenRGBDisconnected("send_data() without a pending header")
+        self._tls.last = self._enqueue(hdr[0], hdr[1], bytes(data))
+
+    def read(self) -> None:
+        """Wait for the reply to this thread's last request and dispatch it."""
+        fut = getattr(self._tls, "last", None)
+        self._tls.last = None
+        if fut is not None:
+            try:
+                device_id, data = fut.result(self.timeout)
+            except utils.OpenRGBDisconnected:
+                raise
+            except Exception as e:
+                raise utils.OpenRGBDisconnected("SDK server did not respond to previous request") from e
+            self._dispatch(fut, device_id, data)
+        self.poll_notices()
+
+    def _dispatch(self, fut: Future, device_id: int, data: bytes) -> None:
+        ptype = getattr(fut, "_orgb_type", None)
+        if ptype == utils.PacketType.REQUEST_CONTROLLER_COUNT:
+            self.callback(device_id, ptype, struct.unpack("I", data[:4])[0])
+        elif ptype == utils.PacketType.REQUEST_CONTROLLER_DATA:
+            try:
+                parsed = utils.ControllerData.unpack(data, self._protocol_version)
+            except utils.PARSING_ERRORS as e:
+                raise utils.ControllerParsingError(
+                    f"Unable to parse data from request `{ptype}` for device #{device_id}") from e
+            self.callback(device_id, ptype, parsed)
+        elif ptype == utils.PacketType.REQUEST_PROFILE_LIST:
+            idata = iter(data[4:])
+            self.callback(device_id, ptype, utils.parse_list(utils.Profile, idata, self._protocol_version))
+        elif ptype == utils.PacketType.REQUEST_PLUGIN_LIST:
+            idata = iter(data[4:])
+            self.callback(device_id, ptype, utils.parse_list(utils.Plugin, idata, self._protocol_version))
+
+    def poll_notices(self) -> None:
+        """Deliver queued DEVICE_LIST_UPDATED notices to the client callback."""
+        while self._notices:
+            try:
+                device_id, ptype = self._notices.popleft()
+            except IndexError:
+                break
+            self.callback(device_id, ptype, 0)
+
+    def requestDeviceData(self, device: int) -> None:
+        if not self.connected:
+            raise utils.OpenRGBDisconnected()
+        self.send_header(device, utils.PacketType.REQUEST_CONTROLLER_DATA, struct.calcsize("I"))
+        self.send_data(struct.pack("I", self._protocol_version), False)
+        self.read()
+
+    def requestDeviceNum(self) -> None:
+        self.send_header(0, utils.PacketType.REQUEST_CONTROLLER_COUNT, 0)
+        self.read()
+
+    def requestProfileList(self) -> None:
+        self.send_header(0, utils.PacketType.REQUEST_PROFILE_LIST, 0)
+        self.read()
+
+    def requestPluginList(self) -> None:
+        self.send_header(0, utils.PacketType.REQUEST_PLUGIN_LIST, 0)
+        self.read()
+
+
+class AsyncOpenRGBClient(OpenRGBClient):
+    """OpenRGBClient running on the pipelined asyncio transport."""
+
+    def __init__(self, address: str = "127.0.0.1", port: int = 6742, name: str = "openrgb-python",
+                 protocol_version: Optional[int] = None) -> None:
+        self.device_num = 0
+        self.devices: List[Any] = []
+        self.profiles: List[Any] = []
+        self.plugins: List[Any] = []
+        self.comms = AsyncNetworkClient(self._callback, address, port, name, protocol_version)  # type: ignore[assignment]
+        self.address = address
+        self.port = port
+        self.name = name
+        self.update()
+
+    def request_device_data(self, device_id: int) -> Future:
+        return self.comms.request_device_data(device_id)  # type: ignore[attr-defined]
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+"""
+단계별 소요 시간 기록 (시작 경로 프로파일링)
+
+connect()/init_all_keys()의 각 단계(핸드셰이크, 장치 열거, direct 모드 확인, ...)를
+phase() 블록으로 감싸 ms 단위로 남긴다. 같은 이름이 다시 기록되면 덮어쓴다.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class PhaseTimer:
+    """Ordered name -> milliseconds record of startup phases."""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.phases = {}
+
+    def add(self, name: str, ms: float) -> None:
+        self.phases.pop(name, None)
+        self.phases[name] = float(ms)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000.0)
+
+    def total_ms(self) -> float:
+        return sum(self.phases.values())
+
+    def report(self) -> Dict[str, float]:
+        out = dict(self.phases)
+        out["total"] = self.total_ms()
+        return out
+
+    def format(self) -> str:
+        parts = [f"{k}={v:.1f}ms" for k, v in self.phases.items()]
+        parts.append(f"total={self.total_ms():.1f}ms")
+        return " ".join(parts)
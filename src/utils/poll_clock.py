@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+"""
+폴링 루프 시계 (녹화/재생 결정성)
+
+settle 확인, 버스 ACK 대기, 리드백 재시도처럼 "데드라인까지 다시 읽기" 루프는
+벽시계로 끝나므로 같은 리드백이라도 실행마다 읽기 횟수가 달라질 수 있다.
+이 루프들은 time.perf_counter / time.sleep 대신 여기의 now() / sleep()을 쓴다.
+
+- 평소: time.perf_counter / time.sleep 그대로
+- 녹화: RecordingBackend가 시계를 설치해 now() 값을 녹화 파일에 같이 남긴다
+- 재생: ReplayBackend가 녹화된 now() 값을 순서대로 돌려준다
+        → 루프가 녹화 때와 같은 리드백을 보고 같은 횟수만큼 돈다
+"""
+
+import threading
+import time
+from typing import Any, Optional
+
+_LOCK = threading.Lock()
+_SOURCE: Optional[Any] = None
+
+
+def now() -> float:
+    """Seconds on the poll-loop clock (perf_counter unless a recording/replay clock is installed)."""
+    src = _SOURCE
+    return src.now() if src is not None else time.perf_counter()
+
+
+def sleep(seconds: float) -> None:
+    src = _SOURCE
+    if src is not None:
+        src.sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def source() -> Optional[Any]:
+    """The installed clock source (None = wall clock)."""
+    return _SOURCE
+
+
+def install(source: Any) -> None:
+    """Route now()/sleep() through `source` (an object with now() and sleep(seconds))."""
+    global _SOURCE
+    with _LOCK:
+        _SOURCE = source
+
+
+def uninstall(source: Any) -> None:
+    """Back to the wall clock, unless another source replaced `source` meanwhile."""
+    global _SOURCE
+    with _LOCK:
+        if _SOURCE is source:
+            _SOURCE = None
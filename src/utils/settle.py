@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+"""
+LED 쓰기 후 안정화(settle) 대기
+
+모드:
+- fixed:    고정 지연만큼 잠든다 (기존 동작, 기본값)
+- readback: 장치 상태를 다시 읽어 방금 쓴 색이 관측될 때까지 폴링한다.
+            마감 시간(timeout)을 넘기면 포기하고 timeout으로 집계한다.
+
+readback 모드에서 관측된 settle 시간 분포를 기록해 두었다가
+`settle_stats()`로 확인할 수 있다. 환경변수 RGB_SETTLE=readback 으로도 켤 수 있다.
+
+probe=True (연결/초기화 경로의 준비 확인):
+모드와 관계없이 리드백으로 확인하고, 고정 지연은 마감 시간으로만 쓴다.
+첫 확인은 쓰기 호출이 이미 읽어 온 장치 상태로 하므로 확인된 경우 추가 왕복이 없다.
+
+색 비교는 채널별 허용 오차(tolerance, 기본 12, RGB_SETTLE_TOL)로 한다.
+리드백이 양자화/잡음을 타는 장치(RGB_SIM_NOISE 시뮬레이션, 색을 반올림하는 하드웨어)에서
+정확히 같은 값은 끝내 관측되지 않을 수 있기 때문. 프로브 마감 초과는 따로 집계하고 경고를 남긴다.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Callable, Deque, Dict, Mapping, Optional, Tuple
+
+from utils import poll_clock
+
+_MODE: Optional[str] = None  # None → env(RGB_SETTLE) 또는 "fixed"
+_TIMEOUT_MS: float = 60.0
+_POLL_MS: float = 1.0
+_TOLERANCE: Optional[int] = None  # None → env(RGB_SETTLE_TOL) 또는 12
+_DEFAULT_TOLERANCE = 12
+
+
+class SettleStats:
+    """Rolling record of observed settle times (ms) plus timeout count."""
+
+    def __init__(self, maxlen: int = 1024) -> None:
+        self._samples: Deque[float] = deque(maxlen=int(maxlen))
+        self._lock = threading.Lock()
+        self.timeouts: int = 0
+        self.probe_timeouts: int = 0
+
+    def record(self, ms: float) -> None:
+        with self._lock:
+            self._samples.append(float(ms))
+
+    def timeout(self, probe: bool = False) -> None:
+        with self._lock:
+            if probe:
+                self.probe_timeouts += 1
+            else:
+                self.timeouts += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self.timeouts = 0
+            self.probe_timeouts = 0
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            xs = sorted(self._samples)
+            touts = self.timeouts
+            ptouts = self.probe_timeouts
+        out: Dict[str, float] = {"n": float(len(xs)), "timeouts": float(touts), "probe_timeouts": float(ptouts)}
+        if not xs:
+            return out
+
+        def pct(p: float) -> float:
+            k = min(len(xs) - 1, max(0, int(round(p * (len(xs) - 1)))))
+            return xs[k]
+
+        out.update({
+            "mean_ms": sum(xs) / len(xs),
+            "p50_ms": pct(0.50),
+            "p90_ms": pct(0.90),
+            "p99_ms": pct(0.99),
+            "max_ms": xs[-1],
+        })
+        return out
+
+
+STATS = SettleStats()
+
+
+def set_settle_mode(mode: str, timeout_ms: Optional[float] = None, tolerance: Optional[int] = None) -> None:
+    """Select 'fixed' (sleep) or 'readback' (poll until observed) settling.
+
+    `tolerance` is the per-channel difference still accepted as "observed".
+    """
+    global _MODE, _TIMEOUT_MS, _TOLERANCE
+    m = str(mode).strip().lower()
+    if m not in ("fixed", "readback"):
+        raise ValueError(f"unknown settle mode '{mode}' (fixed|readback)")
+    _MODE = m
+    if timeout_ms is not None:
+        try:
+            _TIMEOUT_MS = max(1.0, float(timeout_ms))
+        except Exception:
+            pass
+    if tolerance is not None:
+        _TOLERANCE = max(0, int(tolerance))
+
+
+def get_settle_mode() -> str:
+    if _MODE is not None:
+        return _MODE
+    env = str(os.environ.get("RGB_SETTLE", "")).strip().lower()
+    return "readback" if env == "readback" else "fixed"
+
+
+def get_settle_tolerance() -> int:
+    if _TOLERANCE is not None:
+        return _TOLERANCE
+    try:
+        return max(0, int(os.environ.get("RGB_SETTLE_TOL", "") or _DEFAULT_TOLERANCE))
+    except Exception:
+        return _DEFAULT_TOLERANCE
+
+
+def settle_stats() -> Dict[str, float]:
+    return STATS.summary()
+
+
+def _refresh(device: Any) -> None:
+    fn = getattr(device, "refresh", None) or getattr(device, "update", None)
+    if fn is not None:
+        fn()
+
+
+def _observed(device: Any, idx: int) -> Optional[Tuple[int, int, int]]:
+    try:
+        c = device.colors[idx]
+    except Exception:
+        try:
+            c = device.leds[idx].colors[0]
+        except Exception:
+            return None
+    return (int(c.red), int(c.green), int(c.blue))
+
+
+def _worst_diff(device: Any, expected: Mapping[int, Tuple[int, int, int]]) -> int:
+    """Largest per-channel |observed - expected| over `expected` (256 if unreadable)."""
+    worst = 0
+    for i, rgb in expected.items():
+        got = _observed(device, i)
+        if got is None:
+            return 256
+        d = max(abs(got[0] - int(rgb[0])), abs(got[1] - int(rgb[1])), abs(got[2] - int(rgb[2])))
+        if d > worst:
+            worst = d
+    return worst
+
+
+def _matches(device: Any, expected: Mapping[int, Tuple[int, int, int]]) -> bool:
+    return _worst_diff(device, expected) <= get_settle_tolerance()
+
+
+def _poll(check: Callable[[], bool], lock: Any, timeout_ms: Optional[float] = None,
+          probe: bool = False) -> bool:
+    guard = lock if lock is not None else nullcontext()
+    t0 = poll_clock.now()
+    deadline = t0 + (_TIMEOUT_MS if timeout_ms is None else timeout_ms) / 1000.0
+    while True:
+        try:
+            with guard:
+                ok = check()
+        except Exception:
+            ok = False
+        now = poll_clock.now()
+        if ok:
+            STATS.record((now - t0) * 1000.0)
+            return True
+        if now >= deadline:
+            STATS.timeout(probe)
+            return False
+        poll_clock.sleep(_POLL_MS / 1000.0)
+
+
+def _probe_timeout_ms(fixed_s: float) -> float:
+    try:
+        return max(_TIMEOUT_MS, float(fixed_s) * 1000.0)
+    except Exception:
+        return _TIMEOUT_MS
+
+
+def settle(device: Any, expected: Mapping[int, Tuple[int, int, int]],
+           fixed_s: float, lock: Any = None, probe: bool = False) -> bool:
+    """Wait until `expected` {led_index: rgb} is visible on `device`.
+
+    In fixed mode this just sleeps `fixed_s`. Returns False on a readback
+    timeout (the write went out but was not observed before the deadline).
+    With `probe` it always polls, starting from the state the write call
+    already read back, and `fixed_s` only bounds the wait.
+    """
+    if probe and expected and device is not None:
+        first = [True]
+
+        def probe_check() -> bool:
+            if not first[0]:
+                _refresh(device)
+            first[0] = False
+            return _matches(device, expected)
+
+        timeout_ms = _probe_timeout_ms(fixed_s)
+        ok = _poll(probe_check, lock, timeout_ms, probe=True)
+        if not ok:
+            try:
+                print(f"[RGB-SETTLE] probe timed out after {timeout_ms:.0f}ms: {len(expected)} LEDs, "
+                      f"worst channel diff {_worst_diff(device, expected)} > tolerance {get_settle_tolerance()}")
+            except Exception:
+                pass
+        return ok
+    if get_settle_mode() != "readback" or not expected or device is None:
+        try:
+            time.sleep(max(0.0, float(fixed_s)))
+        except Exception:
+            pass
+        return True
+
+    def check() -> bool:
+        _refresh(device)
+        return _matches(device, expected)
+
+    return _poll(check, lock)
+
+
+def settle_mode_switch(device: Any, mode_name: str, fixed_s: float, lock: Any = None,
+                       probe: bool = False) -> bool:
+    """Wait until the device reports `mode_name` as its active mode."""
+    if not probe and (get_settle_mode() != "readback" or device is None):
+        try:
+            time.sleep(max(0.0, float(fixed_s)))
+        except Exception:
+            pass
+        return True
+    if device is None:
+        return False
+    want = str(mode_name).strip().lower()
+    # Probes start from the state set_mode() already read back
+    first = [bool(probe)]
+
+    def check() -> bool:
+        if not first[0]:
+            _refresh(device)
+        first[0] = False
+        try:
+            active = device.modes[int(device.active_mode)]
+            return str(getattr(active, "name", "")).strip().lower() == want
+        except Exception:
+            return False
+
+    return _poll(check, lock, _probe_timeout_ms(fixed_s) if probe else None, probe=probe)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+"""
+LED 업데이트 방식 선택용 비용 모델
+
+패킷 하나의 비용을 `a + b * bytes` (ms)로 본다.
+- single: UpdateSingleLED   (헤더 16 + 8바이트)  × 변경 개수
+- zone:   UpdateZoneLEDs    (헤더 16 + 10 + 4×존 LED 수)
+- full:   UpdateLEDs        (헤더 16 + 6 + 4×전체 LED 수)
+
+a(패킷당 고정 비용), b(바이트당 비용)는 connect 시 실제 장치로 측정해 보정한다.
+측정값은 장치별로 JSON 캐시에 남겨 두고, 다음 connect부터는 측정(쓰기 수십 번) 없이 다시 쓴다.
+보정 전 기본값은 기존 SMALL_N=5 임계값(97키 기준)과 같은 선택을 내도록 잡았다.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+_HDR = 16
+SINGLE_BYTES = _HDR + 8            # i(led) + rgb + pad
+FULL_BASE_BYTES = _HDR + 4 + 2     # data_size + num_colors
+ZONE_BASE_BYTES = _HDR + 4 + 4 + 2  # data_size + zone_idx + num_colors
+COLOR_BYTES = 4
+
+
+class UpdateCostModel:
+    """Per-packet cost `a_ms + b_ms_per_byte * bytes`, calibrated per device."""
+
+    def __init__(self, a_ms: float = 0.5, b_ms_per_byte: float = 0.5 / 72.5) -> None:
+        self.a_ms = float(a_ms)
+        self.b_ms_per_byte = float(b_ms_per_byte)
+        self.calibrated = False
+        self.counts: Dict[str, int] = {"single": 0, "zone": 0, "full": 0}
+        self.last: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def packet_ms(self, nbytes: int) -> float:
+        return self.a_ms + self.b_ms_per_byte * float(nbytes)
+
+    def cost(self, primitive: str, n_changes: int, n_leds: int, zone_size: int = 0) -> float:
+        if primitive == "single":
+            return n_changes * self.packet_ms(SINGLE_BYTES)
+        if primitive == "zone":
+            return self.packet_ms(ZONE_BASE_BYTES + COLOR_BYTES * zone_size)
+        return self.packet_ms(FULL_BASE_BYTES + COLOR_BYTES * n_leds)
+
+    def choose(self, n_changes: int, n_leds: int, zone_size: Optional[int] = None) -> str:
+        """Cheapest primitive for `n_changes` LEDs ('zone' only if a zone covers them)."""
+        options = {
+            "single": self.cost("single", n_changes, n_leds),
+            "full": self.cost("full", n_changes, n_leds),
+        }
+        if zone_size is not None and 0 < zone_size < n_leds:
+            options["zone"] = self.cost("zone", n_changes, n_leds, zone_size)
+        pick = min(options, key=lambda k: options[k])
+        with self._lock:
+            self.counts[pick] = self.counts.get(pick, 0) + 1
+            self.last = pick
+        return pick
+
+    def breakeven(self, n_leds: int) -> int:
+        """Largest change count for which per-LED packets still beat one full frame."""
+        single = self.packet_ms(SINGLE_BYTES)
+        full = self.cost("full", 0, n_leds)
+        return int(full // single) if single > 0 else n_leds
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "a_ms": self.a_ms,
+                "b_ms_per_byte": self.b_ms_per_byte,
+                "calibrated": self.calibrated,
+                "counts": dict(self.counts),
+                "last": self.last,
+            }
+
+    def load(self, path: Union[str, Path], key: str) -> bool:
+        """Apply the fit saved under `key` in the JSON cache at `path` (False if none)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)[key]
+            a = float(entry["a_ms"])
+            b = float(entry["b_ms_per_byte"])
+        except Exception:
+            return False
+        if not (a > 0 and b > 0):
+            return False
+        with self._lock:
+            self.a_ms = a
+            self.b_ms_per_byte = b
+            self.calibrated = True
+        return True
+
+    def save(self, path: Union[str, Path], key: str) -> None:
+        """Store the current fit under `key` (other devices' entries are kept)."""
+        path = Path(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                data = {}
+        except Exception:
+            data = {}
+        with self._lock:
+            data[key] = {"a_ms": self.a_ms, "b_ms_per_byte": self.b_ms_per_byte, "saved": time.time()}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{os.getpid()}")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, path)
+        except Exception:
+            pass
+
+    def calibrate(self, send_single: Callable[[], None], send_full: Callable[[], None],
+                  barrier: Callable[[], None], n_leds: int, reps: int = 8) -> bool:
+        """Fit a/b from timed bursts of single-LED and full-frame writes.
+
+        Each burst is closed by `barrier()` (a readback round trip) so the
+        server has processed every packet; the bare barrier time is
+        subtracted. Leaves the defaults untouched if the fit is degenerate.
+        """
+        def _timed(fn: Optional[Callable[[], None]], n: int) -> float:
+            samples = []
+            for _ in range(3):
+                t0 = time.perf_counter()
+                for _ in range(n):
+                    if fn is not None:
+                        fn()
+                barrier()
+                samples.append((time.perf_counter() - t0) * 1000.0)
+            return statistics.median(samples)
+
+        try:
+            base = _timed(None, 0)
+            t_single = max(0.0, _timed(send_single, reps) - base) / reps
+            t_full = max(0.0, _timed(send_full, reps) - base) / reps
+        except Exception:
+            return False
+
+        full_bytes = FULL_BASE_BYTES + COLOR_BYTES * n_leds
+        span = full_bytes - SINGLE_BYTES
+        if span <= 0:
+            return False
+        b = (t_full - t_single) / span
+        a = t_single - b * SINGLE_BYTES
+        # Noise can push the fit negative; keep both terms physical
+        b = max(b, 1e-6)
+        a = max(a, 1e-3)
+        with self._lock:
+            self.a_ms = a
+            self.b_ms_per_byte = b
+            self.calibrated = True
+        return True